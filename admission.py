@@ -0,0 +1,224 @@
+# admission.py
+# Admission control: a concurrency limit + queue deadline per endpoint class.
+#
+# Sync endpoints share one threadpool and one SQLAlchemy pool, so without this a
+# burst of one kind (e.g. 10k nodes heartbeating after a network blip) queues in
+# front of everything else until clients time out. Each class gets its own lane:
+#   telemetry    heartbeats, execution log ingest
+#   auth         login / signup / me (argon2 is CPU heavy)
+#   billing      submit-job (+ dag), top-up, job completion, pricing writes
+#   public_read  marketplace, node details, pricing reads
+#   other        every other route
+# A request waits at most max_wait_ms for a slot (and only if fewer than
+# max_queue requests are already waiting); otherwise it gets an immediate
+# 503 + Retry-After instead of occupying a thread.
+# Health/metrics/system routes and long-lived log follow/stream requests are exempt.
+#
+# ADMISSION_ENABLED=0 turns it off.
+# ADMISSION_LIMITS="telemetry=10:100:200,auth=4:500:50,..."  class=concurrency:max_wait_ms:max_queue
+# (any class not listed keeps its default). Live numbers: GET /system/admission, /metrics.
+# `python admission.py` checks the routing of the endpoints below (exit 1 on a mismatch).
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger("indicompute.admission")
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "")
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 1))
+
+# class -> (concurrency, max_wait_ms, max_queue); sums to the default threadpool size (40)
+DEFAULT_LIMITS = {
+    "telemetry": (10, 100, 200),
+    "auth": (4, 500, 50),
+    "billing": (8, 1000, 100),
+    "public_read": (10, 250, 200),
+    "other": (8, 500, 100),
+}
+
+EXEMPT = "exempt"
+
+# (class, method or None for any, path regex); first match wins, default "other"
+CLASS_RULES = [
+    (EXEMPT, None, r"/(healthz|metrics|db-test|docs|redoc|openapi\.json|system/.*)"),
+    (EXEMPT, "GET", r"/gpu-exec/logs/\d+/(follow|stream)"),
+    ("telemetry", "POST", r"/(node-heartbeat|gpu-exec/log|gpu-exec/logs/bulk)"),
+    ("auth", None, r"/(login|signup|me)"),
+    ("billing", "POST", r"/(submit-job(/dag)?|wallet/topup|job/complete|simulate-job-complete/\d+|pricing/\d+)"),
+    ("public_read", "GET", r"/(marketplace/gpu-nodes(/\d+/reliability)?|gpu-nodes/details|pricing/\d+)"),
+]
+_COMPILED = [(cls, method, re.compile(pattern + r"/?")) for cls, method, pattern in CLASS_RULES]
+
+# (method, path, expected class): endpoints whose lane matters, checked by `python admission.py`
+EXPECTED_CLASSES = [
+    ("GET", "/healthz", EXEMPT),
+    ("GET", "/system/admission", EXEMPT),
+    ("GET", "/gpu-exec/logs/7/follow", EXEMPT),
+    ("POST", "/node-heartbeat", "telemetry"),
+    ("POST", "/gpu-exec/logs/bulk", "telemetry"),
+    ("POST", "/login", "auth"),
+    ("POST", "/submit-job", "billing"),
+    ("POST", "/submit-job/dag", "billing"),
+    ("POST", "/wallet/topup", "billing"),
+    ("POST", "/job/complete", "billing"),
+    ("POST", "/simulate-job-complete/7", "billing"),
+    ("POST", "/pricing/7", "billing"),
+    ("GET", "/pricing/7", "public_read"),
+    ("GET", "/marketplace/gpu-nodes", "public_read"),
+    ("GET", "/marketplace/gpu-nodes/7/reliability", "public_read"),
+    ("GET", "/user-jobs", "other"),
+]
+
+
+def classify(method: str, path: str) -> str:
+    for cls, rule_method, pattern in _COMPILED:
+        if (rule_method is None or rule_method == method) and pattern.fullmatch(path):
+            return cls
+    return "other"
+
+
+def parse_limits(spec: str) -> Dict[str, tuple]:
+    limits = dict(DEFAULT_LIMITS)
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, values = part.partition("=")
+        concurrency, max_wait_ms, max_queue = (int(v) for v in values.split(":"))
+        limits[name.strip()] = (concurrency, max_wait_ms, max_queue)
+    return limits
+
+
+class Lane:
+    """Concurrency limiter for one class. Event-loop only (no locks needed)."""
+
+    def __init__(self, name: str, limit: int, max_wait_ms: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_wait_seen_ms = 0.0
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            return False
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiters.append(fut)
+        self.queued_total += 1
+        timer = loop.call_later(self.max_wait, lambda: fut.done() or fut.set_result(False))
+        started = time.perf_counter()
+        try:
+            granted = await fut  # True: a finishing request handed us its slot
+        except asyncio.CancelledError:
+            # client went away while queued; give back a slot that was handed over meanwhile
+            if fut.done() and not fut.cancelled() and fut.result():
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+        self.max_wait_seen_ms = max(self.max_wait_seen_ms, (time.perf_counter() - started) * 1000)
+        if granted:
+            self.admitted += 1
+        else:
+            self.rejected_timeout += 1
+        return granted
+
+    def release(self):
+        # hand the slot straight to the oldest waiter still waiting (active count unchanged)
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "max_wait_ms": int(self.max_wait * 1000),
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "max_wait_seen_ms": round(self.max_wait_seen_ms, 1),
+        }
+
+
+class AdmissionController:
+    def __init__(self, limits: Optional[Dict[str, tuple]] = None, enabled: bool = ADMISSION_ENABLED):
+        self.enabled = enabled
+        self.lanes = {name: Lane(name, *values) for name, values in (limits or parse_limits(ADMISSION_LIMITS)).items()}
+
+    def stats(self) -> Dict:
+        return {"enabled": self.enabled, "retry_after_seconds": ADMISSION_RETRY_AFTER,
+                "classes": {name: lane.stats() for name, lane in self.lanes.items()}}
+
+
+controller = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: admit the request into its class lane or answer 503 + Retry-After right away."""
+
+    def __init__(self, app, controller: AdmissionController = controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.enabled:
+            return await self.app(scope, receive, send)
+        cls = classify(scope["method"], scope["path"])
+        lane = self.controller.lanes.get(cls)
+        if lane is None:  # exempt
+            return await self.app(scope, receive, send)
+
+        if not await lane.acquire():
+            logger.warning("request shed", extra={"admission_class": cls, "path": scope["path"]})
+            body = json.dumps({"detail": f"Server busy ({cls}), retry later"}).encode()
+            await send({"type": "http.response.start", "status": 503, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(ADMISSION_RETRY_AFTER).encode()),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
+
+
+if __name__ == "__main__":
+    import sys
+
+    wrong = [(method, path, expected, classify(method, path)) for method, path, expected in EXPECTED_CLASSES
+             if classify(method, path) != expected]
+    for method, path, expected, got in wrong:
+        print(f"{method} {path}: {got}, expected {expected}", file=sys.stderr)
+    if wrong:
+        sys.exit(1)
+    print(f"admission classes OK ({len(EXPECTED_CLASSES)} endpoints)")
@@ -0,0 +1,197 @@
+# archive.py
+# Hot/cold split for finished jobs.
+#
+# Jobs that finished more than ARCHIVE_AFTER_DAYS ago are moved, ARCHIVE_BATCH_SIZE
+# at a time, from `jobs` into `jobs_archive` (same ids), and their execution log
+# (compacted chunks + loose rows) into one compressed `job_log_archives` block per
+# job. Each batch is one transaction: archive rows inserted, originals deleted.
+# That keeps `jobs` / `gpu_execution_logs` (and the indexes behind /user-jobs,
+# job-status and the node/job cascade deletes) the size of the live working set.
+#
+# Archived jobs are only read when asked for explicitly:
+#   GET /job-status/{id}?include_archived=true
+#   GET /user-jobs?include_archived=true
+#   GET /gpu-exec/logs/{id}?include_archived=true
+#
+# CLI (cron):  python archive.py run [--days N] [--batch-size N] [--max-batches N] [--dry-run]
+
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, insert
+from sqlalchemy.orm import Session
+
+import log_store
+from database import SessionLocal
+from models import (
+    GPUExecutionLog, GPUExecutionLogChunk, GPUNode, Job, JobArchive, JobLogArchive, NodeEarning
+)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_CODEC = os.getenv("ARCHIVE_CODEC", "lzma")
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# columns copied one to one (everything but archived_at)
+JOB_COLUMNS = tuple(c.name for c in Job.__table__.columns)
+
+
+def _finished_before(cutoff: datetime):
+    # not every completion path sets end_time; fall back to the last update / creation
+    return and_(Job.status.in_(FINISHED_STATUSES),
+                func.coalesce(Job.end_time, Job.updated_at, Job.created_at) < cutoff)
+
+
+def _eligible(db: Session, query, cutoff: datetime):
+    query = query.filter(_finished_before(cutoff))
+    if db.get_bind().dialect.name == "sqlite":
+        # jobs has no AUTOINCREMENT: SQLite hands out max(id) + 1, so the newest row
+        # stays put, otherwise new jobs could reuse ids that are already archived
+        query = query.filter(Job.id < db.query(func.max(Job.id)).scalar_subquery())
+        if log_store.log_ids_reusable(db):
+            # same for gpu_execution_logs until migrate.py rebuilt it with AUTOINCREMENT
+            newest_log = db.query(func.max(GPUExecutionLog.id)).scalar_subquery()
+            query = query.filter(~exists().where(GPUExecutionLog.job_id == Job.id, GPUExecutionLog.id == newest_log))
+    else:
+        # node_earnings.job_id is ON DELETE SET NULL: where foreign keys are enforced,
+        # leave jobs that earnings still point at in place instead of losing the link
+        query = query.filter(~exists().where(NodeEarning.job_id == Job.id))
+    return query
+
+
+def eligible_job_ids(db: Session, cutoff: datetime, limit: int) -> List[int]:
+    return [r[0] for r in _eligible(db, db.query(Job.id), cutoff).order_by(Job.id).limit(limit).all()]
+
+
+def _collect_logs(db: Session, job_ids: List[int]) -> Dict[int, List[tuple]]:
+    """job_id -> [(id, log_type, details, timestamp)] ordered by id, from chunks and rows in two queries."""
+    lines: Dict[int, List[tuple]] = {}
+    chunks = (
+        db.query(GPUExecutionLogChunk.job_id, GPUExecutionLogChunk.codec, GPUExecutionLogChunk.data)
+        .filter(GPUExecutionLogChunk.job_id.in_(job_ids))
+        .order_by(GPUExecutionLogChunk.job_id, GPUExecutionLogChunk.first_log_id)
+        .all()
+    )
+    for job_id, codec, data in chunks:
+        out = lines.setdefault(job_id, [])
+        for log_id, log_type, details, ts in log_store.decode_chunk(data, codec):
+            out.append((log_id, log_type, details, datetime.fromisoformat(ts) if ts else None))
+    rows = (
+        db.query(GPUExecutionLog.job_id, GPUExecutionLog.id, GPUExecutionLog.log_type,
+                 GPUExecutionLog.details, GPUExecutionLog.timestamp)
+        .filter(GPUExecutionLog.job_id.in_(job_ids))
+        .order_by(GPUExecutionLog.job_id, GPUExecutionLog.id)
+        .all()
+    )
+    for job_id, *line in rows:
+        lines.setdefault(job_id, []).append(tuple(line))
+    for out in lines.values():
+        out.sort(key=lambda line: line[0])
+    return lines
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE,
+                  codec: str = ARCHIVE_CODEC) -> Tuple[int, int]:
+    """Move one batch of finished jobs (+ logs) into the archive tables. Returns (jobs, log lines) moved."""
+    job_ids = eligible_job_ids(db, cutoff, batch_size)
+    if not job_ids:
+        return 0, 0
+
+    jobs = db.query(*(getattr(Job, name) for name in JOB_COLUMNS)).filter(Job.id.in_(job_ids)).all()
+    logs = _collect_logs(db, job_ids)
+    now = datetime.utcnow()
+
+    db.execute(insert(JobArchive), [{**row._asdict(), "archived_at": now} for row in jobs])
+    log_blocks = []
+    for job_id, lines in logs.items():
+        data, raw_size = log_store.encode_lines(lines, codec)
+        log_blocks.append({"job_id": job_id, "line_count": len(lines), "codec": codec,
+                           "raw_size": raw_size, "data": data, "archived_at": now})
+    if log_blocks:
+        db.execute(insert(JobLogArchive), log_blocks)
+
+    db.query(GPUExecutionLog).filter(GPUExecutionLog.job_id.in_(job_ids)).delete(synchronize_session=False)
+    db.query(GPUExecutionLogChunk).filter(GPUExecutionLogChunk.job_id.in_(job_ids)).delete(synchronize_session=False)
+    db.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(jobs), sum(len(lines) for lines in logs.values())
+
+
+def run(db: Session, days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+        max_batches: Optional[int] = None, codec: str = ARCHIVE_CODEC) -> Dict:
+    """Archive batches until nothing older than `days` is left (or max_batches is reached)."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    totals = {"batches": 0, "jobs": 0, "log_lines": 0}
+    while max_batches is None or totals["batches"] < max_batches:
+        jobs, lines = archive_batch(db, cutoff, batch_size, codec)
+        if not jobs:
+            break
+        totals["batches"] += 1
+        totals["jobs"] += jobs
+        totals["log_lines"] += lines
+    return totals
+
+
+# ---------- read path ----------
+def get_job(db: Session, job_id: int, user_id: int) -> Optional[JobArchive]:
+    return db.query(JobArchive).filter(JobArchive.id == job_id, JobArchive.user_id == user_id).first()
+
+
+def job_access(db: Session, job_id: int) -> Optional[tuple]:
+    """(submitter id, node owner id) of an archived job, None if it is not archived."""
+    return (
+        db.query(JobArchive.user_id, GPUNode.owner_id)
+        .outerjoin(GPUNode, GPUNode.id == JobArchive.node_id)
+        .filter(JobArchive.id == job_id)
+        .first()
+    )
+
+
+def read_job_logs(db: Session, job_id: int, from_id: Optional[int] = None,
+                  to_id: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+    """Same contract as log_store.read_job_logs, served from the archived block."""
+    block = (
+        db.query(JobLogArchive.codec, JobLogArchive.data)
+        .filter(JobLogArchive.job_id == job_id)
+        .first()
+    )
+    if block is None:
+        return []
+    out: List[Dict] = []
+    for log_id, log_type, details, ts in log_store.decode_chunk(block.data, block.codec):
+        if from_id is not None and log_id < from_id:
+            continue
+        if to_id is not None and log_id > to_id:
+            break
+        if limit is not None and len(out) >= limit:
+            break
+        out.append({"id": log_id, "job_id": job_id, "log_type": log_type, "details": details, "timestamp": ts})
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move finished jobs and their logs into the archive tables")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive jobs finished before now - DAYS")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--codec", choices=["zlib", "lzma"], default=ARCHIVE_CODEC)
+    parser.add_argument("--dry-run", action="store_true", help="only count the jobs that would be moved")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.dry_run:
+            cutoff = datetime.utcnow() - timedelta(days=args.days)
+            count = _eligible(session, session.query(func.count(Job.id)), cutoff).scalar()
+            print(f"{count} finished job(s) older than {args.days} day(s) would be archived")
+        else:
+            totals = run(session, args.days, args.batch_size, args.max_batches, args.codec)
+            print(f"archived {totals['jobs']} job(s) and {totals['log_lines']} log line(s) "
+                  f"in {totals['batches']} batch(es)")
+    finally:
+        session.close()
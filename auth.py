@@ -2,8 +2,8 @@ from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from passlib.hash import argon2
 import jwt
+import logging
 import os
 
 from database import get_db
@@ -15,22 +15,27 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
 
-print("AUTH_SECRET_KEY =", SECRET_KEY)
-
 bearer_scheme = HTTPBearer(auto_error=True)
 
+logger = logging.getLogger("indicompute.auth")
+
 
 # =====================================================
 # PASSWORD HASHING (Argon2 — recommended & stable)
 # =====================================================
 
+# passlib + argon2-cffi are imported on first use (only signup/login need them), not at worker boot
+def _argon2():
+    from passlib.hash import argon2
+    return argon2
+
 def hash_password(plain: str) -> str:
     """Hash password using Argon2 (no 72-byte limit issue)."""
-    return argon2.hash(plain.strip())
+    return _argon2().hash(plain.strip())
 
 def verify_password(plain: str, hashed: str) -> bool:
     """Verify Argon2 hashed password."""
-    return argon2.verify(plain.strip(), hashed)
+    return _argon2().verify(plain.strip(), hashed)
 
 
 # =====================================================
@@ -68,7 +73,7 @@ def signup_user(email: str, username: str, full_name: str, password: str, db: Se
     db.commit()
     db.refresh(new_user)
 
-    print(f"[AUTH][SIGNUP] id={new_user.id} email={new_user.email}")
+    logger.info("signup", extra={"user_id": new_user.id, "email": new_user.email})
 
     return new_user
 
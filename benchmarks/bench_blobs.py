@@ -0,0 +1,154 @@
+"""
+Benchmark: job results inline in the jobs row vs offloaded to the
+content-addressed blob store (blob_store.py).
+
+--jobs jobs of one user get a result of ~--result-kb KB of training-log text;
+every --dup-every-th job prints the same output (identical tracebacks, cached
+runs), which the store keeps once. The same database is measured twice:
+
+  inline     results in jobs.result (how they were stored before)
+  offloaded  after `blob_store.offload_results()`: the row keeps sha + size
+
+For both: GET /user-jobs and GET /job-status/{id} latency and response size,
+and the size of the SQLite file; for offloaded also the blob store size and
+streaming one --large-mb MB result back through GET /job-result/{id}.
+
+    python benchmarks/bench_blobs.py --jobs 2000 --result-kb 64 --dup-every 5
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def training_log(rnd, kb):
+    lines, size, step = [], 0, 0
+    while size < kb * 1024:
+        line = f"epoch {step // 100} step {step} loss {rnd.random():.6f} lr {rnd.random() / 1000:.8f} gpu_mem 71.2GB\n"
+        lines.append(line)
+        size += len(line)
+        step += 1
+    return "".join(lines)
+
+
+def seed(db_path, jobs, kb, dup_every, rnd):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users (id, email, username, hashed_password, wallet_balance) "
+                 "VALUES (1, 'blob@bench.local', 'blob', 'x', 0)")
+    conn.execute("INSERT INTO gpu_nodes (id, location, gpu_model, gpu_count, owner_id, node_key, is_online, "
+                 "is_public) VALUES (1, 'mumbai', 'A100', 8, 1, 'nk', 1, 1)")
+    shared = training_log(rnd, kb)
+    now = str(datetime.utcnow())
+    conn.executemany("INSERT INTO jobs (id, user_id, node_id, command, status, result, created_at, updated_at) "
+                     "VALUES (?, 1, 1, 'python train.py', 'completed', ?, ?, ?)",
+                     ((i, shared if i % dup_every == 0 else training_log(rnd, kb), now, now)
+                      for i in range(1, jobs + 1)))
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def timed(client, url, headers, repeat):
+    samples, size = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        resp = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert resp.status_code == 200, resp.text[:200]
+        size = len(resp.content)
+    return {"p50_ms": round(statistics.median(samples), 2), "bytes": size}
+
+
+def measure(client, headers, db_path, jobs, repeat):
+    conn = sqlite3.connect(db_path)
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # WAL mode: the vacuumed pages land in the -wal first
+    conn.close()
+    return {
+        "user_jobs": timed(client, "/user-jobs", headers, repeat),
+        "job_status": timed(client, f"/job-status/{jobs // 2}", headers, repeat * 10),
+        "db_bytes": os.path.getsize(db_path),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--result-kb", type=int, default=64)
+    parser.add_argument("--dup-every", type=int, default=5, help="every Nth job has the same (shared) output")
+    parser.add_argument("--large-mb", type=int, default=64, help="size of the result streamed back")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-blobs-")
+    db_path = os.path.join(tmp, "blobs.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ.setdefault("ADMISSION_ENABLED", "0")
+    os.environ["BLOB_DIR"] = os.path.join(tmp, "blobs")
+    datagen.create_schema(db_path)
+    seed(db_path, args.jobs, args.result_kb, args.dup_every, random.Random(args.seed))
+
+    import blob_store
+    import main
+    from auth import create_access_token
+    from database import SessionLocal
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    headers = {"Authorization": "Bearer " + create_access_token({"user_id": 1, "email": "blob@bench.local"})}
+    inline = measure(client, headers, db_path, args.jobs, args.repeat)
+
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    moved = blob_store.offload_results(db)
+    offload_seconds = time.perf_counter() - t0
+    db.close()
+    offloaded = measure(client, headers, db_path, args.jobs, args.repeat)
+    offloaded.update({"moved_results": moved, "offload_seconds": round(offload_seconds, 2),
+                      "blob_store": blob_store.stats()})
+
+    # one large result: upload streamed into the store, download streamed back
+    rnd = random.Random(args.seed)
+    chunk = training_log(rnd, 1024).encode()
+    body = (chunk * (args.large_mb + 1))[:args.large_mb << 20]
+    t0 = time.perf_counter()
+    resp = client.put(f"/job-result/{args.jobs}", headers=headers, content=iter([body[i:i + (1 << 20)]
+                                                                                 for i in range(0, len(body), 1 << 20)]))
+    upload_seconds = time.perf_counter() - t0
+    assert resp.status_code == 200 and resp.json()["result_size"] == len(body), resp.text[:200]
+    t0 = time.perf_counter()
+    received = 0
+    with client.stream("GET", f"/job-result/{args.jobs}", headers=headers) as stream:
+        for part in stream.iter_bytes():
+            received += len(part)
+    download_seconds = time.perf_counter() - t0
+    assert received == len(body)
+
+    raw_bytes = args.jobs * args.result_kb * 1024
+    print(json.dumps({
+        "jobs": args.jobs, "result_kb": args.result_kb, "raw_result_bytes": raw_bytes,
+        "inline": inline, "offloaded": offloaded,
+        "user_jobs_response_ratio": round(inline["user_jobs"]["bytes"] / offloaded["user_jobs"]["bytes"], 1),
+        "user_jobs_speedup": round(inline["user_jobs"]["p50_ms"] / offloaded["user_jobs"]["p50_ms"], 1),
+        "large_result": {"mb": args.large_mb, "upload_mb_per_s": round(args.large_mb / upload_seconds, 1),
+                         "download_mb_per_s": round(args.large_mb / download_seconds, 1)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
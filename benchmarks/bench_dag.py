@@ -0,0 +1,111 @@
+"""
+Benchmark: multi-stage pipelines driven by the client vs submitted as a DAG
+(POST /submit-job/dag, job_dag.py).
+
+--pipelines pipelines of --stages sequential steps run on one node. The node
+"finishes" each running job with POST /job/complete as soon as it is running.
+
+  client-driven  the user submits stage 1, polls GET /job-status/{id} every
+                 --poll-seconds until it completed, then submits the next stage
+  dag            one POST /submit-job/dag per pipeline; the completion request
+                 itself queues and starts the next stage
+
+Per variant: API calls made by the user (client-driven: one poll per stage,
+the lower bound), and the gap between a stage completing and the next one
+running. The client-driven gap is modelled as half a poll interval (the
+expected wait until the next poll sees the completion) plus the measured
+poll + submit latency; the dag gap is measured (completion request -> next
+stage running).
+
+    python benchmarks/bench_dag.py --pipelines 50 --stages 4 --poll-seconds 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=50)
+    parser.add_argument("--stages", type=int, default=4)
+    parser.add_argument("--poll-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-dag-")
+    db_path = os.path.join(tmp, "dag.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ.setdefault("ADMISSION_ENABLED", "0")
+    os.environ["SCHEDULER_TICK_SECONDS"] = "0"
+    datagen.create_schema(db_path)
+
+    import main
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    signup = client.post("/signup", json={"email": "dag@bench.local", "username": "dag", "password": "bench"})
+    headers = {"Authorization": "Bearer " + signup.json()["access_token"]}
+    client.post("/wallet/topup", headers=headers, json={"amount": 10 ** 9})
+    node = client.post("/gpu-nodes", headers=headers,
+                       json={"location": "mumbai", "gpu_model": "H100", "gpu_count": 8}).json()
+    creds = {"node_id": node["id"], "node_key": node["node_key"]}
+
+    def status(job_id):
+        return client.get(f"/job-status/{job_id}", headers=headers).json()["status"]
+
+    # ---- client-driven: submit, poll until completed, submit the next stage ----
+    calls, step_ms = 0, []
+    for p in range(args.pipelines):
+        for s in range(args.stages):
+            t0 = time.perf_counter()
+            job = client.post("/submit-job", headers=headers, json={**creds, "command": f"stage{s} p{p}"}).json()
+            submit_ms = (time.perf_counter() - t0) * 1000
+            assert job["status"] == "running", job
+            client.post(f"/job/complete?job_id={job['id']}", headers=headers)
+            t0 = time.perf_counter()
+            assert status(job["id"]) == "completed"  # the poll that sees the completion
+            poll_ms = (time.perf_counter() - t0) * 1000
+            calls += 2
+            if s:
+                step_ms.append(submit_ms + poll_ms)
+    client_gap_ms = args.poll_seconds * 1000 / 2 + statistics.median(step_ms)
+    client_calls = calls / args.pipelines
+
+    # ---- dag: one submit, completions release the next stage ----
+    gaps, calls = [], 0
+    for p in range(args.pipelines):
+        steps = [{"name": f"s{s}", "command": f"stage{s} p{p}", "depends_on": [f"s{s - 1}"] if s else []}
+                 for s in range(args.stages)]
+        body = client.post("/submit-job/dag", headers=headers, json={**creds, "steps": steps}).json()
+        calls += 1
+        ids = [body["job_ids"][f"s{s}"] for s in range(args.stages)]
+        for s, job_id in enumerate(ids):
+            if s:
+                gaps.append((time.perf_counter() - t0) * 1000)
+                assert status(job_id) == "running"
+            t0 = time.perf_counter()
+            client.post(f"/job/complete?job_id={job_id}", headers=headers)
+        assert status(ids[-1]) == "completed"
+    dag_gap_ms = statistics.median(gaps)
+
+    print(json.dumps({
+        "pipelines": args.pipelines, "stages": args.stages, "poll_seconds": args.poll_seconds,
+        "client_driven": {"user_calls_per_pipeline": client_calls, "stage_gap_ms": round(client_gap_ms, 1)},
+        "dag": {"user_calls_per_pipeline": calls / args.pipelines, "stage_gap_ms": round(dag_gap_ms, 2)},
+        "gap_reduction": round(client_gap_ms / dag_gap_ms, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,239 @@
+"""
+In-process load test: drives the FastAPI app through httpx's ASGI transport
+(no sockets, no server) against a SQLite database filled by datagen.py, and
+reports per-endpoint latency percentiles and throughput as JSON.
+
+Every (endpoint, concurrency) cell runs --requests requests (or stops after
+--max-seconds) with `concurrency` coroutines in flight; sync endpoints run in
+Starlette's threadpool exactly like under uvicorn. Write endpoints run after the
+read endpoints so the reads see the generated data set.
+
+    python benchmarks/bench_endpoints.py --rows 100000 --concurrency 1 8 32 --out results.json
+    python benchmarks/bench_endpoints.py --db /tmp/bench.db           # reuse a generated db (copied first)
+    python benchmarks/bench_endpoints.py --endpoints marketplace user-jobs
+
+Compare two runs with `python benchmarks/bench_endpoints.py --compare old.json new.json`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p / 100))] * 1000, 3)
+
+
+# ---------- endpoint mix: name -> (kind, request builder) ----------
+def endpoints(m, tokens):
+    """Each builder gets a Random and returns (method, url, kwargs)."""
+    renter, owner = tokens["renter"], tokens["owner"]
+    node_lo, node_hi = m["node_ids"]
+
+    def heartbeat(rnd):
+        node_id = rnd.randint(node_lo, node_hi)
+        return "POST", "/node-heartbeat", {"json": {"node_id": node_id, "node_key": f"nk-{node_id}"}}
+
+    def submit_job(rnd):
+        node_id = rnd.randint(node_lo, node_hi)
+        return "POST", "/submit-job", {"headers": renter,
+                                       "json": {"node_id": node_id, "node_key": f"nk-{node_id}",
+                                                "command": "python train.py"}}
+
+    def exec_log(rnd):
+        return "POST", "/gpu-exec/log", {"json": {"job_id": m["hot_job_id"], "log_type": "stdout",
+                                                  "details": f"step {rnd.randint(0, 10 ** 6)}"}}
+
+    return {
+        # reads
+        "marketplace": ("read", lambda rnd: ("GET", "/marketplace/gpu-nodes", {})),
+        "gpu-nodes-details": ("read", lambda rnd: ("GET", "/gpu-nodes/details", {})),
+        "user-jobs": ("read", lambda rnd: ("GET", "/user-jobs", {"headers": renter})),
+        "wallet-transactions": ("read", lambda rnd: ("GET", "/wallet/transactions", {"headers": renter})),
+        "logs": ("read", lambda rnd: ("GET", f"/gpu-exec/logs/{m['hot_job_id']}", {"headers": renter,
+                                                                                   "params": {"limit": 1000}})),
+        "logs-full": ("read", lambda rnd: ("GET", f"/gpu-exec/logs/{m['hot_job_id']}", {"headers": renter})),
+        "owner-dashboard": ("read", lambda rnd: ("GET", "/earnings/dashboard", {"headers": owner})),
+        "node-dashboard": ("read", lambda rnd: ("GET", f"/earnings/dashboard/{m['hot_node_id']}",
+                                                {"headers": owner})),
+        "node-status": ("read", lambda rnd: ("GET", f"/node-status/{m['hot_node_id']}", {"headers": owner})),
+        # writes
+        "heartbeat": ("write", heartbeat),
+        "submit-job": ("write", submit_job),
+        "exec-log": ("write", exec_log),
+    }
+
+
+async def run_cell(client, build, concurrency, total, max_seconds, seed):
+    latencies, errors = [], {}
+    issued = 0
+    deadline = time.perf_counter() + max_seconds
+
+    async def worker(wid):
+        nonlocal issued
+        rnd = random.Random(seed * 1000 + wid)
+        while issued < total and time.perf_counter() < deadline:
+            issued += 1
+            method, url, kwargs = build(rnd)
+            t0 = time.perf_counter()
+            resp = await client.request(method, url, **kwargs)
+            await resp.aread()
+            latencies.append(time.perf_counter() - t0)
+            if resp.status_code >= 400:
+                errors[resp.status_code] = errors.get(resp.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+async def bench(args, manifest):
+    import httpx
+    import main
+    from auth import create_access_token
+
+    def bearer(user_id):
+        return {"Authorization": "Bearer " + create_access_token({"user_id": user_id,
+                                                                  "email": f"user{user_id}@bench.local"})}
+
+    table = endpoints(manifest, {"renter": bearer(manifest["hot_user_id"]),
+                                 "owner": bearer(manifest["hot_owner_id"])})
+    selected = args.endpoints or list(table)
+    unknown = set(selected) - set(table)
+    if unknown:
+        raise SystemExit(f"unknown endpoints: {sorted(unknown)} (choose from {sorted(table)})")
+    # reads first, then writes, each in the order given
+    selected = [e for e in selected if table[e][0] == "read"] + [e for e in selected if table[e][0] == "write"]
+
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in selected:
+            kind, build = table[name]
+            for _ in range(args.warmup):
+                method, url, kwargs = build(random.Random(0))
+                await client.request(method, url, **kwargs)
+            for concurrency in args.concurrency:
+                cell = await run_cell(client, build, concurrency, args.requests, args.max_seconds, args.seed)
+                results.append({"endpoint": name, "kind": kind, "concurrency": concurrency, **cell})
+                print(f"{name:<22} c={concurrency:<4} p50={cell['p50_ms']}ms p99={cell['p99_ms']}ms "
+                      f"{cell['throughput_rps']} rps errors={cell['errors']}", file=sys.stderr)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old_path, new_path):
+    """Print p50/p99/throughput deltas per (endpoint, concurrency) between two result files."""
+    with open(old_path) as f:
+        old = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    rows = []
+    for r in new:
+        o = old.get((r["endpoint"], r["concurrency"]))
+        if not o:
+            continue
+        rows.append({
+            "endpoint": r["endpoint"], "concurrency": r["concurrency"],
+            "p50_ms": [o["p50_ms"], r["p50_ms"]],
+            "p99_ms": [o["p99_ms"], r["p99_ms"]],
+            "throughput_rps": [o["throughput_rps"], r["throughput_rps"]],
+            "throughput_change_pct": round((r["throughput_rps"] / o["throughput_rps"] - 1) * 100, 1)
+            if o["throughput_rps"] else None,
+        })
+    print(json.dumps(rows, indent=2))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="jobs to generate (ignored with --db)")
+    parser.add_argument("--db", help="database built by datagen.py (a copy is benchmarked)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="requests per endpoint and concurrency level")
+    parser.add_argument("--max-seconds", type=float, default=30, help="time cap per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--endpoints", nargs="+")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-bench-")
+    db_path = os.path.join(tmp, "bench.db")
+    # app settings must be in place before database.py / main.py are imported
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    if args.db:
+        shutil.copyfile(args.db, db_path)
+        with open(args.db + ".json") as f:
+            manifest = json.load(f)
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    else:
+        manifest = datagen.build(db_path, args.rows, args.seed)
+    sys.path.insert(0, ROOT)
+
+    results = asyncio.run(bench(args, manifest))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite_profile": os.getenv("SQLITE_PROFILE", "production"),
+            "write_behind": os.getenv("WRITE_BEHIND_ENABLED", "0") == "1",
+            "admission": os.getenv("ADMISSION_ENABLED", "1") == "1",
+            "rows": manifest["rows"],
+            "counts": manifest["counts"],
+            "seed": args.seed,
+            "requests_per_cell": args.requests,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    print(text)
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,103 @@
+"""
+Benchmark: a dashboard polling its per-user collections (etags.py).
+
+For each of GET /user-jobs, /wallet/transactions, /gpu-nodes and
+/earnings/{node_id} of the datagen.py hot user / hot node:
+
+  full         plain GET (query + serialization of the whole list)
+  gzip         GET with Accept-Encoding: gzip (bytes on the wire)
+  revalidate   GET with If-None-Match: <ETag of the last response> -> 304
+               (version stamp only, no list query, no body)
+
+After one job of the user changes status, the revalidation must come back
+200 with a new ETag (no stale 304).
+
+    python benchmarks/bench_etags.py --rows 100000 --repeat 30
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def timed(client, url, headers, repeat, status):
+    samples, resp = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        resp = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert resp.status_code == status, (url, resp.status_code, resp.text[:200])
+    with client.stream("GET", url, headers=headers) as stream:  # bytes on the wire, before httpx decodes gzip
+        wire = sum(len(part) for part in stream.iter_raw())
+    return {"p50_ms": round(statistics.median(samples), 2), "bytes": wire}, resp
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-etags-")
+    db_path = os.path.join(tmp, "etags.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ.setdefault("ADMISSION_ENABLED", "0")
+    manifest = datagen.build(db_path, args.rows)
+
+    import main
+    from auth import create_access_token
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+
+    def auth(user_id):
+        token = create_access_token({"user_id": user_id, "email": f"user{user_id}@bench.local"})
+        return {"Authorization": "Bearer " + token, "Accept-Encoding": "identity"}
+
+    renter, owner = auth(manifest["hot_user_id"]), auth(manifest["hot_owner_id"])
+    endpoints = {
+        "user_jobs": ("/user-jobs", renter),
+        "wallet_transactions": ("/wallet/transactions", renter),
+        "gpu_nodes": ("/gpu-nodes", owner),
+        "node_earnings": (f"/earnings/{manifest['hot_node_id']}", owner),
+    }
+
+    results = {}
+    for name, (url, headers) in endpoints.items():
+        full, resp = timed(client, url, headers, args.repeat, 200)
+        gzip, _ = timed(client, url, {**headers, "Accept-Encoding": "gzip"}, args.repeat, 200)
+        revalidate, _ = timed(client, url, {**headers, "If-None-Match": resp.headers["etag"]}, args.repeat, 304)
+        results[name] = {"items": len(resp.json()), "full": full, "gzip": gzip, "revalidate_304": revalidate,
+                         "speedup_304": round(full["p50_ms"] / revalidate["p50_ms"], 1)}
+
+    # one job changes: the old tag must no longer match
+    url, headers = endpoints["user_jobs"]
+    etag = client.get(url, headers=headers).headers["etag"]
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE jobs SET status = 'completed', updated_at = ? WHERE id = "
+                 "(SELECT max(id) FROM jobs WHERE user_id = ?)",
+                 (str(datetime.utcnow() + timedelta(seconds=1)), manifest["hot_user_id"]))
+    conn.commit()
+    conn.close()
+    after = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert after.status_code == 200 and after.headers["etag"] != etag
+
+    print(json.dumps({"jobs": manifest["counts"]["jobs"], "endpoints": results,
+                      "revalidate_after_change": after.status_code}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
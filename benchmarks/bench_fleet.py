@@ -0,0 +1,125 @@
+"""
+Benchmark: registering a fleet of --nodes nodes (default 10k) with
+POST /gpu-nodes/bulk (CSV and JSON uploads, every other node priced) vs one
+POST /gpu-nodes/register + POST /pricing call per node.
+
+The per-node path is timed on --single nodes and extrapolated to --nodes.
+After each bulk upload the streamed keys are checked against the database
+(every node present, with the right key and price).
+
+    python benchmarks/bench_fleet.py --nodes 10000 --single 500
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def fleet(count, offset=0):
+    return [{"location": f"dc-{(offset + i) % 40}", "gpu_model": ("A100", "H100", "L4")[i % 3], "gpu_count": 8,
+             **({"price_per_hour": 40.0 + i % 25, "currency": "INR"} if i % 2 == 0 else {})}
+            for i in range(count)]
+
+
+def as_csv(nodes):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["location", "gpu_model", "gpu_count", "price_per_hour", "currency"])
+    for n in nodes:
+        writer.writerow([n["location"], n["gpu_model"], n["gpu_count"], n.get("price_per_hour", ""),
+                         n.get("currency", "")])
+    return buf.getvalue().encode()
+
+
+def verify(db_path, streamed, nodes):
+    """Every streamed (id, key) exists with its key, and priced nodes have their NodePricing row."""
+    conn = sqlite3.connect(db_path)
+    ids = [s["id"] for s in streamed]
+    found = {}
+    for start in range(0, len(ids), 500):
+        part = ids[start:start + 500]
+        marks = ",".join("?" * len(part))
+        found.update((r[0], r[1:]) for r in conn.execute(
+            f"SELECT g.id, g.node_key, p.price_per_hour FROM gpu_nodes g "
+            f"LEFT JOIN node_pricing p ON p.node_id = g.id WHERE g.id IN ({marks})", part))
+    conn.close()
+    for s, n in zip(streamed, nodes):
+        key, price = found.get(s["id"], (None, None))
+        if key != s["node_key"] or price != n.get("price_per_hour"):
+            raise SystemExit(f"node {s['id']}: database does not match the streamed key / price")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--single", type=int, default=500, help="nodes registered one by one (extrapolated)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-fleet-")
+    db_path = os.path.join(tmp, "fleet.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ.setdefault("ADMISSION_ENABLED", "0")
+    datagen.create_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users (id, email, username, hashed_password, wallet_balance) "
+                 "VALUES (1, 'fleet@bench.local', 'fleet', 'x', 0)")
+    conn.commit()
+    conn.close()
+
+    import main
+    from auth import create_access_token
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    headers = {"Authorization": "Bearer " + create_access_token({"user_id": 1, "email": "fleet@bench.local"})}
+    results = []
+
+    for name, content_type, encode in (("bulk-csv", "text/csv", as_csv),
+                                       ("bulk-json", "application/json", lambda n: json.dumps(n).encode())):
+        nodes = fleet(args.nodes, offset=len(results) * args.nodes)
+        body = encode(nodes)
+        t0 = time.perf_counter()
+        resp = client.post("/gpu-nodes/bulk", headers={**headers, "Content-Type": content_type},
+                           params={"format": "ndjson"}, content=body)
+        seconds = time.perf_counter() - t0
+        assert resp.status_code == 200, resp.text[:200]
+        streamed = [json.loads(line) for line in resp.text.splitlines()]
+        verify(db_path, streamed, nodes)
+        results.append({"path": name, "nodes": len(streamed), "upload_bytes": len(body),
+                        "seconds": round(seconds, 3), "nodes_per_second": round(len(streamed) / seconds, 1)})
+
+    nodes = fleet(args.single)
+    t0 = time.perf_counter()
+    for n in nodes:
+        resp = client.post("/gpu-nodes/register", headers=headers,
+                           json={k: n[k] for k in ("location", "gpu_model", "gpu_count")})
+        assert resp.status_code == 200, resp.text[:200]
+        if "price_per_hour" in n:
+            client.post(f"/pricing/{resp.json()['id']}", headers=headers,
+                        json={"price_per_hour": n["price_per_hour"], "currency": n["currency"]})
+    seconds = time.perf_counter() - t0
+    results.append({"path": "one-by-one", "nodes": args.single, "seconds": round(seconds, 3),
+                    "nodes_per_second": round(args.single / seconds, 1),
+                    f"extrapolated_seconds_for_{args.nodes}": round(seconds * args.nodes / args.single, 1)})
+
+    single_rate = results[-1]["nodes_per_second"]
+    for r in results[:-1]:
+        r["speedup_vs_one_by_one"] = round(r["nodes_per_second"] / single_rate, 1)
+    print(json.dumps({"nodes": args.nodes, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
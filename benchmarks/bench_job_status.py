@@ -0,0 +1,109 @@
+"""
+Benchmark: a dashboard refreshing the status of --dashboard jobs.
+
+  per-job      one GET /job-status/{id} per job (JWT decode + user query + job
+               query each)
+  batch-ids    one GET /job-status?ids=...  (one user query + one IN query)
+  delta-poll   one GET /job-status?changed_since=<cursor> after --changed of
+               the user's jobs changed status (only those come back)
+
+Runs on a benchmarks/datagen.py database (--rows jobs; the hot user owns ~1%
+of them, the dashboard shows the newest --dashboard of those). Every variant
+must return the same statuses for the jobs it covers.
+
+    python benchmarks/bench_job_status.py --rows 100000 --dashboard 50 --changed 5
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def p50(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 2), result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dashboard", type=int, default=50)
+    parser.add_argument("--changed", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-status-")
+    db_path = os.path.join(tmp, "status.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ.setdefault("ADMISSION_ENABLED", "0")
+    manifest = datagen.build(db_path, args.rows)
+    user_id = manifest["hot_user_id"]
+
+    import main
+    from auth import create_access_token
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    headers = {"Authorization": "Bearer " + create_access_token({"user_id": user_id,
+                                                                 "email": f"user{user_id}@bench.local"})}
+    conn = sqlite3.connect(db_path)
+    ids = [r[0] for r in conn.execute("SELECT id FROM jobs WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                                      (user_id, args.dashboard))]
+    user_jobs = conn.execute("SELECT count(*) FROM jobs WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def per_job():
+        return {i: client.get(f"/job-status/{i}", headers=headers).json()["status"] for i in ids}
+
+    def batch():
+        body = client.get("/job-status", headers=headers, params={"ids": ids}).json()
+        return {j["id"]: j["status"] for j in body["jobs"]}
+
+    per_job_ms, statuses = p50(per_job, max(1, args.repeat // 4))
+    batch_ms, batch_statuses = p50(batch, args.repeat)
+    assert statuses == batch_statuses
+
+    # a few jobs change status after the dashboard's last poll
+    cursor = client.get("/job-status", headers=headers, params={"ids": ids[:1]}).json()["cursor"]
+    changed = ids[:args.changed]
+    later = str(datetime.utcnow() + timedelta(seconds=1))
+    conn.execute(f"UPDATE jobs SET status = 'completed', updated_at = ? "
+                 f"WHERE id IN ({','.join('?' * len(changed))})", [later, *changed])
+    conn.commit()
+    conn.close()
+
+    def delta():
+        body = client.get("/job-status", headers=headers, params={"changed_since": cursor}).json()
+        return {j["id"]: j["status"] for j in body["jobs"]}
+
+    delta_ms, delta_statuses = p50(delta, args.repeat)
+    assert set(changed) <= set(delta_statuses) and all(delta_statuses[i] == "completed" for i in changed)
+
+    print(json.dumps({
+        "jobs": manifest["counts"]["jobs"], "user_jobs": user_jobs,
+        "dashboard": len(ids),
+        "per_job": {"requests": len(ids), "p50_ms": per_job_ms},
+        "batch_ids": {"requests": 1, "p50_ms": batch_ms, "speedup": round(per_job_ms / batch_ms, 1)},
+        "delta_poll": {"requests": 1, "p50_ms": delta_ms, "jobs_returned": len(delta_statuses),
+                       "speedup": round(per_job_ms / delta_ms, 1)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,172 @@
+"""
+Benchmark: row-per-line vs chunked/compressed GPU execution log storage.
+
+Builds two SQLite files with the same synthetic log dataset:
+  rows.db     every line is a gpu_execution_logs row (current layout)
+  chunked.db  same data after log_store.compact_job_logs(final=True)
+and reports file size plus read latency of log_store.read_job_logs for a
+small window in the middle of a job and for a whole job.
+
+    python benchmarks/bench_log_chunks.py --lines 10000000 --jobs 100
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(SessionLocal, lines, n_jobs, batch=50000):
+    from sqlalchemy import insert
+    from models import User, GPUNode, Job, GPUExecutionLog
+
+    db = SessionLocal()
+    user = User(email="bench@local", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+    node = GPUNode(owner_id=user.id, location="bench", gpu_model="A100", gpu_count=8, node_key="k")
+    db.add(node)
+    db.flush()
+    jobs = [Job(user_id=user.id, node_id=node.id, command="train", status="running") for _ in range(n_jobs)]
+    db.add_all(jobs)
+    db.commit()
+    job_ids = [j.id for j in jobs]
+
+    # lines of a job are consecutive (a training run streaming its output)
+    per_job = lines // n_jobs
+    t0 = datetime(2026, 1, 1)
+    rows = []
+    for j, job_id in enumerate(job_ids):
+        for i in range(per_job):
+            rows.append({
+                "job_id": job_id,
+                "log_type": "stdout" if i % 50 else "metrics",
+                "details": f"epoch={i // 1000} step={i} loss={1.0 / (i + 1):.6f} lr=0.0003 gpu_mem=71.2GB",
+                "timestamp": t0 + timedelta(seconds=j * per_job + i),
+            })
+            if len(rows) >= batch:
+                db.execute(insert(GPUExecutionLog), rows)
+                db.commit()
+                rows = []
+    if rows:
+        db.execute(insert(GPUExecutionLog), rows)
+        db.commit()
+    db.close()
+    return job_ids, per_job
+
+
+def vacuum_size(path):
+    from sqlalchemy import create_engine
+
+    plain = create_engine(f"sqlite:///{path}")
+    with plain.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.exec_driver_sql("VACUUM")
+    plain.dispose()
+    return os.path.getsize(path)
+
+
+def time_reads(SessionLocal, job_ids, per_job, window, trials, read_job_logs, GPUExecutionLog, GPUExecutionLogChunk):
+    db = SessionLocal()
+    rnd = random.Random(7)
+    # first log id of every job (works for both layouts)
+    first_ids = {}
+    for job_id in job_ids:
+        row = db.query(GPUExecutionLog.id).filter(GPUExecutionLog.job_id == job_id).order_by(GPUExecutionLog.id).first()
+        chunk = (db.query(GPUExecutionLogChunk.first_log_id)
+                 .filter(GPUExecutionLogChunk.job_id == job_id)
+                 .order_by(GPUExecutionLogChunk.first_log_id).first())
+        first_ids[job_id] = chunk[0] if chunk else row[0]
+
+    window_ms = []
+    for _ in range(trials):
+        job_id = rnd.choice(job_ids)
+        start = first_ids[job_id] + rnd.randrange(per_job - window)
+        t = time.perf_counter()
+        got = read_job_logs(db, job_id, from_id=start, to_id=start + window - 1)
+        window_ms.append((time.perf_counter() - t) * 1000)
+        assert len(got) == window, len(got)
+
+    full_ms = []
+    for job_id in job_ids[: min(5, len(job_ids))]:
+        t = time.perf_counter()
+        got = read_job_logs(db, job_id)
+        full_ms.append((time.perf_counter() - t) * 1000)
+        assert len(got) == per_job
+    db.close()
+    return {
+        f"window_{window}_p50_ms": round(statistics.median(window_ms), 3),
+        f"window_{window}_p95_ms": round(sorted(window_ms)[int(len(window_ms) * 0.95) - 1], 3),
+        "full_job_p50_ms": round(statistics.median(full_ms), 1),
+    }
+
+
+def run(lines, n_jobs, window, trials):
+    tmp = tempfile.mkdtemp()
+    rows_path = os.path.join(tmp, "rows.db")
+    chunked_path = os.path.join(tmp, "chunked.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{rows_path}"
+    sys.path.insert(0, ROOT)
+    try:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from database import Base, SessionLocal, engine, read_engine
+        from models import GPUExecutionLog, GPUExecutionLogChunk
+        import log_store
+
+        Base.metadata.create_all(bind=engine)
+        t = time.perf_counter()
+        job_ids, per_job = seed(SessionLocal, lines, n_jobs)
+        seed_s = time.perf_counter() - t
+        engine.dispose()
+        read_engine.dispose()
+        shutil.copy(rows_path, chunked_path)
+
+        chunked_engine = create_engine(f"sqlite:///{chunked_path}")
+        ChunkedSession = sessionmaker(bind=chunked_engine)
+        t = time.perf_counter()
+        db = ChunkedSession()
+        chunks = sum(log_store.compact_job_logs(db, j, final=True) for j in job_ids)
+        db.close()
+        compact_s = time.perf_counter() - t
+
+        result = {
+            "lines": per_job * n_jobs,
+            "jobs": n_jobs,
+            "chunk_lines": log_store.LOG_CHUNK_LINES,
+            "codec": log_store.LOG_CHUNK_CODEC,
+            "seed_seconds": round(seed_s, 1),
+            "compact_seconds": round(compact_s, 1),
+            "chunks": chunks,
+        }
+        chunked_engine.dispose()
+        rows_size = vacuum_size(rows_path)
+        chunked_size = vacuum_size(chunked_path)
+        result["rows_db_mb"] = round(rows_size / 2**20, 1)
+        result["chunked_db_mb"] = round(chunked_size / 2**20, 1)
+        result["size_ratio"] = round(rows_size / chunked_size, 1)
+
+        args = (job_ids, per_job, window, trials, log_store.read_job_logs, GPUExecutionLog, GPUExecutionLogChunk)
+        result["rows_read"] = time_reads(SessionLocal, *args)
+        result["chunked_read"] = time_reads(ChunkedSession, *args)
+        return result
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10_000_000)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--window", type=int, default=100, help="lines per range read")
+    parser.add_argument("--trials", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.lines, args.jobs, args.window, args.trials), indent=2))
@@ -0,0 +1,108 @@
+"""
+Benchmark: GPU execution log ingestion, lines/sec.
+
+Compares the per-line endpoint (POST /gpu-exec/log) with the batch endpoint
+(POST /gpu-exec/logs/bulk) as a JSON array and as streamed NDJSON.
+Runs fully in-process against a throw-away SQLite file.
+
+    python benchmarks/bench_log_ingest.py --lines 20000 --jobs 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_app(db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+    sys.path.insert(0, ROOT)
+
+    import main
+    from database import Base, SessionLocal, engine
+    from models import User, GPUNode, Job
+    from fastapi.testclient import TestClient
+
+    Base.metadata.create_all(bind=engine)
+    return main.app, SessionLocal, User, GPUNode, Job, TestClient
+
+
+def seed_jobs(SessionLocal, User, GPUNode, Job, n_jobs):
+    db = SessionLocal()
+    user = User(email="bench@local", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+    node = GPUNode(owner_id=user.id, location="bench", gpu_model="A100", gpu_count=1, node_key="k")
+    db.add(node)
+    db.flush()
+    jobs = [Job(user_id=user.id, node_id=node.id, command="train", status="running") for _ in range(n_jobs)]
+    db.add_all(jobs)
+    db.commit()
+    ids = [j.id for j in jobs]
+    db.close()
+    return ids
+
+
+def make_lines(job_ids, n):
+    return [
+        {"job_id": job_ids[i % len(job_ids)], "log_type": "stdout", "details": f"step {i} loss=0.{i % 997:03d}"}
+        for i in range(n)
+    ]
+
+
+def run(lines, n_jobs, single_lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        app, SessionLocal, User, GPUNode, Job, TestClient = setup_app(os.path.join(tmp, "bench.db"))
+        job_ids = seed_jobs(SessionLocal, User, GPUNode, Job, n_jobs)
+        client = TestClient(app)
+        results = {}
+
+        # 1) current endpoint, one request per line (sampled — it is slow)
+        single = make_lines(job_ids, single_lines)
+        t0 = time.perf_counter()
+        for item in single:
+            client.post("/gpu-exec/log", json=item).raise_for_status()
+        elapsed = time.perf_counter() - t0
+        results["single_line"] = {"lines": single_lines, "seconds": round(elapsed, 4),
+                                  "lines_per_sec": round(single_lines / elapsed, 1)}
+
+        # 2) bulk JSON array
+        payload = make_lines(job_ids, lines)
+        t0 = time.perf_counter()
+        client.post("/gpu-exec/logs/bulk", json=payload).raise_for_status()
+        elapsed = time.perf_counter() - t0
+        results["bulk_json"] = {"lines": lines, "seconds": round(elapsed, 4),
+                                "lines_per_sec": round(lines / elapsed, 1)}
+
+        # 3) streamed NDJSON
+        body = "\n".join(json.dumps(item) for item in payload).encode()
+
+        def _chunks(size=64 * 1024):
+            for i in range(0, len(body), size):
+                yield body[i:i + size]
+
+        t0 = time.perf_counter()
+        client.post("/gpu-exec/logs/bulk", content=_chunks(),
+                    headers={"Content-Type": "application/x-ndjson"}).raise_for_status()
+        elapsed = time.perf_counter() - t0
+        results["bulk_ndjson"] = {"lines": lines, "seconds": round(elapsed, 4),
+                                  "lines_per_sec": round(lines / elapsed, 1)}
+
+        base = results["single_line"]["lines_per_sec"]
+        for key in ("bulk_json", "bulk_ndjson"):
+            results[key]["speedup_vs_single"] = round(results[key]["lines_per_sec"] / base, 1)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000, help="lines sent through the bulk endpoint")
+    parser.add_argument("--jobs", type=int, default=4, help="number of jobs the lines are spread over")
+    parser.add_argument("--single-lines", type=int, default=500, help="lines sent through /gpu-exec/log")
+    args = parser.parse_args()
+    print(json.dumps(run(args.lines, args.jobs, args.single_lines), indent=2))
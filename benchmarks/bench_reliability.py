@@ -0,0 +1,156 @@
+"""
+Benchmark: full reliability refresh (reliability.py) with the NumPy reducer vs
+the per-row Python reducer, over --nodes nodes with a heartbeat every
+--interval seconds for the last --hours hours (random outages, jittered
+timestamps) plus a few finished / failed jobs per node.
+
+Both engines must store the same scores, otherwise the run fails. Also times
+the two reducers alone on one batch of already fetched heartbeats, one
+incremental refresh after a single new heartbeat and the marketplace listing
+sorted by the stored scores.
+
+    python benchmarks/bench_reliability.py --nodes 1000 --hours 24 --interval 30
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def seed(db_path, nodes, hours, interval, rnd):
+    now = datetime.utcnow()
+    start = now - timedelta(hours=hours)
+    steps = int(hours * 3600 / interval)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users (id, email, username, hashed_password, wallet_balance) "
+                 "VALUES (1, 'rel@bench.local', 'rel', 'x', 0)")
+    conn.executemany("INSERT INTO gpu_nodes (id, location, gpu_model, gpu_count, owner_id, node_key, is_online, "
+                     "is_public) VALUES (?, 'mumbai', 'A100', 8, 1, ?, 1, 1)",
+                     [(i, f"nk-{i}") for i in range(1, nodes + 1)])
+
+    def beats():
+        for node_id in range(1, nodes + 1):
+            down_from = rnd.randrange(steps) if rnd.random() < 0.5 else steps
+            down_for = rnd.randrange(1, max(2, steps // 4))
+            for k in range(steps):
+                if down_from <= k < down_from + down_for:
+                    continue
+                yield node_id, str(start + timedelta(seconds=k * interval + rnd.uniform(0, interval / 5)))
+
+    heartbeats = 0
+    batch = []
+    for row in beats():
+        batch.append(row)
+        if len(batch) >= 50000:
+            conn.executemany("INSERT INTO node_activity_logs (node_id, event_type, timestamp) "
+                             "VALUES (?, 'heartbeat', ?)", batch)
+            heartbeats += len(batch)
+            batch = []
+    conn.executemany("INSERT INTO node_activity_logs (node_id, event_type, timestamp) VALUES (?, 'heartbeat', ?)",
+                     batch)
+    heartbeats += len(batch)
+    conn.executemany("INSERT INTO jobs (user_id, node_id, command, status, created_at, updated_at) "
+                     "VALUES (1, ?, 'python train.py', ?, ?, ?)",
+                     [(node_id, rnd.choice(("completed",) * 8 + ("failed",)), str(now - timedelta(hours=1)),
+                       str(now)) for node_id in range(1, nodes + 1) for _ in range(5)])
+    conn.commit()
+    conn.close()
+    return heartbeats, now
+
+
+def stored(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT node_id, score, uptime_pct, heartbeats, gap_p50_seconds, gap_p95_seconds, "
+                        "gap_max_seconds, jobs_total, jobs_completed, completion_rate FROM node_reliability "
+                        "ORDER BY node_id").fetchall()
+    conn.close()
+    return rows
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--interval", type=float, default=30, help="seconds between heartbeats")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-rel-")
+    db_path = os.path.join(tmp, "rel.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ["RELIABILITY_REFRESH_SECONDS"] = "0"
+    datagen.create_schema(db_path)
+    t0 = time.perf_counter()
+    heartbeats, now = seed(db_path, args.nodes, args.hours, args.interval, random.Random(args.seed))
+    seed_seconds = time.perf_counter() - t0
+
+    import reliability
+    from database import SessionLocal
+    from models import NodeActivityLog
+
+    engines = [e for e in ("numpy", "python") if e != "numpy" or reliability.HAS_NUMPY]
+    results, tables = [], {}
+    for engine in engines:
+        result = reliability.refresh(full=True, engine=engine, now=now)
+        tables[engine] = stored(db_path)
+        results.append({"engine": engine, "nodes": result["nodes"], "seconds": result["seconds"],
+                        "heartbeats_per_second": round(heartbeats / result["seconds"])})
+    if len(tables) == 2 and tables["numpy"] != tables["python"]:
+        raise SystemExit("numpy and python engines stored different scores")
+
+    # the reducers alone, on heartbeats already fetched (the SQL read dominates a full refresh)
+    db = SessionLocal()
+    batch = list(range(1, min(args.nodes, reliability.RELIABILITY_BATCH_NODES) + 1))
+    since = now - timedelta(hours=reliability.RELIABILITY_WINDOW_HOURS)
+    t0 = time.perf_counter()
+    fetched = list(reliability._heartbeat_batches(db, batch, since))
+    reduce_only = {"nodes": len(batch), "heartbeats": sum(map(len, fetched)),
+                   "fetch_seconds": round(time.perf_counter() - t0, 3)}
+    for engine in engines:
+        t0 = time.perf_counter()
+        reliability.ENGINES[engine](iter(fetched), reliability._seconds(now), reliability.RELIABILITY_HEARTBEAT_TIMEOUT)
+        reduce_only[f"{engine}_seconds"] = round(time.perf_counter() - t0, 3)
+    db.close()
+
+    db = SessionLocal()
+    db.add(NodeActivityLog(node_id=1, event_type="heartbeat", timestamp=now))
+    db.commit()
+    db.close()
+    incremental = reliability.refresh(now=now)
+
+    import main
+    from fastapi.testclient import TestClient
+    client = TestClient(main.app)
+    main.marketplace_cache.clear()
+    t0 = time.perf_counter()
+    listing = client.get("/marketplace/gpu-nodes").json()
+    marketplace_ms = (time.perf_counter() - t0) * 1000
+
+    print(json.dumps({
+        "nodes": args.nodes, "heartbeats": heartbeats, "seed_seconds": round(seed_seconds, 1),
+        "window_hours": reliability.RELIABILITY_WINDOW_HOURS,
+        "full_refresh": results,
+        "speedup": round(results[1]["seconds"] / results[0]["seconds"], 1) if len(results) == 2 else None,
+        "identical_scores": len(tables) == 2,
+        "reduce_only": reduce_only,
+        "incremental_refresh": incremental,
+        "marketplace_uncached_ms": round(marketplace_ms, 1),
+        "top_score": listing[0]["reliability_score"] if listing else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
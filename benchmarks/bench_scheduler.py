@@ -0,0 +1,151 @@
+"""
+Benchmark: starting queued jobs with the fair-share scheduler (scheduler.py)
+vs re-sorting the pending jobs in SQL for every pick.
+
+One "heavy" user queues --heavy jobs on a popular node first, then --users
+other users queue --light jobs each. --picks jobs are started:
+
+  scheduler   scheduler.load() + scheduler.dispatch() (in-memory heap pick,
+              guarded UPDATE per job, one commit); the heap pick alone is
+              timed too
+  sql-resort  per pick: SELECT the pending job of the user with the lowest
+              recent usage (GROUP BY over started jobs) ORDER BY usage, id
+              LIMIT 1, then the same UPDATE
+
+Both start the same number of jobs; the heavy user's share of them is
+reported next to plain FIFO (by job id), which would give it every slot.
+The SQL baseline is timed on --baseline-picks picks and extrapolated.
+
+    python benchmarks/bench_scheduler.py --users 200 --heavy 5000 --light 10 --picks 2000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+NODE_ID = 1
+HEAVY_USER = 1
+
+
+def seed(db_path, users, heavy, light, now):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO users (id, email, username, hashed_password, wallet_balance) "
+                     "VALUES (?, ?, ?, 'x', 0)", [(u, f"u{u}@bench.local", f"u{u}") for u in range(1, users + 2)])
+    conn.execute("INSERT INTO gpu_nodes (id, location, gpu_model, gpu_count, owner_id, node_key, is_online, "
+                 "is_public) VALUES (?, 'mumbai', 'H100', 8, 1, 'nk', 1, 1)", (NODE_ID,))
+    created = str(now - timedelta(minutes=5))
+    rows = [(HEAVY_USER,)] * heavy + [(u,) for u in range(2, users + 2) for _ in range(light)]
+    conn.executemany("INSERT INTO jobs (user_id, node_id, command, status, created_at, updated_at) "
+                     f"VALUES (?, {NODE_ID}, 'python train.py', 'pending', '{created}', '{created}')", rows)
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def started_by_heavy(db_path):
+    conn = sqlite3.connect(db_path)
+    share = conn.execute("SELECT count(*), sum(user_id = ?) FROM jobs WHERE status = 'running'",
+                         (HEAVY_USER,)).fetchone()
+    conn.close()
+    return share
+
+
+def sql_resort(db_path, picks, now):
+    """The naive scheduler: re-rank all pending jobs of the node by user usage for every pick."""
+    conn = sqlite3.connect(db_path)
+    since = str(now - timedelta(hours=168))
+    t0 = time.perf_counter()
+    for _ in range(picks):
+        row = conn.execute(
+            "SELECT j.id FROM jobs j LEFT JOIN (SELECT user_id, count(*) AS used FROM jobs "
+            "WHERE start_time >= ? GROUP BY user_id) u ON u.user_id = j.user_id "
+            "WHERE j.status = 'pending' AND j.node_id = ? ORDER BY coalesce(u.used, 0), j.id LIMIT 1",
+            (since, NODE_ID)).fetchone()
+        if row is None:
+            break
+        conn.execute("UPDATE jobs SET status = 'running', start_time = ?, updated_at = ? "
+                     "WHERE id = ? AND status = 'pending'", (str(now), str(now), row[0]))
+    conn.commit()
+    seconds = time.perf_counter() - t0
+    conn.close()
+    return seconds
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="light users")
+    parser.add_argument("--heavy", type=int, default=5000, help="jobs queued first by the heavy user")
+    parser.add_argument("--light", type=int, default=10, help="jobs queued by each light user")
+    parser.add_argument("--picks", type=int, default=2000)
+    parser.add_argument("--baseline-picks", type=int, default=300, help="picks timed for sql-resort (extrapolated)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-sched-")
+    db_path = os.path.join(tmp, "sched.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    os.environ["SCHEDULER_TICK_SECONDS"] = "0"
+    datagen.create_schema(db_path)
+    now = datetime.utcnow()
+    queued = seed(db_path, args.users, args.heavy, args.light, now)
+    baseline_path = os.path.join(tmp, "baseline.db")
+    shutil.copyfile(db_path, baseline_path)
+
+    import scheduler
+    from database import SessionLocal
+
+    db = SessionLocal()
+    # the in-memory pick alone (heap + deques, no SQL), on the same queue
+    memory = scheduler.FairShareScheduler(weights={})
+    memory.load(db, now)
+    t0 = time.perf_counter()
+    for _ in range(args.picks):
+        _, user_id = memory.pop(NODE_ID)
+        memory.charge(user_id, scheduler.JOB_GPU_HOURS, now)
+    pick_only_us = (time.perf_counter() - t0) * 1e6 / args.picks
+
+    t0 = time.perf_counter()
+    scheduler.scheduler.load(db, now)
+    load_seconds = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    started = scheduler.dispatch(db, NODE_ID, args.picks, now)
+    dispatch_seconds = time.perf_counter() - t0
+    db.close()
+    total, heavy = started_by_heavy(db_path)
+    assert total == len(started) == min(args.picks, queued)
+
+    baseline_picks = min(args.baseline_picks, args.picks)
+    baseline_seconds = sql_resort(baseline_path, baseline_picks, now)
+    baseline_total, baseline_heavy = started_by_heavy(baseline_path)
+
+    per_pick_ms = dispatch_seconds * 1000 / total
+    baseline_per_pick_ms = baseline_seconds * 1000 / baseline_total
+    print(json.dumps({
+        "queued_jobs": queued, "users": args.users + 1, "picks": total,
+        "scheduler": {"load_seconds": round(load_seconds, 3), "dispatch_seconds": round(dispatch_seconds, 3),
+                      "per_pick_ms": round(per_pick_ms, 3), "in_memory_pick_us": round(pick_only_us, 1),
+                      "heavy_user_share": round(heavy / total, 3)},
+        "sql_resort": {"picks_timed": baseline_total, "seconds": round(baseline_seconds, 3),
+                       "per_pick_ms": round(baseline_per_pick_ms, 3),
+                       f"extrapolated_seconds_for_{total}": round(baseline_per_pick_ms * total / 1000, 1),
+                       "heavy_user_share": round(baseline_heavy / baseline_total, 3)},
+        "fifo_heavy_user_share": round(min(total, args.heavy) / total, 3),
+        "speedup": round(baseline_per_pick_ms / per_pick_ms, 1),
+    }, indent=2))
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,103 @@
+"""
+Benchmark: CPU time per 10k rows for the large list endpoints, ORM + response_model
+path (FAST_LIST_JSON=0) vs the column-tuple + bulk JSON path (fast_json.py).
+
+One user gets --rows jobs and wallet transactions, one job gets --rows log lines
+and --rows public nodes are listed on the marketplace. Each endpoint is called
+--repeat times per path through TestClient (full request: query, serialization,
+middleware); process CPU time is normalised to 10k rows. Both paths must return
+byte-identical JSON bodies, otherwise the run fails.
+
+    python benchmarks/bench_serialization.py --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+
+def seed(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    base = datetime(2026, 1, 1)
+    conn.execute("INSERT INTO users (id, email, username, hashed_password, wallet_balance) "
+                 "VALUES (1, 'ser@bench.local', 'ser', 'x', 1e9)")
+    conn.executemany("INSERT INTO gpu_nodes (id, location, gpu_model, gpu_count, owner_id, node_key, is_online, "
+                     "last_heartbeat, is_public) VALUES (?, 'mumbai', 'A100', 8, 1, ?, 1, ?, 1)",
+                     [(i, f"nk-{i}", str(base + timedelta(seconds=i))) for i in range(1, rows + 1)])
+    conn.executemany("INSERT INTO jobs (id, user_id, node_id, command, status, result, created_at, updated_at, "
+                     "cost_incurred, currency) VALUES (?, 1, 1, 'python train.py', 'completed', 'ok', ?, ?, 1.5, 'INR')",
+                     [(i, str(base + timedelta(seconds=i)), str(base + timedelta(seconds=i, microseconds=250)))
+                      for i in range(1, rows + 1)])
+    conn.executemany("INSERT INTO wallet_transactions (user_id, type, amount, description, timestamp) "
+                     "VALUES (1, 'debit', 12.5, 'Job submitted on node A100', ?)",
+                     [(str(base + timedelta(seconds=i)),) for i in range(rows)])
+    conn.executemany("INSERT INTO gpu_execution_logs (job_id, log_type, details, timestamp) VALUES (1, 'stdout', ?, ?)",
+                     [(f"step {i} loss=0.{i:04d} ✓", str(base + timedelta(seconds=i))) for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-ser-")
+    db_path = os.path.join(tmp, "ser.db")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_FILE", os.path.join(tmp, "bench.log"))
+    datagen.create_schema(db_path)
+    seed(db_path, args.rows)
+
+    import fast_json
+    import main
+    from auth import create_access_token
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    headers = {"Authorization": "Bearer " + create_access_token({"user_id": 1, "email": "ser@bench.local"})}
+    cases = {
+        "/marketplace/gpu-nodes": {},
+        "/user-jobs": {"headers": headers},
+        "/wallet/transactions": {"headers": headers},
+        "/gpu-exec/logs/1": {"headers": headers},
+    }
+
+    results = []
+    for url, kwargs in cases.items():
+        bodies, row = {}, {"endpoint": url, "rows": args.rows}
+        for name, enabled in (("orm", False), ("fast", True)):
+            fast_json.FAST_LIST_JSON = enabled
+            client.get(url, **kwargs)  # warm-up
+            cpu0, wall0 = time.process_time(), time.perf_counter()
+            for _ in range(args.repeat):
+                resp = client.get(url, **kwargs)
+                assert resp.status_code == 200, resp.text[:200]
+            cpu = (time.process_time() - cpu0) / args.repeat
+            wall = (time.perf_counter() - wall0) / args.repeat
+            bodies[name] = resp.content
+            row[f"{name}_cpu_ms_per_10k_rows"] = round(cpu * 1000 * 10000 / args.rows, 2)
+            row[f"{name}_wall_ms_per_request"] = round(wall * 1000, 2)
+        if json.loads(bodies["orm"]) != json.loads(bodies["fast"]):
+            raise SystemExit(f"{url}: fast path returned a different body")
+        row["identical_json"] = bodies["orm"] == bodies["fast"]
+        row["cpu_speedup"] = round(row["orm_cpu_ms_per_10k_rows"] / row["fast_cpu_ms_per_10k_rows"], 2)
+        results.append(row)
+
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
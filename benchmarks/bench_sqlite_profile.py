@@ -0,0 +1,157 @@
+"""
+Benchmark: mixed read/write load on SQLite, "basic" vs "production" profile.
+
+Each profile runs in its own subprocess (database.py picks the profile at import
+time) against a fresh SQLite file. Writer threads run heartbeat-style
+transactions (node lookup + UPDATE + NodeActivityLog INSERT + commit) and
+job inserts; reader threads run marketplace / node-status style SELECTs.
+Reports ops/sec, latency percentiles and "database is locked" errors.
+--think-ms 0 turns every thread into a busy loop (GIL-bound worst case).
+
+    python benchmarks/bench_sqlite_profile.py --writers 8 --readers 16 --seconds 10
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p / 100))] * 1000, 3)
+
+
+def child(args):
+    sys.path.insert(0, ROOT)
+    from sqlalchemy.exc import OperationalError
+    from database import Base, SessionLocal, engine, USE_SQLITE_PROFILE
+    from models import User, GPUNode, Job, NodeActivityLog
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="bench@local", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add_all([
+        GPUNode(owner_id=user.id, location="edge", gpu_model="L4", gpu_count=1, node_key=f"k{i}", is_public=True)
+        for i in range(args.nodes)
+    ])
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"write": [], "read": [], "locked_errors": 0, "other_errors": 0}
+
+    def heartbeat(session, rnd):
+        node_id = rnd.randint(1, args.nodes)
+        node = session.query(GPUNode).filter(GPUNode.id == node_id, GPUNode.node_key == f"k{node_id - 1}").first()
+        node.is_online = True
+        node.last_heartbeat = datetime.utcnow()
+        session.add(NodeActivityLog(node_id=node.id, event_type="heartbeat", message="Node heartbeat received"))
+        session.commit()
+
+    def submit(session, rnd):
+        session.add(Job(user_id=user_id, node_id=rnd.randint(1, args.nodes), command="bench", status="running"))
+        session.commit()
+
+    def marketplace(session, rnd):
+        session.query(GPUNode).filter(GPUNode.is_public == True).limit(100).all()  # noqa: E712
+
+    def node_status(session, rnd):
+        session.query(GPUNode).filter(GPUNode.id == rnd.randint(1, args.nodes)).first()
+        session.query(NodeActivityLog.id).order_by(NodeActivityLog.id.desc()).first()
+
+    def worker(kind, ops, seed):
+        rnd = random.Random(seed)
+        while not stop.is_set():
+            op = rnd.choice(ops)
+            session = SessionLocal()
+            t0 = time.perf_counter()
+            try:
+                op(session, rnd)
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    stats[kind].append(elapsed)
+            except OperationalError as e:
+                session.rollback()
+                with lock:
+                    stats["locked_errors" if "locked" in str(e) else "other_errors"] += 1
+            except Exception:
+                session.rollback()
+                with lock:
+                    stats["other_errors"] += 1
+            finally:
+                session.close()
+            if args.think_ms:
+                time.sleep(args.think_ms / 1000.0)
+
+    threads = [threading.Thread(target=worker, args=("write", [heartbeat, heartbeat, submit], i))
+               for i in range(args.writers)]
+    threads += [threading.Thread(target=worker, args=("read", [marketplace, node_status], 1000 + i))
+                for i in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    out = {"profile_active": USE_SQLITE_PROFILE, "seconds": args.seconds,
+           "locked_errors": stats["locked_errors"], "other_errors": stats["other_errors"]}
+    for kind in ("write", "read"):
+        lat = stats[kind]
+        out[kind] = {
+            "ops": len(lat),
+            "ops_per_sec": round(len(lat) / args.seconds, 1),
+            "p50_ms": percentile(lat, 50),
+            "p95_ms": percentile(lat, 95),
+            "p99_ms": percentile(lat, 99),
+            "max_ms": percentile(lat, 100),
+        }
+    print(json.dumps(out))
+
+
+def parent(args):
+    results = {}
+    for profile in ("basic", "production"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ,
+                       DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                       SQLITE_PROFILE=profile,
+                       JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "bench-secret"))
+            cmd = [sys.executable, os.path.abspath(__file__), "--child",
+                   "--writers", str(args.writers), "--readers", str(args.readers),
+                   "--seconds", str(args.seconds), "--nodes", str(args.nodes),
+                   "--think-ms", str(args.think_ms)]
+            proc = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=tmp)
+            if proc.returncode != 0:
+                results[profile] = {"error": proc.stderr[-2000:]}
+                continue
+            results[profile] = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--think-ms", type=float, default=5,
+                        help="pause between operations of one thread (request handling / network); 0 = closed loop")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    child(args) if args.child else parent(args)
@@ -0,0 +1,112 @@
+"""
+Benchmark: worker cold start (import main + app startup) and import profile.
+
+Every run is a fresh interpreter (like a new uvicorn worker). Reports the median /
+max time to import main and run the app lifespan, plus a `-X importtime` report
+of the slowest imports, grouped by top-level package and by our own modules.
+
+    python benchmarks/bench_startup.py --runs 7
+    python benchmarks/bench_startup.py --budget-ms 900   # exit 1 when the median is over budget (CI gate)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOCAL_MODULES = {
+    os.path.splitext(name)[0]
+    for name in os.listdir(ROOT)
+    if name.endswith(".py")
+} | {"routes"}
+
+# runs in the child interpreter; prints import and startup time in ms
+_CHILD = r"""
+import asyncio, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import main
+t1 = time.perf_counter()
+
+async def _startup():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+
+asyncio.run(_startup())
+t2 = time.perf_counter()
+print("STARTUP", (t1 - t0) * 1000, (t2 - t1) * 1000)
+"""
+
+
+def child_env(tmp):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+    env.setdefault("JWT_SECRET_KEY", "bench-secret")
+    return env
+
+
+def time_runs(runs, tmp):
+    code = _CHILD.format(root=ROOT)
+    imports, startups, totals = [], [], []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", code], env=child_env(tmp), cwd=tmp,
+                              capture_output=True, text=True, check=True)
+        line = [l for l in proc.stdout.splitlines() if l.startswith("STARTUP")][-1]
+        imp, start = map(float, line.split()[1:])
+        imports.append(imp)
+        startups.append(start)
+        totals.append(imp + start)
+    return {
+        "runs": runs,
+        "import_main_ms": {"median": round(statistics.median(imports), 1), "max": round(max(imports), 1)},
+        "lifespan_startup_ms": {"median": round(statistics.median(startups), 1), "max": round(max(startups), 1)},
+        "total_ms": {"median": round(statistics.median(totals), 1), "max": round(max(totals), 1)},
+    }
+
+
+def import_profile(tmp, top):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {ROOT!r}); import main"],
+                          env=child_env(tmp), cwd=tmp, capture_output=True, text=True, check=True)
+    by_package = defaultdict(int)
+    local = {}
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = [p.strip() for p in line.replace("import time:", "").split("|")]
+        self_us, cumulative_us = int(self_us), int(cumulative_us)
+        module = name.strip()
+        by_package[module.split(".")[0]] += self_us
+        if module.split(".")[0] in LOCAL_MODULES:
+            local[module] = round(cumulative_us / 1000, 2)
+        rows.append((cumulative_us, module))
+    rows.sort(reverse=True)
+    return {
+        "top_cumulative_ms": {m: round(us / 1000, 2) for us, m in rows[:top]},
+        "by_package_self_ms": {p: round(us / 1000, 2)
+                               for p, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]},
+        "local_modules_cumulative_ms": dict(sorted(local.items(), key=lambda kv: -kv[1])),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15, help="rows in the import profile report")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if median total startup exceeds this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = {"startup": time_runs(args.runs, tmp), "import_profile": import_profile(tmp, args.top)}
+    print(json.dumps(report, indent=2))
+
+    if args.budget_ms is not None and report["startup"]["total_ms"]["median"] > args.budget_ms:
+        print(f"startup regression: median {report['startup']['total_ms']['median']} ms > budget {args.budget_ms} ms",
+              file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,213 @@
+"""
+Synthetic data generator for benchmarks (SQLite only, no network).
+
+Creates the schema through database.init_db() and then bulk-loads rows with
+sqlite3.executemany, which is roughly 10x faster than going through the ORM.
+--rows is the number of jobs; every other table is derived from it:
+
+    users     rows/50 (10% are node owners)     gpu_nodes    rows/100 (90% public, 90% priced)
+    jobs      rows (1% belong to one hot user)  node_earnings  one per completed job
+    wallet_transactions  one per job + top-ups  gpu_execution_logs  rows (a hot job holds up to 50k)
+    node_activity_logs   rows (heartbeats)
+
+A manifest (<db>.json) with the counts and the ids of the hot user / node / job
+is written next to the database so benchmark scripts can target them.
+Node keys are "nk-<node id>". Same --seed -> same data.
+
+    python benchmarks/datagen.py --rows 100000 --out /tmp/bench.db
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BATCH = 20000
+JOB_STATUSES = ["completed"] * 7 + ["running", "pending", "failed"]
+GPU_MODELS = ["A100", "H100", "L4", "T4", "RTX4090", "RTX3090"]
+LOCATIONS = ["mumbai", "bengaluru", "delhi", "hyderabad", "chennai", "pune"]
+BENCH_PASSWORD = "bench"  # shared by every generated user (hashed once) so /login can be exercised too
+
+
+def sizes(rows):
+    users = max(20, rows // 50)
+    return {
+        "users": users,
+        "owners": max(2, users // 10),
+        "nodes": max(10, rows // 100),
+        "jobs": rows,
+        "exec_logs": rows,
+        "activity_logs": rows,
+        "hot_user_jobs": max(1, rows // 100),
+        "hot_job_logs": min(rows // 2, 50000),
+    }
+
+
+def _batched(rows_iter, size=BATCH):
+    batch = []
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(conn, sql, rows_iter):
+    count = 0
+    for batch in _batched(rows_iter):
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def create_schema(db_path):
+    """Create tables/indexes with the app's own metadata (sets DATABASE_URL for this process)."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, ROOT)
+    import database
+    database.init_db()
+    database.engine.dispose()
+    if database.read_engine is not database.engine:
+        database.read_engine.dispose()
+
+
+def generate(db_path, rows, seed=42):
+    """Fill an (empty, schema-created) SQLite file; returns the manifest dict."""
+    rnd = random.Random(seed)
+    n = sizes(rows)
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=90)
+    span = int((now - start).total_seconds())
+
+    def ts():
+        return str(start + timedelta(seconds=rnd.randrange(span)))
+
+    sys.path.insert(0, ROOT)
+    from auth import hash_password
+    password_hash = hash_password(BENCH_PASSWORD)
+
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA foreign_keys=OFF")
+    counts = {}
+
+    # ---------- users: ids 1..owners are node owners, the rest rent GPUs ----------
+    owners, users = n["owners"], n["users"]
+    hot_user_id = owners + 1
+    counts["users"] = _insert(conn, "INSERT INTO users (id, email, username, full_name, hashed_password, wallet_balance) "
+                                    "VALUES (?, ?, ?, ?, ?, ?)",
+                              ((i, f"user{i}@bench.local", f"user{i}", f"Bench User {i}", password_hash,
+                                1e9 if i > owners else 0.0)
+                               for i in range(1, users + 1)))
+
+    # ---------- nodes + pricing ----------
+    nodes = n["nodes"]
+    counts["gpu_nodes"] = _insert(conn, "INSERT INTO gpu_nodes (id, location, gpu_model, gpu_count, owner_id, node_key, "
+                                        "is_online, last_heartbeat, is_public, price_per_hour) "
+                                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  ((i, rnd.choice(LOCATIONS), rnd.choice(GPU_MODELS), rnd.choice((1, 2, 4, 8)),
+                                    (i - 1) % owners + 1, f"nk-{i}", rnd.random() < 0.7,
+                                    ts() if rnd.random() < 0.8 else None, rnd.random() < 0.9, None)
+                                   for i in range(1, nodes + 1)))
+    prices = {i: round(rnd.uniform(5, 80), 2) for i in range(1, nodes + 1) if rnd.random() < 0.9}
+    counts["node_pricing"] = _insert(conn, "INSERT INTO node_pricing (node_id, price_per_hour, currency, last_updated) "
+                                           "VALUES (?, ?, 'INR', ?)",
+                                     ((node_id, price, ts()) for node_id, price in prices.items()))
+
+    # ---------- jobs (+ one debit and, when completed, one earning each) ----------
+    job_rows, tx_rows, earning_rows = [], [], []
+    counts["jobs"] = counts["wallet_transactions"] = counts["node_earnings"] = 0
+
+    def flush():
+        conn.executemany("INSERT INTO jobs (id, user_id, node_id, command, status, result, created_at, updated_at, "
+                         "start_time, end_time, cost_incurred, currency) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'INR')",
+                         job_rows)
+        conn.executemany("INSERT INTO wallet_transactions (user_id, type, amount, description, timestamp) "
+                         "VALUES (?, ?, ?, ?, ?)", tx_rows)
+        conn.executemany("INSERT INTO node_earnings (node_id, job_id, amount, duration_hours, timestamp, currency) "
+                         "VALUES (?, ?, ?, ?, ?, 'INR')", earning_rows)
+        counts["jobs"] += len(job_rows)
+        counts["wallet_transactions"] += len(tx_rows)
+        counts["node_earnings"] += len(earning_rows)
+        job_rows.clear(), tx_rows.clear(), earning_rows.clear()
+
+    for job_id in range(1, rows + 1):
+        user_id = hot_user_id if job_id <= n["hot_user_jobs"] else rnd.randint(owners + 1, users)
+        node_id = rnd.randint(1, nodes)
+        status = rnd.choice(JOB_STATUSES)
+        created = ts()
+        price = prices.get(node_id, 10.0)
+        hours = round(rnd.uniform(0.1, 12), 2) if status == "completed" else 0.0
+        end = created if status in ("completed", "failed") else None
+        job_rows.append((job_id, user_id, node_id, f"python train.py --run {job_id}", status,
+                         f"Job {job_id} {status}", created, created, created, end, round(price * hours, 2)))
+        tx_rows.append((user_id, "debit", price, f"Job submitted on node {node_id}", created))
+        if status == "completed":
+            earning_rows.append((node_id, job_id, round(price * hours, 2), hours, created))
+        if len(job_rows) >= BATCH:
+            flush()
+    flush()
+    counts["wallet_transactions"] += _insert(conn, "INSERT INTO wallet_transactions (user_id, type, amount, "
+                                                   "description, timestamp) VALUES (?, 'credit', ?, ?, ?)",
+                                             ((u, 1000.0, "Wallet top-up", ts()) for u in range(owners + 1, users + 1)))
+
+    # ---------- execution logs: one hot job with a long log, the rest spread out ----------
+    hot_job_id = 1
+    hot_logs = n["hot_job_logs"]
+    counts["gpu_execution_logs"] = _insert(conn, "INSERT INTO gpu_execution_logs (job_id, log_type, details, timestamp) "
+                                                 "VALUES (?, ?, ?, ?)",
+                                           ((hot_job_id if i < hot_logs else rnd.randint(1, rows),
+                                             "stderr" if i % 20 == 0 else "stdout",
+                                             f"step {i} loss={rnd.random():.4f}", ts())
+                                            for i in range(n["exec_logs"])))
+
+    # ---------- node activity (heartbeats) ----------
+    counts["node_activity_logs"] = _insert(conn, "INSERT INTO node_activity_logs (node_id, event_type, message, timestamp) "
+                                                 "VALUES (?, 'heartbeat', 'Node heartbeat received', ?)",
+                                           ((rnd.randint(1, nodes), ts()) for _ in range(n["activity_logs"])))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    return {
+        "rows": rows,
+        "seed": seed,
+        "counts": counts,
+        "hot_user_id": hot_user_id,
+        "hot_owner_id": 1,
+        "hot_node_id": 1,
+        "hot_job_id": hot_job_id,
+        "owner_ids": [1, owners],
+        "renter_ids": [owners + 1, users],
+        "node_ids": [1, nodes],
+        "generate_seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+def build(db_path, rows, seed=42):
+    """Schema + data + manifest file; returns the manifest."""
+    if os.path.exists(db_path):
+        raise SystemExit(f"{db_path} already exists")
+    create_schema(db_path)
+    manifest = generate(db_path, rows, seed)
+    with open(db_path + ".json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="number of jobs (10^3 .. 10^6)")
+    parser.add_argument("--out", required=True, help="path of the SQLite file to create")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(build(args.out, args.rows, args.seed), indent=2))
@@ -0,0 +1,278 @@
+# blob_store.py
+# Content-addressed blob store on the local filesystem.
+#
+# Large payloads (job results, big GPUExecutionLog.details) are written here
+# instead of into hot table rows; the database keeps only the SHA-256 of the raw
+# bytes and their size:
+#   jobs.result_blob / jobs.result_size       result uploaded with PUT /job-result/{id}
+#   gpu_execution_logs.details                "blob:sha256:<hex>:<size>" reference
+#                                             (kept as-is through chunking and archiving)
+# A log line that itself starts with "blob:sha256:" is always stored as a blob, so
+# the details column only ever holds references the server wrote (readers resolve
+# it to the client's own text instead of to whatever blob the text names).
+# Anything up to BLOB_INLINE_MAX bytes stays inline, so job status / list and log
+# responses stay small whatever a job prints.
+#
+# Layout: BLOB_DIR/ab/cd/<sha256>[.zlib]. The same content is stored once (the
+# address is the hash, a second put of it is a no-op). BLOB_CODEC=zlib compresses
+# while writing, BLOB_CODEC=none stores raw bytes (served with sendfile/mmap by
+# FileResponse). Files are written to a temp name and renamed into place, so
+# readers never see a partial blob. Downloads stream in BLOB_CHUNK_BYTES pieces.
+#
+# CLI:  python blob_store.py offload-results [--batch-size N]   # move existing large results out
+#       python blob_store.py stats
+
+import hashlib
+import os
+import re
+import tempfile
+import zlib
+from typing import Iterator, Optional, Tuple
+
+BLOB_DIR = os.getenv("BLOB_DIR", "blobs")
+BLOB_CODEC = os.getenv("BLOB_CODEC", "zlib")
+BLOB_INLINE_MAX = int(os.getenv("BLOB_INLINE_MAX", 4096))  # bytes (UTF-8) kept inline in the row
+BLOB_MAX_BYTES = int(os.getenv("BLOB_MAX_BYTES", 1 << 30))  # largest accepted upload
+BLOB_CHUNK_BYTES = int(os.getenv("BLOB_CHUNK_BYTES", 1 << 16))
+BLOB_FSYNC = os.getenv("BLOB_FSYNC", "1") == "1"
+
+REF_PREFIX = "blob:sha256:"
+_REF = re.compile(r"blob:sha256:([0-9a-f]{64}):(\d+)")
+_SUFFIX = {"zlib": ".zlib", "none": ""}
+
+
+class BlobTooLarge(ValueError):
+    """Raised when a blob grows past BLOB_MAX_BYTES while being written."""
+
+
+def _path(sha: str, codec: str) -> str:
+    return os.path.join(BLOB_DIR, sha[:2], sha[2:4], sha + _SUFFIX[codec])
+
+
+def locate(sha: str) -> Optional[Tuple[str, str]]:
+    """(path, codec) of a stored blob, None if it is not in the store."""
+    for codec in _SUFFIX:
+        path = _path(sha, codec)
+        if os.path.exists(path):
+            return path, codec
+    return None
+
+
+class BlobWriter:
+    """Hash + (optionally) compress a stream into a temp file; commit() moves it to its address."""
+
+    def __init__(self, codec: str = BLOB_CODEC, max_bytes: int = BLOB_MAX_BYTES):
+        if codec not in _SUFFIX:
+            raise ValueError(f"unknown blob codec {codec!r}")
+        os.makedirs(BLOB_DIR, exist_ok=True)
+        self.codec = codec
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._zip = zlib.compressobj(6) if codec == "zlib" else None
+        fd, self._tmp = tempfile.mkstemp(dir=BLOB_DIR, prefix=".tmp-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.abort()
+            raise BlobTooLarge(f"blob larger than {self.max_bytes} bytes")
+        self._hash.update(data)
+        self._file.write(self._zip.compress(data) if self._zip else data)
+
+    def commit(self) -> Tuple[str, int]:
+        """Returns (sha256 hex, raw size). Content that is already stored is not written twice."""
+        if self._zip:
+            self._file.write(self._zip.flush())
+        if BLOB_FSYNC:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+        sha = self._hash.hexdigest()
+        if locate(sha) is not None:
+            os.unlink(self._tmp)
+        else:
+            path = _path(sha, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp, path)
+        return sha, self.size
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp):
+            os.unlink(self._tmp)
+
+
+def put_bytes(data: bytes, codec: str = BLOB_CODEC) -> Tuple[str, int]:
+    writer = BlobWriter(codec)
+    try:
+        for start in range(0, len(data), BLOB_CHUNK_BYTES):
+            writer.write(data[start:start + BLOB_CHUNK_BYTES])
+    except Exception:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+async def receive(stream, inline_max: int = BLOB_INLINE_MAX) -> Tuple[Optional[str], Optional[str], int]:
+    """
+    Read an upload (async iterator of bytes, e.g. request.stream()) into (inline text, blob sha, size).
+    Up to inline_max bytes of UTF-8 are kept in memory and returned inline; past that the
+    upload spills into a BlobWriter chunk by chunk, so the whole body is never held in memory.
+    Only the stream is read on the event loop: the file work (mkstemp, zlib, write, fsync) runs
+    in the threadpool, one hop per BLOB_CHUNK_BYTES of upload.
+    """
+    from fastapi.concurrency import run_in_threadpool
+
+    head = bytearray()
+    pending = bytearray()
+    writer: Optional[BlobWriter] = None
+    try:
+        async for data in stream:
+            if writer is None:
+                head += data
+                if len(head) <= inline_max:
+                    continue
+                writer = await run_in_threadpool(BlobWriter)
+                data, head = bytes(head), bytearray()
+            pending += data
+            if len(pending) >= BLOB_CHUNK_BYTES:
+                await run_in_threadpool(writer.write, bytes(pending))
+                pending.clear()
+        if writer is not None:
+            if pending:
+                await run_in_threadpool(writer.write, bytes(pending))
+            return (None, *await run_in_threadpool(writer.commit))
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    try:
+        return head.decode(), None, len(head)
+    except UnicodeDecodeError:
+        return (None, *await run_in_threadpool(put_bytes, bytes(head)))
+
+
+def iter_blob(sha: str) -> Iterator[bytes]:
+    """Raw content of a blob in chunks (decompressed on the fly). FileNotFoundError if missing."""
+    found = locate(sha)
+    if found is None:
+        raise FileNotFoundError(sha)
+    path, codec = found
+    unzip = zlib.decompressobj() if codec == "zlib" else None
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(BLOB_CHUNK_BYTES)
+            if not data:
+                break
+            if unzip:
+                data = unzip.decompress(data)
+            if data:
+                yield data
+    if unzip:
+        tail = unzip.flush()
+        if tail:
+            yield tail
+
+
+def read_blob(sha: str) -> bytes:
+    return b"".join(iter_blob(sha))
+
+
+# ---------- inline text or reference ----------
+def make_ref(sha: str, size: int) -> str:
+    return f"{REF_PREFIX}{sha}:{size}"
+
+
+def parse_ref(text: Optional[str]) -> Optional[Tuple[str, int]]:
+    """(sha, size) if `text` is a blob reference, else None."""
+    if not text or not text.startswith(REF_PREFIX):
+        return None
+    m = _REF.fullmatch(text)
+    return (m.group(1), int(m.group(2))) if m else None
+
+
+def offload_text(text: Optional[str], inline_max: int = BLOB_INLINE_MAX) -> Optional[str]:
+    """
+    Text up to inline_max UTF-8 bytes is returned unchanged, longer text is stored and replaced by its ref.
+    Text that looks like a reference is stored too (it would otherwise be read back as one).
+    """
+    if text is None:
+        return text
+    looks_like_ref = text.startswith(REF_PREFIX)
+    if len(text) * 4 <= inline_max and not looks_like_ref:  # fast path: can not exceed the limit as 4-byte UTF-8
+        return text
+    raw = text.encode()
+    if len(raw) <= inline_max and not looks_like_ref:
+        return text
+    return make_ref(*put_bytes(raw))
+
+
+def store_text(text: Optional[str], inline_max: int = BLOB_INLINE_MAX) -> Tuple[Optional[str], Optional[str], int]:
+    """(inline text, blob sha, size) for a job result: one of the first two is None."""
+    if text is None:
+        return None, None, 0
+    raw = text.encode()
+    if len(raw) <= inline_max:
+        return text, None, len(raw)
+    sha, size = put_bytes(raw)
+    return None, sha, size
+
+
+def stats() -> dict:
+    blobs = stored = 0
+    for root, _, files in os.walk(BLOB_DIR):
+        for name in files:
+            if not name.startswith(".tmp-"):
+                blobs += 1
+                stored += os.path.getsize(os.path.join(root, name))
+    return {"dir": BLOB_DIR, "codec": BLOB_CODEC, "blobs": blobs, "stored_bytes": stored}
+
+
+def offload_results(db, batch_size: int = 500) -> int:
+    """Move inline Job.result values longer than BLOB_INLINE_MAX into the store (one commit per batch)."""
+    from sqlalchemy import func
+
+    from models import Job
+
+    moved, last_id = 0, 0
+    while True:
+        rows = (
+            db.query(Job.id, Job.result)
+            .filter(Job.id > last_id, Job.result_blob.is_(None), func.length(Job.result) > BLOB_INLINE_MAX)
+            .order_by(Job.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return moved
+        for job_id, result in rows:
+            inline, sha, size = store_text(result)
+            if sha is not None:
+                db.query(Job).filter(Job.id == job_id).update(
+                    {Job.result: inline, Job.result_blob: sha, Job.result_size: size}, synchronize_session=False)
+                moved += 1
+        db.commit()
+        last_id = rows[-1][0]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Content-addressed blob store for job results and large logs")
+    parser.add_argument("command", choices=["offload-results", "stats"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(stats())
+    else:
+        from database import SessionLocal
+
+        session = SessionLocal()
+        try:
+            print(f"moved {offload_results(session, args.batch_size)} job result(s) into {BLOB_DIR}")
+        finally:
+            session.close()
@@ -0,0 +1,334 @@
+# cache_bus.py
+# Cross-worker invalidation for the in-process caches (KeyedCache).
+#
+# Every uvicorn worker keeps its own caches. A write publishes keyed
+# invalidations (namespace, key) on the bus: they are applied to the local caches
+# right away and sent through a transport to every other worker / host, which
+# drops the same keys. Only the touched keys go, so hit rates stay high; the
+# cache TTL only bounds staleness if a message is ever lost.
+#
+# CACHE_BUS=auto      -> "postgres" on PostgreSQL, "table" otherwise (default)
+# CACHE_BUS=postgres  -> LISTEN/NOTIFY on CACHE_BUS_CHANNEL (one listener connection per worker)
+# CACHE_BUS=table     -> cache_invalidations table polled every CACHE_BUS_POLL_MS (SQLite, several workers)
+# CACHE_BUS=local     -> this process only (single worker, tests)
+# CACHE_BUS=off       -> caches disabled (nothing is cached)
+#
+# Race guard: read `cache.generation` before loading from the DB and pass it to
+# set(); the value is not stored if an invalidation arrived in between.
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select as sa_select, text
+
+from database import engine, read_engine
+
+logger = logging.getLogger("indicompute.cache")
+
+CACHE_BUS = os.getenv("CACHE_BUS", "auto")
+CACHE_BUS_CHANNEL = os.getenv("CACHE_BUS_CHANNEL", "indicompute_cache")
+CACHE_BUS_POLL_MS = int(os.getenv("CACHE_BUS_POLL_MS", 200))
+CACHE_BUS_RETENTION_SECONDS = int(os.getenv("CACHE_BUS_RETENTION_SECONDS", 300))
+
+ALL = "*"  # key that clears the whole namespace
+_NOTIFY_MAX_PAYLOAD = 7000  # PostgreSQL limit is 8000 bytes
+
+
+class KeyedCache:
+    """Small in-process TTL + LRU cache for one namespace, kept coherent by the bus."""
+
+    def __init__(self, bus: "InvalidationBus", namespace: str, ttl: float, maxsize: int = 10000):
+        self.bus = bus
+        self.namespace = namespace
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        self._data: "OrderedDict" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        if not self.bus.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation: Optional[int] = None):
+        if not self.bus.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return  # invalidated while the value was being loaded
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop one key in this process only (use bus.publish to reach other workers)."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            if key == ALL:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def clear(self):
+        self.invalidate(ALL)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+                "invalidations": self.invalidations, "ttl_seconds": self.ttl}
+
+
+# ---------- transports ----------
+class LocalTransport:
+    """Single process: local invalidation already happened in publish()."""
+    name = "local"
+
+    def send(self, origin: str, items: List[Tuple[str, str]]):
+        pass
+
+    def start(self, receive: Callable, reset: Callable):
+        pass
+
+    def stop(self):
+        pass
+
+
+class TableTransport:
+    """Polling table: rows appended to cache_invalidations, every worker reads rows newer than its cursor."""
+    name = "table"
+
+    def __init__(self, poll_ms: int = CACHE_BUS_POLL_MS, retention_seconds: int = CACHE_BUS_RETENTION_SECONDS):
+        from models import CacheInvalidation
+        self.model = CacheInvalidation
+        self.poll_interval = poll_ms / 1000.0
+        self.retention = timedelta(seconds=retention_seconds)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sent = 0
+
+    def send(self, origin, items):
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            conn.execute(insert(self.model), [
+                {"origin": origin, "namespace": namespace, "key": key, "created_at": now} for namespace, key in items
+            ])
+            self._sent += 1
+            if self._sent % 256 == 0:
+                conn.execute(delete(self.model).where(self.model.created_at < now - self.retention))
+
+    def start(self, receive, reset):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(receive, reset), name="cache-bus-poll", daemon=True)
+        self._thread.start()
+
+    def _run(self, receive, reset):
+        m = self.model
+        last_id = None
+        failing = False
+        while not self._stop.is_set():
+            try:
+                with read_engine.connect() as conn:
+                    if last_id is None:
+                        last_id = conn.execute(sa_select(func.coalesce(func.max(m.id), 0))).scalar()
+                    rows = conn.execute(
+                        sa_select(m.id, m.origin, m.namespace, m.key).where(m.id > last_id).order_by(m.id).limit(1000)
+                    ).all()
+                for row_id, origin, namespace, key in rows:
+                    receive(origin, namespace, key)
+                    last_id = row_id
+                failing = False
+            except Exception:
+                if not failing:
+                    logger.exception("cache bus poll failed, clearing caches until it recovers")
+                failing = True
+                last_id = None  # resume from the current end: anything in between is covered by reset()
+                reset()
+            self._stop.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class PostgresNotifyTransport:
+    """LISTEN/NOTIFY: one autocommit listener connection per worker, NOTIFY from the publishing request."""
+    name = "postgres"
+
+    def __init__(self, channel: str = CACHE_BUS_CHANNEL):
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def send(self, origin, items):
+        payloads, batch = [], []
+        for item in items:
+            batch.append(list(item))
+            if len(json.dumps(batch)) > _NOTIFY_MAX_PAYLOAD:
+                payloads.append(batch[:-1])
+                batch = batch[-1:]
+        payloads.append(batch)
+        with engine.begin() as conn:
+            for chunk in payloads:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {"channel": self.channel, "payload": json.dumps({"o": origin, "i": chunk})})
+
+    def start(self, receive, reset):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(receive, reset), name="cache-bus-listen", daemon=True)
+        self._thread.start()
+
+    def _run(self, receive, reset):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                pooled = engine.raw_connection()
+                pooled.detach()  # long-lived, not part of the request pool
+                conn = pooled.dbapi_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                reset()  # anything published while we were not listening
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        msg = json.loads(conn.notifies.pop(0).payload)
+                        for namespace, key in msg["i"]:
+                            receive(msg["o"], namespace, key)
+            except Exception:
+                logger.exception("cache bus listener lost its connection, clearing caches and reconnecting")
+                reset()
+                self._stop.wait(1.0)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+# ---------- bus ----------
+class InvalidationBus:
+    def __init__(self, transport=None, enabled: bool = True):
+        self.transport = transport or LocalTransport()
+        self.enabled = enabled
+        self.origin = uuid.uuid4().hex[:12]
+        self._caches: Dict[str, List[KeyedCache]] = {}
+        self.published = 0
+        self.received = 0
+        self.send_errors = 0
+
+    def cache(self, namespace: str, ttl: float, maxsize: int = 10000) -> KeyedCache:
+        """New KeyedCache that drops keys published under `namespace`."""
+        cache = KeyedCache(self, namespace, ttl, maxsize)
+        self._caches.setdefault(namespace, []).append(cache)
+        return cache
+
+    def publish(self, namespace: str, *keys):
+        """Call after the write is committed: drops the keys here and in every other worker."""
+        self.publish_many({namespace: keys})
+
+    def publish_many(self, keys_by_namespace: Dict[str, Iterable]):
+        """Several namespaces in one transport message (one INSERT / NOTIFY per write)."""
+        if not self.enabled:
+            return
+        items = []
+        for namespace, keys in keys_by_namespace.items():
+            keys = list(keys)
+            self._apply(namespace, keys)
+            items.extend((namespace, str(k)) for k in keys)
+        if not items:
+            return
+        self.published += len(items)
+        try:
+            self.transport.send(self.origin, items)
+        except Exception:
+            # the write itself is committed; other workers catch up within the cache TTL
+            self.send_errors += 1
+            logger.exception("cache bus publish failed")
+
+    def _receive(self, origin, namespace, key):
+        if origin == self.origin:
+            return
+        self.received += 1
+        self._apply(namespace, [key])
+
+    def _apply(self, namespace, keys):
+        for cache in self._caches.get(namespace, ()):
+            for key in keys:
+                # keys travel as strings; caches keyed by ints still match
+                cache.invalidate(int(key) if isinstance(key, str) and key.isdigit() else key)
+
+    def reset(self):
+        for caches in self._caches.values():
+            for cache in caches:
+                cache.clear()
+
+    def start(self):
+        if self.enabled:
+            self.transport.start(self._receive, self.reset)
+
+    def stop(self):
+        self.transport.stop()
+
+    def stats(self) -> Dict:
+        return {
+            "transport": self.transport.name if self.enabled else "off",
+            "origin": self.origin,
+            "published": self.published,
+            "received": self.received,
+            "send_errors": self.send_errors,
+            "caches": {c.namespace: c.stats() for caches in self._caches.values() for c in caches},
+        }
+
+
+def make_transport(kind: str = CACHE_BUS):
+    if kind == "auto":
+        kind = "postgres" if engine.dialect.name == "postgresql" else "table"
+    if kind == "postgres":
+        return PostgresNotifyTransport()
+    if kind == "table":
+        return TableTransport()
+    if kind in ("local", "off"):
+        return LocalTransport()
+    raise ValueError(f"unknown CACHE_BUS={kind!r} (auto, postgres, table, local, off)")
+
+
+bus = InvalidationBus(make_transport(CACHE_BUS), enabled=CACHE_BUS != "off")
@@ -1,39 +1,183 @@
 # database.py
 
+import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.sql.dml import UpdateBase
 from dotenv import load_dotenv
 
 # 1) ENV load
 load_dotenv()
 
+logger = logging.getLogger("indicompute.db")
+
 # 2) ENV se URL read karo
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 # 3) Agar DATABASE_URL nahi hai → Local SQLite fallback
 if not DATABASE_URL:
-    print("⚠ WARNING: DATABASE_URL not set → using local SQLite (local.db)")
+    logger.warning("DATABASE_URL not set → using local SQLite (local.db)")
     DATABASE_URL = "sqlite:///./local.db"
 
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# SQLite profile: "production" (WAL + pragmas + single writer lane) ya "basic" (purana behaviour)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", 8))
+
+USE_SQLITE_PROFILE = (
+    IS_SQLITE
+    and SQLITE_PROFILE == "production"
+    and ":memory:" not in DATABASE_URL
+    and DATABASE_URL not in ("sqlite://", "sqlite:///")
+)
+
 # 4) SQLite ke liye special arg; PostgreSQL ke liye nahi
 connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
+if IS_SQLITE:
     connect_args = {"check_same_thread": False}
 
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 # 5) Engine create → PostgreSQL / SQLite automatic
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True
-)
+if USE_SQLITE_PROFILE:
+    # Writer lane: ek hi connection, har write transaction BEGIN IMMEDIATE se start.
+    # Threads pool par line lagate hain instead of "database is locked" retries.
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=30,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _writer_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, connection_record)
+        # transaction control SQLAlchemy ke haath me (pysqlite ka implicit BEGIN off)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _writer_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    # Reads: WAL snapshot readers, writer ko block nahi karte
+    read_engine = create_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=SQLITE_READ_POOL_SIZE,
+    )
+    event.listen(read_engine, "connect", _apply_sqlite_pragmas)
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        pool_pre_ping=True
+    )
+    read_engine = engine
+
+
+class RoutingSession(Session):
+    """
+    SQLite production profile: SELECTs go to the read pool until the transaction
+    writes (flush, INSERT/UPDATE/DELETE, SELECT .. FOR UPDATE); from then on the
+    session sticks to the writer lane until commit/rollback.
+    """
+
+    _use_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self._use_writer
+            or self._flushing
+            or isinstance(clause, UpdateBase)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self._use_writer = True
+            return engine
+        return read_engine
+
+
+if USE_SQLITE_PROFILE:
+    @event.listens_for(RoutingSession, "after_transaction_end")
+    def _release_writer(session, transaction):
+        if transaction.parent is None:
+            session._use_writer = False
+
 
 # 6) Session Factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession if USE_SQLITE_PROFILE else Session,
+)
+
+# 6b) Read replica (optional) → public/read-only endpoints ke liye
+# DATABASE_REPLICA_URL set nahi hai → reads bhi primary par (SessionLocal)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", 30))
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", 5))
+
+replica_engine = None
+ReplicaSessionLocal = None
+_replica_down_until = 0.0
+
+if DATABASE_REPLICA_URL:
+    _replica_args = {"check_same_thread": False} if DATABASE_REPLICA_URL.startswith("sqlite") else {}
+    replica_engine = create_engine(DATABASE_REPLICA_URL, connect_args=_replica_args, pool_pre_ping=True)
+    if DATABASE_REPLICA_URL.startswith("sqlite") and SQLITE_PROFILE == "production":
+        event.listen(replica_engine, "connect", _apply_sqlite_pragmas)
+
+    @event.listens_for(replica_engine, "handle_error")
+    def _replica_error(context):
+        # connection-level failure → replica ko kuch der ke liye skip karo, primary par fallback
+        if context.is_disconnect or context.connection is None:
+            mark_replica_down()
+
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+
+def mark_replica_down(seconds: float = REPLICA_RETRY_SECONDS):
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + seconds
+    logger.warning("read replica unavailable → reads on primary for %.0fs", seconds)
+
+
+def replica_available() -> bool:
+    return ReplicaSessionLocal is not None and time.monotonic() >= _replica_down_until
 
 # 7) Base Model
 Base = declarative_base()
 
+# 7b) Schema create → explicit step (init_db.py / AUTO_CREATE_TABLES), import par nahi
+def init_db():
+    import models  # noqa: F401  (tables Base.metadata par register hote hain)
+
+    Base.metadata.create_all(bind=engine)
+    if replica_engine is not None and replica_engine.url.get_backend_name() == "sqlite":
+        # local testing with two SQLite files (a real replica gets its schema from the primary)
+        Base.metadata.create_all(bind=replica_engine)
+
+
 # 8) Dependency (FastAPI routes ke liye)
 def get_db():
     db = SessionLocal()
@@ -41,3 +185,40 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def wants_primary(request: Request) -> bool:
+    """Read-after-write: client wrote recently (cookie) or explicitly asks for primary (header)."""
+    if request.headers.get("x-read-primary") == "1":
+        return True
+    until = request.cookies.get("read_primary_until")
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+
+def new_read_session():
+    """Session for read-only work outside a request (replica if healthy, else primary)."""
+    return ReplicaSessionLocal() if replica_available() else SessionLocal()
+
+
+# 9) Read-only dependency → replica (agar configured + healthy), warna primary
+def get_read_db(request: Request):
+    db = None
+    if replica_available() and not wants_primary(request):
+        db = ReplicaSessionLocal()
+        try:
+            # connection pehle hi checkout (pre_ping) → replica down ho to isi request me primary
+            db.connection()
+        except DBAPIError:
+            db.close()
+            if replica_available():  # handle_error hook ne abhi tak mark nahi kiya
+                mark_replica_down()
+            db = None
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,88 @@
+# etags.py
+# Conditional GET for the per-user collections the frontend polls every few seconds:
+#   GET /user-jobs            jobs of the caller        count, max(id), max(updated_at)
+#   GET /wallet/transactions  transactions of the caller count, max(id)          (append only)
+#   GET /gpu-nodes            nodes of the caller        count, max(id), max(updated_at)
+#   GET /earnings/{node_id}   earnings of one node       count, max(id)          (append only)
+#
+# The version stamp is one aggregate over an index of the collection (jobs and
+# gpu_nodes bump updated_at on every UPDATE, heartbeats included), computed
+# before the data query: a write landing in between gives newer data under the
+# older tag, which only costs one extra full response on the next poll, never a
+# stale 304. The ETag is weak (the body may be gzipped on the way out) and also
+# covers the path, query string and caller, so each variant has its own tag.
+#
+# If-None-Match with the current tag -> 304 with no body, before the collection
+# query and serialization run.
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import GPUNode, Job, JobArchive, NodeEarning, WalletTransaction
+
+CACHE_CONTROL = "private, no-cache"  # browsers may keep the body but must revalidate every time
+
+
+def make_etag(request: Request, user_id: int, version: tuple) -> str:
+    key = f"{request.url.path}?{request.url.query}|{user_id}|{version}"
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response when If-None-Match carries the current tag (or *), else None."""
+    sent = request.headers.get("if-none-match")
+    if not sent:
+        return None
+    tags = {t.strip() for t in sent.split(",")}
+    # weak comparison: W/"x" and "x" name the same version
+    if "*" in tags or etag in tags or etag[2:] in tags:
+        return Response(status_code=304, headers=headers(etag))
+    return None
+
+
+# ---------- version stamps ----------
+def jobs_version(db: Session, user_id: int, include_archived: bool = False) -> tuple:
+    version = tuple(
+        db.query(func.count(Job.id), func.max(Job.id), func.max(Job.updated_at))
+        .filter(Job.user_id == user_id)
+        .one()
+    )
+    if include_archived:
+        version += tuple(
+            db.query(func.count(JobArchive.id), func.max(JobArchive.id))
+            .filter(JobArchive.user_id == user_id)
+            .one()
+        )
+    return version
+
+
+def wallet_version(db: Session, user_id: int) -> tuple:
+    return tuple(
+        db.query(func.count(WalletTransaction.id), func.max(WalletTransaction.id))
+        .filter(WalletTransaction.user_id == user_id)
+        .one()
+    )
+
+
+def nodes_version(db: Session, owner_id: int) -> tuple:
+    return tuple(
+        db.query(func.count(GPUNode.id), func.max(GPUNode.id), func.max(GPUNode.updated_at))
+        .filter(GPUNode.owner_id == owner_id)
+        .one()
+    )
+
+
+def earnings_version(db: Session, node_id: int) -> tuple:
+    return tuple(
+        db.query(func.count(NodeEarning.id), func.max(NodeEarning.id))
+        .filter(NodeEarning.node_id == node_id)
+        .one()
+    )
@@ -0,0 +1,188 @@
+"""
+EXPLAIN gate: replays the hot endpoints of main.py on a large seeded database,
+captures every SQL statement they run and EXPLAINs each one. Exits 1 when a
+plan contains a full table scan (SQLite "SCAN <table>", PostgreSQL "Seq Scan")
+on a table that is not explicitly allowed.
+
+    python explain_hot_queries.py                     # seed 100k jobs (benchmarks/datagen.py) and check
+    python explain_hot_queries.py --rows 1000000 -v   # bigger data set, print every plan
+    python explain_hot_queries.py --db /tmp/bench.db  # reuse a datagen database (a copy is used)
+
+PostgreSQL: set DATABASE_URL to an already seeded database and pass --manifest
+with the ids to target (same format as the datagen manifest).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+
+# full scans that are expected: (endpoint, table) -> reason
+ALLOWED_SCANS = {
+    ("gpu-nodes-details", "gpu_nodes"): "lists every node (public and private) by design",
+}
+
+
+
+def sqlite_scanned_table(line):
+    """'SCAN jobs' / 'SCAN TABLE jobs' (older SQLite) -> 'jobs'; index scans and searches -> None"""
+    words = line.split()
+    if not words or words[0] != "SCAN" or "USING" in words:
+        return None
+    return words[2] if len(words) > 2 and words[1] == "TABLE" else words[1]
+
+
+def extra_endpoints(m, tokens):
+    """Hot paths not in the load-test mix (bench_endpoints.endpoints)."""
+    renter, owner = tokens["renter"], tokens["owner"]
+    return {
+        "job-status": ("read", lambda rnd: ("GET", f"/job-status/{m['hot_job_id']}", {"headers": renter})),
+        "job-status-batch": ("read", lambda rnd: ("GET", "/job-status", {
+            "headers": renter, "params": {"ids": list(range(m["hot_job_id"], m["hot_job_id"] + 50))}})),
+        "job-status-delta": ("read", lambda rnd: ("GET", "/job-status", {
+            "headers": renter, "params": {"changed_since": "2026-01-01T00:00:00"}})),
+        "user-jobs-archived": ("read", lambda rnd: ("GET", "/user-jobs", {"headers": renter,
+                                                                     "params": {"include_archived": True}})),
+        "pricing": ("read", lambda rnd: ("GET", f"/pricing/{m['hot_node_id']}", {})),
+        "node-earnings": ("read", lambda rnd: ("GET", f"/earnings/{m['hot_node_id']}", {"headers": owner})),
+        "logs-since": ("read", lambda rnd: ("GET", f"/gpu-exec/logs/{m['hot_job_id']}",
+                                            {"headers": renter, "params": {"since_id": 1000, "limit": 100}})),
+        "logs-follow": ("read", lambda rnd: ("GET", f"/gpu-exec/logs/{m['hot_job_id']}/follow",
+                                             {"headers": renter, "params": {"since_id": 1000, "timeout": 0}})),
+        "my-nodes": ("read", lambda rnd: ("GET", "/gpu-nodes", {"headers": owner})),
+        "balance": ("read", lambda rnd: ("GET", "/wallet/balance", {"headers": renter})),
+    }
+
+
+def plan_scans(conn, dialect, statement, parameters):
+    """-> (plan lines, [scanned tables])"""
+    cursor = conn.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            lines = [row[3] for row in cursor.fetchall()]
+            scans = [t for t in map(sqlite_scanned_table, lines) if t]
+            return lines, scans
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        lines, scans = [], []
+
+        def walk(node, depth=0):
+            lines.append("  " * depth + node["Node Type"] + (f" on {node['Relation Name']}"
+                                                             if "Relation Name" in node else ""))
+            if node["Node Type"] == "Seq Scan":
+                scans.append(node["Relation Name"])
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"])
+        return lines, scans
+    finally:
+        cursor.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="jobs to generate (SQLite only)")
+    parser.add_argument("--db", help="existing datagen SQLite file (a copy is used)")
+    parser.add_argument("--manifest", help="manifest json (default: <db>.json)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="indicompute-explain-")
+    os.environ.setdefault("JWT_SECRET_KEY", "explain")
+    os.environ["LOG_FILE"] = os.path.join(tmp, "explain.log")
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+
+    import datagen
+    if os.getenv("DATABASE_URL", "").startswith("postgresql"):
+        if not args.manifest:
+            raise SystemExit("--manifest is required with a PostgreSQL DATABASE_URL")
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+    elif args.db:
+        db_path = os.path.join(tmp, "explain.db")
+        shutil.copyfile(args.db, db_path)
+        with open(args.manifest or args.db + ".json") as f:
+            manifest = json.load(f)
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    else:
+        manifest = datagen.build(os.path.join(tmp, "explain.db"), args.rows)
+
+    import bench_endpoints
+    import main
+    import migrate
+    from database import init_db
+    init_db()  # tables added since the datagen file was built (create_all skips existing ones)
+    migrate.apply()  # ... and columns / indexes added to existing tables
+    from auth import create_access_token
+    from database import engine, read_engine
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    captured = []  # (endpoint, statement, parameters)
+    current = {"endpoint": None}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["endpoint"] and not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE",
+                                                                                              "DELETE", "WITH")):
+            captured.append((current["endpoint"], statement, parameters))
+
+    for e in {engine, read_engine}:
+        event.listen(e, "before_cursor_execute", on_execute)
+
+    def bearer(user_id):
+        return {"Authorization": "Bearer " + create_access_token({"user_id": user_id,
+                                                                  "email": f"user{user_id}@bench.local"})}
+
+    tokens = {"renter": bearer(manifest["hot_user_id"]), "owner": bearer(manifest["hot_owner_id"])}
+    table = bench_endpoints.endpoints(manifest, tokens)
+    table.update(extra_endpoints(manifest, tokens))
+
+    client = TestClient(main.app)
+    for name, (_, build) in table.items():
+        method, url, kwargs = build(random.Random(0))
+        current["endpoint"] = name
+        resp = client.request(method, url, **kwargs)
+        current["endpoint"] = None
+        if resp.status_code >= 400:
+            print(f"warning: {name} -> HTTP {resp.status_code}", file=sys.stderr)
+
+    dialect = engine.dialect.name
+    failures, seen = [], set()
+    raw = engine.raw_connection()
+    try:
+        for endpoint, statement, parameters in captured:
+            key = (endpoint, statement)
+            if key in seen:
+                continue
+            seen.add(key)
+            lines, scans = plan_scans(raw, dialect, statement, parameters)
+            bad = [t for t in scans if (endpoint, t) not in ALLOWED_SCANS]
+            if args.verbose or bad:
+                print(f"\n[{endpoint}] {' '.join(statement.split())[:200]}")
+                for line in lines:
+                    print("    " + line)
+            for t in bad:
+                failures.append(f"{endpoint}: full scan on {t}")
+    finally:
+        raw.close()
+
+    print(f"\nchecked {len(seen)} statements from {len(table)} endpoints on {dialect} "
+          f"({manifest['counts']['jobs']} jobs)")
+    shutil.rmtree(tmp, ignore_errors=True)
+    if failures:
+        print("\n".join(["sequential scans found:"] + [" - " + f for f in failures]), file=sys.stderr)
+        sys.exit(1)
+    print("no sequential scans")
+
+
+if __name__ == "__main__":
+    main_cli()
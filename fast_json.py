@@ -0,0 +1,45 @@
+# fast_json.py
+# Fast path for large list responses.
+#
+# The default FastAPI path loads full ORM objects, validates every one through a
+# from_attributes Pydantic model (response_model) and then encodes the result.
+# For list endpoints that is most of the CPU time per row. RowSerializer instead:
+#  * selects only the columns the response schema exposes (plain Row tuples, no
+#    identity map / ORM instance state),
+#  * zips them with the precomputed field names and encodes the whole list in
+#    one pydantic_core.to_json call (Rust; same JSON as the response_model path).
+#
+# The endpoint keeps its response_model (OpenAPI docs stay the same) and returns
+# serializer.response(rows), which FastAPI passes through untouched.
+#
+# FAST_LIST_JSON=0 switches the endpoints back to the ORM + response_model path
+# (for A/B runs, see benchmarks/bench_serialization.py).
+
+import os
+from typing import Iterable, Optional
+
+from fastapi import Response
+from pydantic_core import to_json
+
+FAST_LIST_JSON = os.getenv("FAST_LIST_JSON", "1") == "1"
+
+
+class RowSerializer:
+    """(ORM model, response schema) pair compiled once: column list + bulk JSON encoder."""
+
+    def __init__(self, model, schema, columns: Optional[dict] = None):
+        # columns: field name -> column of another (joined) model, for fields `model` does not have
+        columns = columns or {}
+        self.fields = tuple(schema.model_fields)
+        self.columns = tuple(columns[name] if name in columns else getattr(model, name) for name in self.fields)
+
+    def dicts(self, rows: Iterable) -> list:
+        """Row tuples -> dicts in schema field order; dicts (e.g. decoded log chunks) pass through."""
+        keys = self.fields
+        return [row if isinstance(row, dict) else dict(zip(keys, row)) for row in rows]
+
+    def dumps(self, rows: Iterable) -> bytes:
+        return to_json(self.dicts(rows))
+
+    def response(self, rows: Iterable, headers: Optional[dict] = None) -> Response:
+        return Response(content=self.dumps(rows), media_type="application/json", headers=headers)
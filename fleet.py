@@ -0,0 +1,162 @@
+# fleet.py
+# Bulk fleet registration (used by POST /gpu-nodes/bulk)
+#
+# An owner onboarding a data center uploads every node at once, as CSV
+#   location,gpu_model,gpu_count,price_per_hour,currency   (price columns optional)
+# or as a JSON array of BulkNodeSpec objects. The whole upload is validated first
+# (one bad line rejects the upload), then all GPUNode rows and the NodePricing
+# rows of nodes that carry a price go in with two bulk inserts and one commit.
+# The generated node keys are streamed back as NDJSON or CSV.
+# The body is read whole, so it is capped at FLEET_MAX_BYTES (413) before parsing.
+
+import csv
+import io
+import json
+import os
+import secrets
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import GPUNode, NodePricing
+from schemas import BulkNodeSpec
+
+FLEET_MAX_NODES = int(os.getenv("FLEET_MAX_NODES", 50000))
+FLEET_MAX_BYTES = int(os.getenv("FLEET_MAX_BYTES", 16 * 1024 * 1024))
+FLEET_INSERT_BATCH = int(os.getenv("FLEET_INSERT_BATCH", 1000))  # rows per executemany round trip
+
+CSV_COLUMNS = ("location", "gpu_model", "gpu_count", "price_per_hour", "currency")
+_STREAM_LINES = 1000  # output lines per streamed chunk
+
+_NODES = GPUNode.__table__
+_PRICES = NodePricing.__table__
+
+
+class FleetImportError(ValueError):
+    """Raised when a line of the uploaded fleet can not be parsed."""
+
+    def __init__(self, line_no: int, reason: str):
+        super().__init__(f"line {line_no}: {reason}")
+        self.line_no = line_no
+        self.reason = reason
+
+
+class FleetTooLarge(ValueError):
+    """Raised when the upload is over FLEET_MAX_BYTES."""
+
+
+async def read_body(chunks: AsyncIterator[bytes], max_bytes: int = FLEET_MAX_BYTES) -> bytes:
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise FleetTooLarge(f"upload larger than {max_bytes} bytes")
+    return bytes(body)
+
+
+def parse_node(item, line_no: int) -> BulkNodeSpec:
+    try:
+        return BulkNodeSpec.model_validate(item)
+    except ValidationError as e:
+        err = e.errors()[0]
+        field = ".".join(str(p) for p in err.get("loc", ()))
+        raise FleetImportError(line_no, f"{field}: {err.get('msg', 'invalid node')}" if field else err.get("msg"))
+
+
+def _check_size(count: int):
+    if count > FLEET_MAX_NODES:
+        raise FleetImportError(FLEET_MAX_NODES + 1, f"at most {FLEET_MAX_NODES} nodes per upload")
+
+
+def parse_json_array(body: bytes) -> List[BulkNodeSpec]:
+    try:
+        data = json.loads(body or b"[]")
+    except ValueError:
+        raise FleetImportError(1, "body is not valid JSON")
+    if not isinstance(data, list):
+        raise FleetImportError(1, "expected a JSON array of nodes")
+    _check_size(len(data))
+    return [parse_node(item, i + 1) for i, item in enumerate(data)]
+
+
+def parse_csv(body: bytes) -> List[BulkNodeSpec]:
+    """CSV with a header line; line numbers in errors count the header as line 1."""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise FleetImportError(1, "CSV must be UTF-8")
+    reader = csv.DictReader(io.StringIO(text))
+    header = [h.strip() for h in (reader.fieldnames or [])]
+    missing = [c for c in CSV_COLUMNS[:3] if c not in header]
+    if missing:
+        raise FleetImportError(1, f"CSV header is missing {', '.join(missing)}")
+    unknown = [h for h in header if h not in CSV_COLUMNS]
+    if unknown:
+        raise FleetImportError(1, f"unknown CSV column(s) {', '.join(unknown)}")
+    reader.fieldnames = header
+
+    nodes = []
+    for row in reader:
+        line_no = reader.line_num
+        # empty cells (no price, default currency) are left to the schema defaults
+        item = {k: v.strip() for k, v in row.items() if k is not None and v is not None and v.strip() != ""}
+        if not item:
+            continue
+        nodes.append(parse_node(item, line_no))
+        _check_size(len(nodes))
+    return nodes
+
+
+def register_nodes(db: Session, owner_id: int, nodes: List[BulkNodeSpec]) -> List[Tuple[int, str]]:
+    """Insert all nodes (+ prices) in one transaction. Returns [(node id, node key)] in upload order."""
+    keys = [secrets.token_hex(16) for _ in nodes]
+    id_by_key = {}
+    for start in range(0, len(nodes), FLEET_INSERT_BATCH):
+        batch = zip(nodes[start:start + FLEET_INSERT_BATCH], keys[start:start + FLEET_INSERT_BATCH])
+        # Core insert on the table: the ORM bulk path groups rows by which values are
+        # None, so a mix of priced / unpriced nodes would turn into one INSERT per row.
+        # RETURNING (id, key) rather than sort_by_parameter_order (same fallback on SQLite).
+        rows = db.execute(
+            insert(_NODES).returning(_NODES.c.id, _NODES.c.node_key),
+            [{"owner_id": owner_id, "location": n.location, "gpu_model": n.gpu_model, "gpu_count": n.gpu_count,
+              "node_key": key, "is_online": False, "is_public": True, "price_per_hour": n.price_per_hour}
+             for n, key in batch],
+        ).all()
+        id_by_key.update((key, node_id) for node_id, key in rows)
+    created: List[Tuple[int, str]] = [(id_by_key[key], key) for key in keys]
+
+    now = datetime.utcnow()
+    prices = [{"node_id": node_id, "price_per_hour": n.price_per_hour, "currency": n.currency, "last_updated": now}
+              for (node_id, _), n in zip(created, nodes) if n.price_per_hour is not None]
+    for start in range(0, len(prices), FLEET_INSERT_BATCH):
+        db.execute(insert(_PRICES), prices[start:start + FLEET_INSERT_BATCH])
+    db.commit()
+    return created
+
+
+def stream_keys(created: List[Tuple[int, str]], nodes: List[BulkNodeSpec], fmt: str) -> Iterator[bytes]:
+    """Generated keys as NDJSON ({"id", "node_key", "location", "gpu_model"} per line) or CSV."""
+    if fmt == "csv":
+        yield b"id,node_key,location,gpu_model\r\n"
+    for start in range(0, len(created), _STREAM_LINES):
+        part = zip(created[start:start + _STREAM_LINES], nodes[start:start + _STREAM_LINES])
+        yield (_csv_lines if fmt == "csv" else _ndjson_lines)(part).encode()
+
+
+def _ndjson_lines(part: Iterable) -> str:
+    return "".join(
+        json.dumps({"id": node_id, "node_key": key, "location": n.location, "gpu_model": n.gpu_model},
+                   ensure_ascii=False) + "\n"
+        for (node_id, key), n in part
+    )
+
+
+def _csv_lines(part: Iterable) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for (node_id, key), n in part:
+        writer.writerow((node_id, key, n.location, n.gpu_model))
+    return buf.getvalue()
@@ -0,0 +1,13 @@
+# init_db.py
+# Explicit schema creation: run once per deploy (or before starting uvicorn workers)
+#   python init_db.py
+# Workers no longer call create_all on import; set AUTO_CREATE_TABLES=1 to do it at app startup instead.
+# Indexes and nullable columns added to tables that already exist are created by migrate.py (run here as well).
+
+import migrate
+from database import DATABASE_URL, init_db
+
+if __name__ == "__main__":
+    init_db()
+    migrate.apply()
+    print(f"tables created / verified on {DATABASE_URL.split('@')[-1]}")
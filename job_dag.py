@@ -0,0 +1,190 @@
+# job_dag.py
+# Job pipelines: a small DAG of commands submitted at once (POST /submit-job/dag).
+#
+#   {"node_id": 1, "node_key": "...", "steps": [
+#       {"name": "prep",  "command": "python prep.py"},
+#       {"name": "train", "command": "python train.py", "depends_on": ["prep"]},
+#       {"name": "eval",  "command": "python eval.py",  "depends_on": ["train"]}]}
+#
+# Every step becomes a Job on the node (billed like POST /submit-job) and every
+# edge a JobDependency row. Steps without dependencies are queued with the
+# fair-share scheduler right away; the others are stored as "waiting" and stay
+# out of the queue (scheduler.py only looks at "pending" jobs).
+#
+# Release is driven by an in-memory counter per waiting job (upstream jobs not
+# completed yet) and, per upstream job, the list of its waiting children. When a
+# job completes, on_complete() decrements its children's counters and the ones
+# reaching zero are flipped to "pending" with a guarded
+#   UPDATE jobs SET status = 'pending' ... WHERE id IN (..) AND status = 'waiting'
+# and queued, so the next stage is dispatched in the same request as the
+# completion instead of on the user's next poll. A completion without waiting
+# children costs one dict lookup.
+#
+# The database stays the source of truth: load() rebuilds the counters from the
+# waiting jobs and their edges at every scheduler tick (and so at startup), and
+# releases jobs whose upstream completed on another worker or before a restart.
+# An upstream job that left the jobs table (archived after completing) counts as
+# completed.
+
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, aliased
+
+import scheduler
+from models import Job, JobDependency
+
+DAG_MAX_STEPS = int(os.getenv("DAG_MAX_STEPS", 32))
+
+
+class DAGError(ValueError):
+    """Raised when submitted steps do not form a valid DAG."""
+
+
+def topological_order(steps: Sequence) -> List[int]:
+    """
+    Indexes of `steps` (objects with .name and .depends_on) with every step after its
+    dependencies, stable in submission order. DAGError on duplicate / unknown names or a cycle.
+    """
+    if not steps:
+        raise DAGError("no steps")
+    if len(steps) > DAG_MAX_STEPS:
+        raise DAGError(f"at most {DAG_MAX_STEPS} steps per pipeline")
+    index: Dict[str, int] = {}
+    for i, step in enumerate(steps):
+        if step.name in index:
+            raise DAGError(f"duplicate step name {step.name!r}")
+        index[step.name] = i
+    remaining = [0] * len(steps)
+    children: List[List[int]] = [[] for _ in steps]
+    for i, step in enumerate(steps):
+        for parent in dict.fromkeys(step.depends_on):
+            if parent not in index:
+                raise DAGError(f"step {step.name!r} depends on unknown step {parent!r}")
+            if parent == step.name:
+                raise DAGError(f"step {step.name!r} depends on itself")
+            children[index[parent]].append(i)
+            remaining[i] += 1
+
+    ready = deque(i for i in range(len(steps)) if remaining[i] == 0)
+    order = []
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        for child in children[i]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                ready.append(child)
+    if len(order) != len(steps):
+        cyclic = sorted(steps[i].name for i in range(len(steps)) if remaining[i])
+        raise DAGError(f"dependency cycle between steps {', '.join(cyclic)}")
+    return order
+
+
+class DependencyTracker:
+    """Per waiting job the number of upstream jobs not completed yet; per upstream job its waiting children."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining: Dict[int, int] = {}
+        self._children: Dict[int, List[int]] = {}
+        self.released = 0
+        self.loaded_at: Optional[datetime] = None
+
+    def add(self, job_id: int, upstream_ids: Sequence[int]):
+        with self._lock:
+            if job_id in self._remaining:  # already picked up by a load() that ran after the commit
+                return
+            self._remaining[job_id] = len(upstream_ids)
+            for parent in upstream_ids:
+                self._children.setdefault(parent, []).append(job_id)
+
+    def complete(self, job_id: int) -> List[int]:
+        """Mark an upstream job completed; returns the waiting jobs that have no open dependency left."""
+        with self._lock:
+            ready = []
+            for child in self._children.pop(job_id, ()):
+                left = self._remaining.get(child)
+                if left is None:
+                    continue
+                if left <= 1:
+                    del self._remaining[child]
+                    ready.append(child)
+                else:
+                    self._remaining[child] = left - 1
+            return ready
+
+    def load(self, db: Session) -> List[int]:
+        """Rebuild from the waiting jobs and their edges; returns the waiting jobs that are ready now."""
+        upstream = aliased(Job)
+        edges = (
+            db.query(Job.id, JobDependency.depends_on_id, upstream.status)
+            .join(JobDependency, JobDependency.job_id == Job.id)
+            .outerjoin(upstream, upstream.id == JobDependency.depends_on_id)
+            .filter(Job.status == "waiting")
+            .all()
+        )
+        remaining: Dict[int, int] = {}
+        children: Dict[int, List[int]] = {}
+        for job_id, parent, parent_status in edges:
+            remaining.setdefault(job_id, 0)
+            if parent_status is not None and parent_status != "completed":
+                remaining[job_id] += 1
+                children.setdefault(parent, []).append(job_id)
+        ready = [job_id for job_id, left in remaining.items() if left == 0]
+        with self._lock:
+            self._remaining = {job_id: left for job_id, left in remaining.items() if left}
+            self._children = children
+            self.loaded_at = datetime.utcnow()
+        return ready
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"waiting_jobs": len(self._remaining), "upstream_jobs": len(self._children),
+                    "released": self.released, "loaded_at": self.loaded_at}
+
+
+tracker = DependencyTracker()
+
+
+def release(db: Session, job_ids: Sequence[int], enqueue: bool = True) -> List[int]:
+    """
+    Move waiting jobs whose dependencies are met to the dispatch path ("pending" + queued with the
+    scheduler, or "running" straight away with SCHEDULER_ENABLED=0). Commits; returns the released ids.
+    Does not dispatch: the caller frees / fills the node's slots with scheduler.dispatch().
+    """
+    if not job_ids:
+        return []
+    now = datetime.utcnow()
+    queued = scheduler.SCHEDULER_ENABLED
+    values = {"status": "pending", "result": "Job '" + Job.command + "' is queued.", "updated_at": now}
+    if not queued:
+        values.update(status="running", start_time=now, result="Job '" + Job.command + "' is running.")
+    rows = db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.status == "waiting")
+        .values(**values)
+        .returning(Job.id, Job.node_id, Job.user_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    tracker.released += len(rows)
+    if queued and enqueue:
+        for job_id, node_id, user_id in sorted(rows):
+            scheduler.scheduler.enqueue(node_id, user_id, job_id)
+    return [row[0] for row in rows]
+
+
+def on_complete(db: Session, job_id: int) -> List[int]:
+    """A job completed (and was committed): release its downstream jobs that have nothing left to wait for."""
+    ready = tracker.complete(job_id)
+    return release(db, ready) if ready else []
+
+
+def load(db: Session) -> List[int]:
+    """Rebuild the counters from the database and release what is ready (jobs stay unqueued: the tick's scheduler load / sync reads them)."""
+    return release(db, tracker.load(db), enqueue=False)
@@ -0,0 +1,61 @@
+# leases.py
+# Single-runner election for background jobs that every worker starts but only
+# one may run at a time (reliability.Refresher).
+#
+# One worker_leases row per job name. try_acquire() takes the lease when it is
+# free, expired, or already ours, with one conditional UPDATE:
+#   UPDATE worker_leases SET holder = :me, expires_at = :now + ttl
+#   WHERE name = :name AND (holder = :me OR expires_at < :now)
+# and creates the row on first use (a concurrent creator loses on the primary
+# key). The holder renews the lease on every run, so it keeps it while alive;
+# when it dies another worker takes over once the lease expires.
+
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from models import WorkerLease
+
+HOLDER = uuid.uuid4().hex[:12]  # this process
+
+
+def try_acquire(name: str, ttl_seconds: float, holder: str = HOLDER) -> bool:
+    """True if `holder` holds lease `name` for the next ttl_seconds (taken or renewed)."""
+    now = datetime.utcnow()
+    expires = now + timedelta(seconds=ttl_seconds)
+    db = SessionLocal()
+    try:
+        taken = db.execute(
+            update(WorkerLease)
+            .where(WorkerLease.name == name, or_(WorkerLease.holder == holder, WorkerLease.expires_at < now))
+            .values(holder=holder, expires_at=expires)
+        ).rowcount
+        if taken:
+            db.commit()
+            return True
+        if db.get(WorkerLease, name) is not None:
+            db.rollback()
+            return False
+        try:
+            db.execute(insert(WorkerLease).values(name=name, holder=holder, expires_at=expires))
+            db.commit()
+            return True
+        except IntegrityError:  # another worker created it first
+            db.rollback()
+            return False
+    finally:
+        db.close()
+
+
+def release(name: str, holder: str = HOLDER):
+    """Give the lease up (on shutdown) so another worker does not wait for it to expire."""
+    db = SessionLocal()
+    try:
+        db.execute(update(WorkerLease).where(WorkerLease.name == name, WorkerLease.holder == holder)
+                   .values(expires_at=datetime(1970, 1, 1)))
+        db.commit()
+    finally:
+        db.close()
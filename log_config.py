@@ -1,9 +1,142 @@
+import atexit
+import itertools
+import json
 import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+
+# Non-blocking pipeline: loggers -> QueueHandler (in the request thread, no I/O)
+# -> QueueListener thread -> size-rotated file with one JSON object per line.
+LOG_FILE = os.getenv("LOG_FILE", "indicomp_logs.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 20 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# Per-logger sampling: "logger=rate,logger=rate" (rate 0..1, 0.01 = keep 1 in 100).
+# High-frequency events (health probes, heartbeats) get their own child logger.
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "indicompute.health=0.01,indicompute.heartbeat=0.01")
+
+# LogRecord attributes that are not user supplied `extra=` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps 1 of every round(1/rate) records per sampled logger (and its children).
+    Counter based, so the cost of a dropped record is one dict lookup + next().
+    WARNING and above are never sampled out.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self._counters = {name: itertools.count() for name in rates}
+
+    def _rule(self, name):
+        while name:
+            if name in self.rates:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rule = self._rule(record.name)
+        if rule is None:
+            return True
+        rate = self.rates[rule]
+        if rate <= 0:
+            return False
+        every = max(1, round(1 / rate))
+        keep = next(self._counters[rule]) % every == 0
+        if keep and every > 1:
+            record.sample_rate = rate
+        return keep
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # resolve message/exception here (args may be mutated later), keep the record structured
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # never block a request on logging; drop and count
+            self.dropped = getattr(self, "dropped", 0) + 1
+
+
+def parse_sampling(spec):
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, rate = part.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def stop_logging():
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        # detach first: records logged after this would sit in a queue nobody drains
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()  # flushes everything still queued
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
 
 def setup_logger():
-    logging.basicConfig(
-        filename="indicomp_logs.log",
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s"
-    )
+    global _listener, _queue_handler
+    if _listener is None:
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        queue_handler = _NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(parse_sampling(LOG_SAMPLING)))
+
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(queue_handler)
+        _queue_handler = queue_handler
+
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.unregister(stop_logging)
+        atexit.register(stop_logging)
     return logging.getLogger("indicompute")
@@ -0,0 +1,153 @@
+# log_ingest.py
+# Batch ingestion helpers for GPU execution logs (used by POST /gpu-exec/logs/bulk)
+#
+# JSON decoding + pydantic validation run in the threadpool, not on the event loop.
+# A JSON array body is read whole, so it is capped at LOG_INGEST_MAX_BYTES; NDJSON
+# is parsed batch by batch while streaming and a single line is capped at
+# LOG_INGEST_MAX_LINE_BYTES (large details belong in a few lines, or go to the blob
+# store once stored). The NDJSON splitter only scans newly received bytes, so the
+# event-loop work per request stays linear in the body size.
+
+import json
+import os
+from typing import AsyncIterator, Dict, Iterable, List, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import blob_store
+from models import Job, GPUExecutionLog
+from schemas import GPUExecutionLogCreate
+
+LOG_INGEST_BATCH_SIZE = int(os.getenv("LOG_INGEST_BATCH_SIZE", 1000))
+LOG_INGEST_MAX_BYTES = int(os.getenv("LOG_INGEST_MAX_BYTES", 64 * 1024 * 1024))
+LOG_INGEST_MAX_LINE_BYTES = int(os.getenv("LOG_INGEST_MAX_LINE_BYTES", 256 * 1024))
+
+
+class LogIngestError(ValueError):
+    """Raised when a line of the uploaded batch can not be parsed."""
+
+    def __init__(self, line_no: int, reason: str):
+        super().__init__(f"line {line_no}: {reason}")
+        self.line_no = line_no
+        self.reason = reason
+
+
+class LogIngestTooLarge(ValueError):
+    """Raised when a JSON body is over LOG_INGEST_MAX_BYTES or an NDJSON line over LOG_INGEST_MAX_LINE_BYTES."""
+
+
+async def read_body(chunks: AsyncIterator[bytes], max_bytes: int = LOG_INGEST_MAX_BYTES) -> bytes:
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise LogIngestTooLarge(f"body larger than {max_bytes} bytes, send NDJSON instead")
+    return bytes(body)
+
+
+def parse_log_item(item, line_no: int) -> GPUExecutionLogCreate:
+    try:
+        return GPUExecutionLogCreate.model_validate(item)
+    except ValidationError as e:
+        raise LogIngestError(line_no, e.errors()[0].get("msg", "invalid log entry"))
+
+
+def parse_json_array(body: bytes) -> List[GPUExecutionLogCreate]:
+    try:
+        data = json.loads(body or b"[]")
+    except ValueError:
+        raise LogIngestError(1, "body is not valid JSON")
+    if not isinstance(data, list):
+        raise LogIngestError(1, "expected a JSON array of log entries")
+    return [parse_log_item(item, i + 1) for i, item in enumerate(data)]
+
+
+def parse_ndjson_lines(lines: List[bytes], first_line_no: int) -> List[GPUExecutionLogCreate]:
+    """Parse raw NDJSON lines (blank lines skipped); first_line_no numbers errors."""
+    entries = []
+    for line_no, raw in enumerate(lines, first_line_no):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            raise LogIngestError(line_no, "invalid JSON")
+        entries.append(parse_log_item(item, line_no))
+    return entries
+
+
+async def iter_ndjson_batches(
+    chunks: AsyncIterator[bytes], batch_size: int = LOG_INGEST_BATCH_SIZE,
+    max_line_bytes: int = LOG_INGEST_MAX_LINE_BYTES,
+) -> AsyncIterator[List[GPUExecutionLogCreate]]:
+    """Parse a streamed NDJSON body in the threadpool, yielding batches as soon as they are full."""
+    buf = bytearray()  # the unfinished line; only bytes after it are searched for newlines
+    line_no = 1
+    pending: List[bytes] = []
+
+    async for chunk in chunks:
+        scan = len(buf)
+        buf += chunk
+        start = 0
+        while True:
+            end = buf.find(b"\n", scan)
+            if end < 0:
+                break
+            if end - start > max_line_bytes:
+                raise LogIngestTooLarge(f"line {line_no + len(pending)} larger than {max_line_bytes} bytes")
+            pending.append(bytes(buf[start:end]))
+            start = scan = end + 1
+            if len(pending) >= batch_size:
+                batch = await run_in_threadpool(parse_ndjson_lines, pending, line_no)
+                line_no += len(pending)
+                pending = []
+                if batch:
+                    yield batch
+        del buf[:start]  # O(1) for a bytearray prefix
+        if len(buf) > max_line_bytes:
+            raise LogIngestTooLarge(f"line {line_no + len(pending)} larger than {max_line_bytes} bytes")
+
+    pending.append(bytes(buf))
+    batch = await run_in_threadpool(parse_ndjson_lines, pending, line_no)
+    if batch:
+        yield batch
+
+
+def write_log_batch(
+    db: Session, entries: Iterable[GPUExecutionLogCreate], known_job_ids: Set[int]
+) -> Tuple[List, Set[int]]:
+    """
+    Insert one batch with a single executemany + commit.
+    Job existence is checked once per job id (cached in known_job_ids across batches).
+    Details over BLOB_INLINE_MAX bytes are stored as blob references (blob_store.py).
+    Returns (inserted_rows, missing_job_ids); entries of missing jobs are skipped.
+    """
+    entries = list(entries)
+    job_ids = {e.job_id for e in entries}
+    unchecked = job_ids - known_job_ids
+    if unchecked:
+        found = {row[0] for row in db.query(Job.id).filter(Job.id.in_(unchecked)).all()}
+        known_job_ids.update(found)
+    missing = job_ids - known_job_ids
+
+    rows: List[Dict] = [
+        {"job_id": e.job_id, "log_type": e.log_type, "details": blob_store.offload_text(e.details)}
+        for e in entries
+        if e.job_id not in missing
+    ]
+    inserted = []
+    if rows:
+        # RETURNING gives the ids needed by live tail followers (log_tail.py)
+        inserted = db.execute(
+            insert(GPUExecutionLog).returning(
+                GPUExecutionLog.id, GPUExecutionLog.job_id, GPUExecutionLog.log_type,
+                GPUExecutionLog.details, GPUExecutionLog.timestamp,
+            ),
+            rows,
+        ).all()
+        db.commit()
+    return inserted, missing
@@ -0,0 +1,201 @@
+# log_store.py
+# Chunked, compressed storage for GPU execution logs.
+#
+# New log lines are always inserted as GPUExecutionLog rows (cheap appends).
+# compact_job_logs() packs the oldest rows of a job into GPUExecutionLogChunk
+# blocks of LOG_CHUNK_LINES lines and deletes the packed rows, so a job's log is
+# "cold chunks + hot tail rows". Ids are preserved inside the chunk, so readers
+# see the same ids before and after compaction.
+# A chunk is only written after its rows were claimed (deleted) in the same
+# transaction, so concurrent compactions of one job never pack a line twice.
+# Chunked ids must never be handed out again: gpu_execution_logs is AUTOINCREMENT
+# on SQLite. Databases created before that keep max(id) + 1 until migrate.py
+# rebuilds the table, so there the row holding the current max id is never packed.
+#
+# EXEC_LOG_STORAGE=chunked  -> jobs are compacted automatically when completed
+# EXEC_LOG_STORAGE=rows     -> (default) no automatic compaction
+#
+# CLI:  python log_store.py compact [--job-id N] [--final]
+
+import json
+import lzma
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import GPUExecutionLog, GPUExecutionLogChunk
+
+LOG_STORAGE_MODE = os.getenv("EXEC_LOG_STORAGE", "rows")
+LOG_CHUNK_LINES = int(os.getenv("EXEC_LOG_CHUNK_LINES", 1000))
+LOG_CHUNK_CODEC = os.getenv("EXEC_LOG_CODEC", "zlib")
+
+_CODECS = {
+    "zlib": (lambda raw: zlib.compress(raw, 6), zlib.decompress),
+    "lzma": (lambda raw: lzma.compress(raw, preset=6), lzma.decompress),
+}
+
+
+def encode_lines(lines: List[tuple], codec: str = LOG_CHUNK_CODEC) -> tuple:
+    """lines = [(id, log_type, details, timestamp)] -> (payload bytes, raw size)"""
+    raw = json.dumps(
+        [[i, t, d, ts.isoformat() if ts else None] for i, t, d, ts in lines],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode()
+    compress, _ = _CODECS[codec]
+    return compress(raw), len(raw)
+
+
+def decode_chunk(data: bytes, codec: str) -> List[list]:
+    _, decompress = _CODECS[codec]
+    return json.loads(decompress(data))
+
+
+_REUSES_IDS: Dict[str, bool] = {}
+
+
+def log_ids_reusable(db: Session) -> bool:
+    """True on SQLite while gpu_execution_logs has no AUTOINCREMENT (deleting the max id row frees that id)."""
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    key = str(bind.url)
+    if key not in _REUSES_IDS:
+        sql = db.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'gpu_execution_logs'"))
+        _REUSES_IDS[key] = "AUTOINCREMENT" not in (sql.scalar() or "").upper()
+    return _REUSES_IDS[key]
+
+
+def compact_job_logs(db: Session, job_id: int, final: bool = False,
+                     chunk_lines: int = LOG_CHUNK_LINES, codec: str = LOG_CHUNK_CODEC) -> int:
+    """
+    Pack the rows of one job into chunks, oldest first, one commit per chunk.
+    Only full chunks are written unless final=True (job finished -> pack the tail too).
+    Returns the number of chunks created.
+    """
+    created = 0
+    keep_max_id = log_ids_reusable(db)
+    while True:
+        query = (
+            db.query(GPUExecutionLog.id, GPUExecutionLog.log_type,
+                     GPUExecutionLog.details, GPUExecutionLog.timestamp)
+            .filter(GPUExecutionLog.job_id == job_id)
+        )
+        if keep_max_id:
+            query = query.filter(GPUExecutionLog.id < db.query(func.max(GPUExecutionLog.id)).scalar_subquery())
+        rows = query.order_by(GPUExecutionLog.id).limit(chunk_lines).all()
+        if not rows or (len(rows) < chunk_lines and not final):
+            break
+
+        data, raw_size = encode_lines(rows, codec)
+        ids = [r[0] for r in rows]
+        # claim the rows before writing the chunk: a concurrent compaction of the same job
+        # (completion task + CLI, two workers) that got there first leaves fewer rows to delete
+        deleted = (
+            db.query(GPUExecutionLog)
+            .filter(GPUExecutionLog.job_id == job_id, GPUExecutionLog.id.in_(ids))
+            .delete(synchronize_session=False)
+        )
+        if deleted != len(ids):
+            db.rollback()
+            continue  # re-read what is left
+        db.execute(insert(GPUExecutionLogChunk), [{
+            "job_id": job_id,
+            "first_log_id": ids[0],
+            "last_log_id": ids[-1],
+            "line_count": len(ids),
+            "codec": codec,
+            "raw_size": raw_size,
+            "data": data,
+            "created_at": datetime.utcnow(),
+        }])
+        db.commit()
+        created += 1
+
+        if len(rows) < chunk_lines:
+            break
+    return created
+
+
+def compact_job_logs_task(job_id: int, final: bool = True):
+    """BackgroundTasks entry point: uses its own session (request session is already closed)."""
+    db = SessionLocal()
+    try:
+        compact_job_logs(db, job_id, final=final)
+    finally:
+        db.close()
+
+
+def read_job_logs(db: Session, job_id: int, from_id: Optional[int] = None,
+                  to_id: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Return log lines of a job with from_id <= id <= to_id (both optional), ordered by id.
+    Only chunks overlapping the range are fetched and decompressed; the hot tail
+    comes straight from gpu_execution_logs.
+    """
+    out: List[Dict] = []
+
+    # chunk metadata first (no payload), then payloads only for chunks we actually read
+    meta = db.query(GPUExecutionLogChunk.id).filter(GPUExecutionLogChunk.job_id == job_id)
+    if from_id is not None:
+        meta = meta.filter(GPUExecutionLogChunk.last_log_id >= from_id)
+    if to_id is not None:
+        meta = meta.filter(GPUExecutionLogChunk.first_log_id <= to_id)
+    chunk_ids = [r[0] for r in meta.order_by(GPUExecutionLogChunk.first_log_id).all()]
+
+    for chunk_id in chunk_ids:
+        if limit is not None and len(out) >= limit:
+            return out
+        codec, data = (
+            db.query(GPUExecutionLogChunk.codec, GPUExecutionLogChunk.data)
+            .filter(GPUExecutionLogChunk.id == chunk_id)
+            .one()
+        )
+        for log_id, log_type, details, ts in decode_chunk(data, codec):
+            if from_id is not None and log_id < from_id:
+                continue
+            if to_id is not None and log_id > to_id:
+                break
+            out.append({"id": log_id, "job_id": job_id, "log_type": log_type,
+                        "details": details, "timestamp": ts})
+            if limit is not None and len(out) >= limit:
+                return out
+
+    # plain rows (id, job_id, log_type, details, timestamp): no ORM instances for long logs
+    q = db.query(GPUExecutionLog.id, GPUExecutionLog.job_id, GPUExecutionLog.log_type,
+                 GPUExecutionLog.details, GPUExecutionLog.timestamp).filter(GPUExecutionLog.job_id == job_id)
+    if from_id is not None:
+        q = q.filter(GPUExecutionLog.id >= from_id)
+    if to_id is not None:
+        q = q.filter(GPUExecutionLog.id <= to_id)
+    q = q.order_by(GPUExecutionLog.id)
+    if limit is not None:
+        q = q.limit(limit - len(out))
+    out.extend(q.all())
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact GPU execution logs into compressed chunks")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--job-id", type=int, default=None, help="only this job (default: every job with rows)")
+    parser.add_argument("--final", action="store_true", help="also pack the partial tail chunk")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.job_id is not None:
+            job_ids = [args.job_id]
+        else:
+            job_ids = [r[0] for r in session.query(GPUExecutionLog.job_id).distinct().all()]
+        total = sum(compact_job_logs(session, j, final=args.final) for j in job_ids)
+        print(f"compacted {len(job_ids)} job(s) into {total} chunk(s)")
+    finally:
+        session.close()
@@ -0,0 +1,155 @@
+# log_tail.py
+# In-process, per-job ring buffers of recently ingested GPU execution log lines.
+#
+# Ingestion endpoints publish every committed line here; follow/stream readers
+# (GET /gpu-exec/logs/{job_id}/follow and /stream) are served from the ring and
+# woken up as soon as a new line arrives, so tailing a hot job never re-reads
+# old rows from the database. When the ring does not cover the requested cursor
+# (line evicted, process restarted, line written by another worker) the caller
+# falls back to log_store.read_job_logs.
+#
+# A ring only sees the lines this process ingested, and ingest threads commit out
+# of order, so "oldest id <= cursor" does not prove the ring holds every newer
+# line. Unless LOG_TAIL_SINGLE_WRITER=1 (one process ingests every line), the
+# caller passes the committed ids after the cursor (an index-only query on
+# (job_id, id), no details read) and the ring serves only if it holds all of them.
+
+import asyncio
+import bisect
+import itertools
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Sequence
+
+LOG_TAIL_RING_SIZE = int(os.getenv("LOG_TAIL_RING_SIZE", 2000))
+LOG_TAIL_MAX_JOBS = int(os.getenv("LOG_TAIL_MAX_JOBS", 1000))
+LOG_TAIL_SINGLE_WRITER = os.getenv("LOG_TAIL_SINGLE_WRITER", "0") == "1"
+
+
+class _JobRing:
+    __slots__ = ("lines", "ids", "waiters")
+
+    def __init__(self, size: int):
+        self.lines = deque(maxlen=size)   # dicts shaped like GPUExecutionLogOut
+        self.ids = deque(maxlen=size)     # parallel, sorted ids for bisect
+        self.waiters = set()              # (loop, asyncio.Event)
+
+
+class LogTailHub:
+    def __init__(self, ring_size: int = LOG_TAIL_RING_SIZE, max_jobs: int = LOG_TAIL_MAX_JOBS):
+        self.ring_size = ring_size
+        self.max_jobs = max_jobs
+        self._rings: "OrderedDict[int, _JobRing]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ring(self, job_id: int) -> _JobRing:
+        ring = self._rings.get(job_id)
+        if ring is None:
+            ring = self._rings[job_id] = _JobRing(self.ring_size)
+            # LRU eviction of idle jobs (never drop a job somebody is waiting on)
+            while len(self._rings) > self.max_jobs:
+                old_id, old = next(iter(self._rings.items()))
+                if old.waiters:
+                    self._rings.move_to_end(old_id)
+                    break
+                del self._rings[old_id]
+        else:
+            self._rings.move_to_end(job_id)
+        return ring
+
+    def publish(self, lines: List[Dict]):
+        """Add committed lines (dicts with id/job_id/log_type/details/timestamp) and wake followers."""
+        wake = []
+        with self._lock:
+            for line in lines:
+                ring = self._ring(line["job_id"])
+                if not ring.ids or line["id"] > ring.ids[-1]:
+                    ring.lines.append(line)
+                    ring.ids.append(line["id"])
+                else:
+                    # concurrent ingest threads can commit out of order -> keep the ring sorted
+                    pos = bisect.bisect_left(ring.ids, line["id"])
+                    if pos < len(ring.ids) and ring.ids[pos] == line["id"]:
+                        continue
+                    if len(ring.ids) == ring.ids.maxlen:
+                        if pos == 0:
+                            continue
+                        ring.lines.popleft()
+                        ring.ids.popleft()
+                        pos -= 1
+                    ring.lines.insert(pos, line)
+                    ring.ids.insert(pos, line["id"])
+                wake.extend(ring.waiters)
+                ring.waiters.clear()
+        for loop, event in wake:
+            loop.call_soon_threadsafe(event.set)
+
+    def read_since(self, job_id: int, since_id: int, limit: Optional[int] = None,
+                   committed_ids: Optional[Sequence[int]] = None) -> Optional[List[Dict]]:
+        """
+        Lines with id > since_id from the ring, or None when the ring can not prove
+        it holds every such line (caller must read the database instead).
+        committed_ids: ids > since_id in the database; required unless LOG_TAIL_SINGLE_WRITER.
+        """
+        if committed_ids is None and not LOG_TAIL_SINGLE_WRITER:
+            return None
+        with self._lock:
+            ring = self._rings.get(job_id)
+            # ids are global across jobs, so the ring only proves there is no gap
+            # when its oldest line is at or before the cursor
+            if ring is None or not ring.ids or ring.ids[0] > since_id:
+                return None
+            for log_id in committed_ids or ():
+                pos = bisect.bisect_left(ring.ids, log_id)
+                if pos == len(ring.ids) or ring.ids[pos] != log_id:
+                    return None  # ingested by another worker / not published here yet
+            pos = bisect.bisect_right(ring.ids, since_id)
+            out = list(itertools.islice(ring.lines, pos, None))
+        return out[:limit] if limit is not None else out
+
+    async def wait(self, job_id: int, timeout: float, since_id: Optional[int] = None) -> bool:
+        """
+        Wait until a new line is published for job_id. Returns False on timeout.
+        With since_id, returns at once if the ring already holds a newer line
+        (covers a publish between the caller's read and this call).
+        """
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            ring = self._ring(job_id)
+            if since_id is not None and ring.ids and ring.ids[-1] > since_id:
+                return True
+            ring.waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                ring = self._rings.get(job_id)
+                if ring is not None:
+                    ring.waiters.discard(waiter)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "jobs": len(self._rings),
+                "lines": sum(len(r.ids) for r in self._rings.values()),
+                "waiters": sum(len(r.waiters) for r in self._rings.values()),
+            }
+
+
+hub = LogTailHub()
+
+
+def log_to_dict(log) -> Dict:
+    """GPUExecutionLog row / Row tuple -> dict shaped like GPUExecutionLogOut."""
+    return {
+        "id": log.id,
+        "job_id": log.job_id,
+        "log_type": log.log_type,
+        "details": log.details,
+        "timestamp": log.timestamp,
+    }
@@ -1,49 +1,50 @@
 import sys
+import time
 import secrets
-from datetime import datetime
-from typing import List
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Union
 import os
 
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
 # Correct logger import
 import log_config
+import logging
 logger = log_config.setup_logger()
+# high-frequency events: separate loggers, sampled by log_config (LOG_SAMPLING)
+health_logger = logging.getLogger("indicompute.health")
+heartbeat_logger = logging.getLogger("indicompute.heartbeat")
 
-# DEBUG LOGS
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
-
-print("DEBUG_SECRET_KEY=", SECRET_KEY)
-print("DEBUG_ALGO=", ALGORITHM)
-print("DEBUG_EXPIRE=", ACCESS_TOKEN_EXPIRE_MINUTES)
+# NOTE: .env is loaded once, by database.py (imported below, before auth reads JWT settings)
 
-from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.security import HTTPBearer
+from sqlalchemy import func, insert, text
 from sqlalchemy.orm import Session
 
-from database import Base, engine, get_db
+from database import (
+    SessionLocal, engine, read_engine, replica_engine, get_db, get_read_db, new_read_session, init_db,
+    READ_AFTER_WRITE_SECONDS,
+)
 from models import (
     User, GPUNode, Job, NodeActivityLog,
-    NodePricing, NodeEarning, WalletTransaction, GPUExecutionLog
+    NodePricing, NodeEarning, WalletTransaction, GPUExecutionLog, JobArchive, NodeReliability, JobDependency
 )
 
 from schemas import (
     UserCreate, UserResponse, LoginSchema,
-    GPUNodeCreate, GPUNodeResponse, GPUNodeUpdate,
+    GPUNodeCreate, GPUNodeResponse, GPUNodeUpdate, MarketplaceNodeOut, NodeReliabilityOut,
     NodeRegisterRequest, NodeRegisterResponse,
     NodeHeartbeatRequest, NodeStatusResponse,
-    JobCreate, JobResponse,
+    JobCreate, JobResponse, JobStatusBatchOut, JobDAGCreate, JobDAGOut,
     NodePricingCreate, NodePricingOut, NodeEarningOut,
     WalletTransactionOut, WalletBalanceOut,
-    GPUExecutionLogCreate, GPUExecutionLogOut,
-    NodeEarningsDashboard, Token
+    GPUExecutionLogCreate, GPUExecutionLogOut, GPUExecutionLogBulkOut, GPUExecutionLogFollowOut,
+    NodeEarningsDashboard, OwnerEarningsDashboard, WriteQueuedOut, Token
 )
 
 from pydantic import BaseModel
@@ -52,6 +53,25 @@ class WalletTopupRequest(BaseModel):
     amount: float
 
 
+import log_ingest
+import log_store
+import log_tail
+import write_behind
+import metrics
+import fast_json
+import cache_bus
+import pricing
+import admission
+import archive
+import blob_store
+import etags
+import fleet
+import job_dag
+import reliability
+import scheduler
+
+LOG_STREAM_KEEPALIVE_SECONDS = float(os.getenv("LOG_STREAM_KEEPALIVE_SECONDS", 15))
+
 # AUTH IMPORTS
 from auth import (
     hash_password, verify_password,
@@ -60,20 +80,141 @@ from auth import (
 )
 
 
+# list endpoints: selected columns + one bulk JSON encode instead of ORM objects + response_model
+NODE_ROWS = fast_json.RowSerializer(GPUNode, MarketplaceNodeOut, columns={
+    "reliability_score": NodeReliability.score, "uptime_pct": NodeReliability.uptime_pct})
+JOB_ROWS = fast_json.RowSerializer(Job, JobResponse)
+WALLET_TX_ROWS = fast_json.RowSerializer(WalletTransaction, WalletTransactionOut)
+EXEC_LOG_ROWS = fast_json.RowSerializer(GPUExecutionLog, GPUExecutionLogOut)
+ARCHIVED_JOB_ROWS = fast_json.RowSerializer(JobArchive, JobResponse)
+
+
+# in-process caches, kept coherent across workers by cache_bus (publish after commit)
+NODE_AUTH_CACHE_TTL = float(os.getenv("NODE_AUTH_CACHE_TTL", 300))
+MARKETPLACE_CACHE_TTL = float(os.getenv("MARKETPLACE_CACHE_TTL", 5))
+node_auth_cache = cache_bus.bus.cache("node_auth", ttl=NODE_AUTH_CACHE_TTL)  # node_id -> node_key
+# serialized /marketplace/gpu-nodes body; heartbeats (last_heartbeat/is_online) only refresh it via the TTL
+marketplace_cache = cache_bus.bus.cache("marketplace", ttl=MARKETPLACE_CACHE_TTL, maxsize=1)
+
+
+def _invalidate_node(node_id: int, credentials: bool = False):
+    keys = {"marketplace": ["public"]}
+    if credentials:
+        keys["node_auth"] = [node_id]
+        keys["pricing"] = [node_id]
+    cache_bus.bus.publish_many(keys)
+
+
+# write-behind flushes of execution logs feed the live tail followers
+write_behind.writer.on_flush(
+    GPUExecutionLog,
+    (GPUExecutionLog.id, GPUExecutionLog.job_id, GPUExecutionLog.log_type,
+     GPUExecutionLog.details, GPUExecutionLog.timestamp),
+    lambda rows: log_tail.hub.publish([log_tail.log_to_dict(r) for r in rows]),
+)
+
+
+# Schema creation is an explicit step (python init_db.py) instead of running on every
+# worker import; AUTO_CREATE_TABLES=1 keeps the old behaviour for local dev, once at startup.
+AUTO_CREATE_TABLES = os.getenv("AUTO_CREATE_TABLES", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if AUTO_CREATE_TABLES:
+        init_db()
+    log_config.setup_logger()  # no-op unless a previous shutdown stopped logging
+    cache_bus.bus.start()
+    reliability.refresher.start()
+    scheduler.dispatcher.start()
+    yield
+    scheduler.dispatcher.stop()
+    reliability.refresher.stop()
+    cache_bus.bus.stop()
+    # drain queued log/activity inserts before the worker exits
+    write_behind.writer.stop()
+    log_config.stop_logging()
+
+
 # ---------------- FASTAPI CONFIG ------------------
 app = FastAPI(
     title="IndiCompute API",
     version="1.5",
-    description="GPU Rent + Billing + Wallet + Logs"
+    description="GPU Rent + Billing + Wallet + Logs",
+    lifespan=lifespan,
 )
 
+# gzip bodies over GZIP_MIN_BYTES for clients that accept it (SSE log streams are left alone);
+# level 5: large job / transaction lists shrink ~10x at a fraction of level 9's CPU.
+# Innermost middleware: it must see the endpoint's single-message body to apply
+# minimum_size (behind an @app.middleware("http") every body arrives as a stream).
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 5))
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
+
+@app.middleware("http")
+async def read_after_write_marker(request: Request, call_next):
+    """
+    After a successful write, pin the client's reads to the primary for READ_AFTER_WRITE_SECONDS
+    (cookie read by database.get_read_db), so it never reads its own write from a lagging replica.
+    """
+    response = await call_next(request)
+    if replica_engine is not None and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        until = time.time() + READ_AFTER_WRITE_SECONDS
+        response.set_cookie("read_primary_until", f"{until:.3f}", max_age=int(READ_AFTER_WRITE_SECONDS) + 1,
+                            httponly=True, samesite="lax")
+        response.headers["X-Read-Primary-Until"] = f"{until:.3f}"
+    return response
+
+
+@app.exception_handler(write_behind.QueueFullError)
+def write_queue_full_handler(request: Request, exc: write_behind.QueueFullError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 
 @app.get("/healthz", tags=["System"])
 def health_check():
-    logger.info("Health check endpoint called successfully.")
+    health_logger.info("Health check endpoint called successfully.")
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["System"], response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus text exposition: per-route latency, status codes, in-flight, SQL per request."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/system/write-queue", tags=["System"])
+def write_queue_stats():
+    """Depth and flush latency of the write-behind queue."""
+    return write_behind.writer.stats()
+
+
+@app.get("/system/admission", tags=["System"])
+def admission_stats():
+    """Concurrency limit, queue and rejection counters per endpoint class (this worker)."""
+    return admission.controller.stats()
+
+
+@app.get("/system/caches", tags=["System"])
+def cache_stats():
+    """Hit rates of the in-process caches and invalidation bus counters (this worker)."""
+    return cache_bus.bus.stats()
+
+
+@app.get("/system/reliability", tags=["System"])
+def reliability_stats():
+    """Background reliability refresh of this worker: runs, errors, last result."""
+    return reliability.refresher.stats()
+
+
+@app.get("/system/scheduler", tags=["System"])
+def scheduler_stats():
+    """Fair-share job queue of this worker: queued jobs, dispatches, last tick."""
+    return {**scheduler.dispatcher.stats(), "dependencies": job_dag.tracker.stats()}
+
+
 @app.get("/db-test")
 def db_test():
     try:
@@ -84,9 +225,6 @@ def db_test():
         return {"error": str(e)}
 
 
-# Create DB tables
-Base.metadata.create_all(bind=engine)
-
 bearer_scheme = HTTPBearer(auto_error=True)
 
 
@@ -96,6 +234,9 @@ origins = ["https://app.indicompute.in",
            "http://127.0.0.1:8000",
            ]
 
+# admission control sits inside CORS (shed 503s still carry CORS headers) and inside metrics
+app.add_middleware(admission.AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -104,15 +245,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --------------- METRICS (outermost middleware) -------------------
+for _engine in {engine, read_engine, replica_engine} - {None}:
+    metrics.instrument_engine(_engine)
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.registry.add_gauge(
+    "indicompute_write_queue_depth", "Rows waiting in the write-behind queue.",
+    lambda: {(): write_behind.writer.depth},
+)
+metrics.registry.add_gauge(
+    "indicompute_write_queue_flush_ms", "Write-behind flush latency (last/avg/max).",
+    lambda: {(("stat", k),): write_behind.writer.stats()[f"{k}_flush_ms"] for k in ("last", "avg", "max")},
+)
+metrics.registry.add_gauge(
+    "indicompute_db_pool_checked_out", "Checked-out connections per engine pool.",
+    lambda: {(("engine", name),): e.pool.checkedout()
+             for name, e in (("primary", engine), ("read", read_engine), ("replica", replica_engine))
+             if e is not None and hasattr(e.pool, "checkedout")},
+)
+metrics.registry.add_gauge(
+    "indicompute_admission", "Admission control per endpoint class: limit, active, queued, admitted, rejected.",
+    lambda: {(("class", name), ("stat", k)): lane_stats[k]
+             for name, lane_stats in admission.controller.stats()["classes"].items()
+             for k in ("limit", "active", "queued", "admitted", "rejected_queue_full", "rejected_timeout")},
+)
+metrics.registry.add_gauge(
+    "indicompute_cache_events", "In-process cache hits/misses/invalidations (this worker).",
+    lambda: {(("cache", name), ("stat", k)): stats[k]
+             for name, stats in cache_bus.bus.stats()["caches"].items()
+             for k in ("hits", "misses", "invalidations", "entries")},
+)
+
 
 # =====================================================
 # Public Marketplace GPU listing (NO AUTH)
 # =====================================================
-@app.get("/marketplace/gpu-nodes", response_model=List[GPUNodeResponse], tags=["Public"])
-def list_public_gpu_nodes(db: Session = Depends(get_db)):
-    if hasattr(GPUNode, "is_public"):
-        return db.query(GPUNode).filter(GPUNode.is_public == True).all()
-    return db.query(GPUNode).all()
+def _marketplace_rows(db: Session):
+    # most reliable first (stored scores, see reliability.py); unscored nodes last
+    return (
+        db.query(*NODE_ROWS.columns)
+        .outerjoin(NodeReliability, NodeReliability.node_id == GPUNode.id)
+        .filter(GPUNode.is_public == True)
+        .order_by(NodeReliability.score.desc().nulls_last(), GPUNode.id)
+        .all()
+    )
+
+
+@app.get("/marketplace/gpu-nodes", response_model=List[MarketplaceNodeOut], tags=["Public"])
+def list_public_gpu_nodes(db: Session = Depends(get_read_db)):
+    if fast_json.FAST_LIST_JSON:
+        body = marketplace_cache.get("public")
+        if body is None:
+            generation = marketplace_cache.generation
+            body = NODE_ROWS.dumps(_marketplace_rows(db))
+            marketplace_cache.set("public", body, generation)
+        return Response(content=body, media_type="application/json")
+    return NODE_ROWS.dicts(_marketplace_rows(db))
+
+
+@app.get("/marketplace/gpu-nodes/{node_id}/reliability", response_model=NodeReliabilityOut, tags=["Public"])
+def get_node_reliability(node_id: int, db: Session = Depends(get_read_db)):
+    row = (
+        db.query(NodeReliability)
+        .join(GPUNode, GPUNode.id == NodeReliability.node_id)
+        .filter(NodeReliability.node_id == node_id, GPUNode.is_public == True)
+        .first()
+    )
+    if not row:
+        raise HTTPException(404, "No reliability score for this node yet")
+    return row
 
 
 # =====================================================
@@ -177,15 +379,22 @@ def create_gpu_node(data: GPUNodeCreate,
     db.add(node)
     db.commit()
     db.refresh(node)
+    _invalidate_node(node.id)
     return node
 
 
 # ✅ FIXED — Add GET /gpu-nodes (was missing earlier)
 @app.get("/gpu-nodes", response_model=List[GPUNodeResponse], tags=["GPU"])
-def list_user_gpu_nodes(current_user: User = Depends(get_current_user),
-                        db: Session = Depends(get_db)):
-    """Return all GPU nodes owned by the current user."""
+def list_user_gpu_nodes(request: Request, response: Response,
+                        current_user: User = Depends(get_current_user),
+                        db: Session = Depends(get_read_db)):
+    """Return all GPU nodes owned by the current user (ETag / If-None-Match: etags.py)."""
+    etag = etags.make_etag(request, current_user.id, etags.nodes_version(db, current_user.id))
+    unchanged = etags.not_modified(request, etag)
+    if unchanged:
+        return unchanged
     nodes = db.query(GPUNode).filter(GPUNode.owner_id == current_user.id).all()
+    response.headers.update(etags.headers(etag))
     return nodes
 
 
@@ -204,6 +413,7 @@ def update_gpu_node(node_id: int, data: GPUNodeUpdate,
         node.gpu_count = data.gpu_count
     db.commit()
     db.refresh(node)
+    _invalidate_node(node.id)
     return node
 
 
@@ -216,6 +426,7 @@ def delete_gpu_node(node_id: int,
         raise HTTPException(404, "GPU node not found")
     db.delete(node)
     db.commit()
+    _invalidate_node(node_id, credentials=True)
     return {"detail": "GPU node deleted"}
 
 @app.post("/gpu-nodes/register", tags=["GPU Nodes"])
@@ -235,25 +446,85 @@ def register_gpu_node(data: NodeRegisterRequest,
     db.add(node)
     db.commit()
     db.refresh(node)
+    _invalidate_node(node.id)
     return node
 
 
+@app.post("/gpu-nodes/bulk", tags=["GPU Nodes"])
+async def register_gpu_nodes_bulk(request: Request,
+                                  format: Optional[str] = Query(None, pattern="^(ndjson|csv)$",
+                                                                description="response format (default: same as upload)"),
+                                  current_user: User = Depends(get_current_user),
+                                  db: Session = Depends(get_db)):
+    """
+    Register a whole fleet in one transaction.
+    Body is CSV (Content-Type: text/csv, header location,gpu_model,gpu_count[,price_per_hour,currency])
+    or a JSON array of {location, gpu_model, gpu_count, price_per_hour?, currency?}.
+    Nodes with a price also get their NodePricing row. Any invalid line rejects the whole upload (422).
+    Uploads over FLEET_MAX_BYTES are rejected (413).
+    The generated node keys are streamed back, one node per line, in upload order.
+    """
+    content_type = request.headers.get("content-type", "")
+    is_csv = "csv" in content_type
+    try:
+        body = await fleet.read_body(request.stream())
+        nodes = await run_in_threadpool(fleet.parse_csv if is_csv else fleet.parse_json_array, body)
+    except fleet.FleetTooLarge as e:
+        raise HTTPException(413, str(e))
+    except fleet.FleetImportError as e:
+        raise HTTPException(422, str(e))
+    if not nodes:
+        raise HTTPException(422, "no nodes in upload")
+
+    created = await run_in_threadpool(fleet.register_nodes, db, current_user.id, nodes)
+    cache_bus.bus.publish("marketplace", "public")
+    fmt = format or ("csv" if is_csv else "ndjson")
+    return StreamingResponse(
+        fleet.stream_keys(created, nodes, fmt),
+        media_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={"X-Nodes-Created": str(len(created))},
+    )
+
+
 @app.post("/node-heartbeat", tags=["GPU"])
 def node_heartbeat(req: NodeHeartbeatRequest, db: Session = Depends(get_db)):
-    node = db.query(GPUNode).filter(GPUNode.id == req.node_id, GPUNode.node_key == req.node_key).first()
-    if not node:
+    # node key from the cache (no SELECT per heartbeat); the node row is updated in place
+    node_key = node_auth_cache.get(req.node_id)
+    if node_key is None:
+        generation = node_auth_cache.generation
+        node_key = db.query(GPUNode.node_key).filter(GPUNode.id == req.node_id).scalar()
+        if node_key:
+            node_auth_cache.set(req.node_id, node_key, generation)
+    if not node_key or not secrets.compare_digest(node_key.encode(), req.node_key.encode()):
+        raise HTTPException(401, "Invalid node credentials")
+
+    now = datetime.utcnow()
+    updated = (
+        db.query(GPUNode)
+        .filter(GPUNode.id == req.node_id)
+        .update({GPUNode.is_online: True, GPUNode.last_heartbeat: now}, synchronize_session=False)
+    )
+    if not updated:  # deleted by another worker before its invalidation reached us
+        db.rollback()
+        node_auth_cache.invalidate(req.node_id)
         raise HTTPException(401, "Invalid node credentials")
-    node.is_online = True
-    node.last_heartbeat = datetime.utcnow()
-    db.add(NodeActivityLog(node_id=node.id, event_type="heartbeat", message="Node heartbeat received"))
+    if write_behind.WRITE_BEHIND_ENABLED:
+        write_behind.writer.submit(NodeActivityLog, {
+            "node_id": req.node_id, "event_type": "heartbeat",
+            "message": "Node heartbeat received", "timestamp": now,
+        })
+    else:
+        db.add(NodeActivityLog(node_id=req.node_id, event_type="heartbeat", message="Node heartbeat received",
+                               timestamp=now))
     db.commit()
-    return {"detail": "heartbeat received", "node_id": node.id}
+    heartbeat_logger.info("heartbeat", extra={"node_id": req.node_id})
+    return {"detail": "heartbeat received", "node_id": req.node_id}
 
 
 @app.get("/node-status/{node_id}", response_model=NodeStatusResponse, tags=["GPU"])
 def node_status(node_id: int,
                 current_user: User = Depends(get_current_user),
-                db: Session = Depends(get_db)):
+                db: Session = Depends(get_read_db)):
     node = db.query(GPUNode).filter(GPUNode.id == node_id, GPUNode.owner_id == current_user.id).first()
     if not node:
         raise HTTPException(404, "GPU node not found")
@@ -270,28 +541,26 @@ def node_status(node_id: int,
 
 # ✅ FIXED — Keep only one “details” endpoint
 @app.get("/gpu-nodes/details", tags=["Public"])
-def get_gpu_nodes_details_public(db: Session = Depends(get_db)):
+def get_gpu_nodes_details_public(db: Session = Depends(get_read_db)):
     """Public: GPU nodes with pricing and last_active (used in Marketplace UI)."""
+    # prices from the pricing cache (one bulk query for misses), last heartbeat log only for
+    # nodes without last_heartbeat (grouped)
     nodes = db.query(GPUNode).all()
+    prices = pricing.resolve_many(db, [n.id for n in nodes])
+    missing = [n.id for n in nodes if not n.last_heartbeat]
+    last_logs = {}
+    if missing:
+        last_logs = dict(
+            db.query(NodeActivityLog.node_id, func.max(NodeActivityLog.timestamp))
+            .filter(NodeActivityLog.node_id.in_(missing), NodeActivityLog.event_type == "heartbeat")
+            .group_by(NodeActivityLog.node_id)
+            .all()
+        )
+
     results = []
     for n in nodes:
-        pricing = db.query(NodePricing).filter(NodePricing.node_id == n.id).first()
-        price_per_hour = float(pricing.price_per_hour) if pricing else None
-        currency = pricing.currency if pricing else "INR"
-
-        last_active = None
-        if n.last_heartbeat:
-            last_active = n.last_heartbeat
-        else:
-            log = (
-                db.query(NodeActivityLog)
-                .filter(NodeActivityLog.node_id == n.id, NodeActivityLog.event_type == "heartbeat")
-                .order_by(NodeActivityLog.timestamp.desc())
-                .first()
-            )
-            if log:
-                last_active = getattr(log, "timestamp", None)
-
+        price = prices[n.id]
+        last_active = n.last_heartbeat or last_logs.get(n.id)
         results.append({
             "id": n.id,
             "owner_id": n.owner_id,
@@ -299,8 +568,9 @@ def get_gpu_nodes_details_public(db: Session = Depends(get_db)):
             "gpu_model": n.gpu_model,
             "gpu_count": n.gpu_count,
             "is_online": n.is_online,
-            "price_per_hour": price_per_hour,
-            "currency": currency,
+            "price_per_hour": price.price_per_hour,  # what submit-job charges (default if unset)
+            "price_is_default": price.is_default,
+            "currency": price.currency,
             "last_active": last_active.isoformat() if last_active else None,
             "node_key": getattr(n, "node_key", None),
         })
@@ -318,25 +588,16 @@ def set_node_pricing(node_id: int, data: NodePricingCreate,
     if not node:
         raise HTTPException(404, "Node not found or not owned by user")
 
-    pricing = db.query(NodePricing).filter(NodePricing.node_id == node_id).first()
-    if pricing:
-        pricing.price_per_hour = data.price_per_hour
-        pricing.currency = data.currency
-        pricing.last_updated = datetime.utcnow()
-    else:
-        pricing = NodePricing(node_id=node_id, price_per_hour=data.price_per_hour, currency=data.currency)
-        db.add(pricing)
-    db.commit()
-    db.refresh(pricing)
-    return pricing
+    return pricing.set_price(db, node_id, data.price_per_hour, data.currency)
 
 
 @app.get("/pricing/{node_id}", response_model=NodePricingOut, tags=["Pricing"])
-def get_node_pricing(node_id: int, db: Session = Depends(get_db)):
-    pricing = db.query(NodePricing).filter(NodePricing.node_id == node_id).first()
-    if not pricing:
+def get_node_pricing(node_id: int, db: Session = Depends(get_read_db)):
+    price = pricing.resolve(db, node_id)
+    if price is None or price.is_default:
         raise HTTPException(404, "Pricing not set for this node")
-    return pricing
+    return {"id": price.pricing_id, "node_id": node_id, "price_per_hour": price.price_per_hour,
+            "currency": price.currency, "last_updated": price.last_updated}
 
 
 # ---------- Jobs ----------
@@ -346,9 +607,8 @@ def submit_job(job: JobCreate, current_user: User = Depends(get_current_user), d
     if not node:
         raise HTTPException(403, "Invalid node credentials")
 
-    # ✅ Get pricing (if not set, default ₹10/hr)
-    pricing = db.query(NodePricing).filter(NodePricing.node_id == node.id).first()
-    price_per_hour = pricing.price_per_hour if pricing else 10.0
+    # ✅ Get pricing (pricing.py: node price, else DEFAULT_PRICE_PER_HOUR)
+    price_per_hour = pricing.resolve(db, node.id).price_per_hour
 
     # ✅ Check user balance
     if (current_user.wallet_balance or 0) < price_per_hour:
@@ -366,37 +626,168 @@ def submit_job(job: JobCreate, current_user: User = Depends(get_current_user), d
     )
     db.add(tx)
 
-    # ✅ Create job
+    # ✅ Create job: queued for the fair-share scheduler, which starts it once the node has a free GPU
+    queued = scheduler.SCHEDULER_ENABLED
     new_job = Job(
         user_id=current_user.id,
         node_id=node.id,
         command=job.command,
-        status="running",
-        result=f"Job '{job.command}' is running."
+        status="pending" if queued else "running",
+        result=f"Job '{job.command}' is queued." if queued else f"Job '{job.command}' is running."
     )
+    if not queued:
+        new_job.start_time = datetime.utcnow()
     db.add(new_job)
+    db.flush()
+    job_id, node_id, user_id, gpu_count = new_job.id, node.id, current_user.id, node.gpu_count
     db.commit()
+    if queued:
+        scheduler.submit(db, job_id, node_id, user_id, gpu_count)
     db.refresh(new_job)
 
     return new_job
 
 
+@app.post("/submit-job/dag", response_model=JobDAGOut, tags=["Jobs"])
+def submit_job_dag(dag: JobDAGCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Submit a pipeline: steps with depends_on edges (names of other steps), all on one node.
+    Each step is a job billed like /submit-job. Steps without dependencies are queued now; the others
+    wait and are queued as soon as all their upstream jobs complete (job_dag.py).
+    """
+    try:
+        order = job_dag.topological_order(dag.steps)
+    except job_dag.DAGError as e:
+        raise HTTPException(422, str(e))
+
+    node = db.query(GPUNode).filter(GPUNode.id == dag.node_id, GPUNode.node_key == dag.node_key).first()
+    if not node:
+        raise HTTPException(403, "Invalid node credentials")
+
+    price_per_hour = pricing.resolve(db, node.id).price_per_hour
+    if (current_user.wallet_balance or 0) < price_per_hour * len(order):
+        raise HTTPException(400, "Insufficient wallet balance")
+    current_user.wallet_balance -= price_per_hour * len(order)
+
+    # one debit per job like /submit-job, in a single executemany (no ids needed back)
+    db.execute(insert(WalletTransaction), [
+        {"user_id": current_user.id, "type": "debit", "amount": price_per_hour,
+         "description": f"Job submitted on node {node.gpu_model}"}
+        for _ in order])
+
+    queued = scheduler.SCHEDULER_ENABLED
+    now = datetime.utcnow()
+    jobs = {}
+    for i in order:
+        step = dag.steps[i]
+        if step.depends_on:
+            status, result = "waiting", f"Job '{step.command}' is waiting for {', '.join(step.depends_on)}."
+        elif queued:
+            status, result = "pending", f"Job '{step.command}' is queued."
+        else:
+            status, result = "running", f"Job '{step.command}' is running."
+        jobs[step.name] = Job(user_id=current_user.id, node_id=node.id, command=step.command, status=status,
+                              result=result, start_time=now if status == "running" else None)
+    db.add_all(jobs.values())
+    db.flush()
+
+    job_ids = {name: job.id for name, job in jobs.items()}
+    upstream = {job_ids[step.name]: [job_ids[p] for p in dict.fromkeys(step.depends_on)]
+                for step in dag.steps if step.depends_on}
+    db.add_all(JobDependency(job_id=job_id, depends_on_id=parent)
+               for job_id, parents in upstream.items() for parent in parents)
+    roots = [job_ids[dag.steps[i].name] for i in order if not dag.steps[i].depends_on]
+    node_id, user_id, gpu_count = node.id, current_user.id, node.gpu_count
+    db.commit()
+
+    for job_id, parents in upstream.items():
+        job_dag.tracker.add(job_id, parents)
+    if queued:
+        for job_id in roots:
+            scheduler.scheduler.enqueue(node_id, user_id, job_id)
+        scheduler.dispatch(db, node_id, gpu_count)
+    db.query(Job).filter(Job.id.in_(job_ids.values())).populate_existing().all()  # one refresh for all steps
+    return {"jobs": list(jobs.values()), "job_ids": job_ids}
+
+
+JOB_STATUS_BATCH_MAX = int(os.getenv("JOB_STATUS_BATCH_MAX", 500))
+# the next changed_since cursor lags the query time, so rows stamped just before a slow
+# commit are sent again instead of being missed (clients dedupe on id + updated_at)
+JOB_STATUS_POLL_OVERLAP_SECONDS = float(os.getenv("JOB_STATUS_POLL_OVERLAP_SECONDS", 2))
+
+
+@app.get("/job-status", response_model=JobStatusBatchOut, tags=["Jobs"])
+def job_status_batch(ids: Optional[List[int]] = Query(None, description="job ids (?ids=1&ids=2...)"),
+                     changed_since: Optional[datetime] = Query(None, description="only jobs updated after this"),
+                     include_archived: bool = Query(False, description="also look up ids in the job archive"),
+                     current_user: User = Depends(get_current_user),
+                     db: Session = Depends(get_read_db)):
+    """
+    Status of many jobs in one call: by ids, by updated_at > changed_since (delta polling),
+    or both. One IN query scoped to the caller's jobs; ids that are not the caller's are
+    reported in missing_ids like unknown ones.
+    """
+    if not ids and changed_since is None:
+        raise HTTPException(422, "pass ids and/or changed_since")
+    ids = list(dict.fromkeys(ids or ()))
+    if len(ids) > JOB_STATUS_BATCH_MAX:
+        raise HTTPException(422, f"at most {JOB_STATUS_BATCH_MAX} ids per call")
+    if changed_since is not None and changed_since.tzinfo is not None:
+        changed_since = changed_since.astimezone(timezone.utc).replace(tzinfo=None)  # stored as naive UTC
+
+    cursor = datetime.utcnow() - timedelta(seconds=JOB_STATUS_POLL_OVERLAP_SECONDS)
+    fast = fast_json.FAST_LIST_JSON
+    query = db.query(*JOB_ROWS.columns) if fast else db.query(Job)
+    query = query.filter(Job.user_id == current_user.id)
+    if ids:
+        query = query.filter(Job.id.in_(ids))
+    if changed_since is not None:
+        query = query.filter(Job.updated_at > changed_since)
+    if ids:
+        # sorted here: ORDER BY updated_at would make the planner walk the user's whole
+        # (user_id, updated_at) index instead of looking the ids up by primary key
+        jobs = sorted(query.all(), key=lambda j: (j.updated_at, j.id))
+    else:
+        jobs = query.order_by(Job.updated_at, Job.id).all()
+
+    missing = set(ids) - {j.id for j in jobs}
+    if missing and include_archived and changed_since is None:
+        archived_query = db.query(*ARCHIVED_JOB_ROWS.columns) if fast else db.query(JobArchive)
+        archived = archived_query.filter(JobArchive.user_id == current_user.id, JobArchive.id.in_(missing)).all()
+        jobs += archived
+        missing -= {j.id for j in archived}
+
+    if fast:
+        body = {"jobs": JOB_ROWS.dicts(jobs), "missing_ids": sorted(missing), "cursor": cursor}
+        return Response(content=fast_json.to_json(body), media_type="application/json")
+    return {"jobs": jobs, "missing_ids": sorted(missing), "cursor": cursor}
+
+
 @app.get("/job-status/{job_id}", response_model=JobResponse, tags=["Jobs"])
-def job_status(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def job_status(job_id: int,
+               include_archived: bool = Query(False, description="also look in the job archive"),
+               current_user: User = Depends(get_current_user),
+               db: Session = Depends(get_read_db)):
     job = db.query(Job).filter(Job.id == job_id, Job.user_id == current_user.id).first()
+    if not job and include_archived:
+        job = archive.get_job(db, job_id, current_user.id)
     if not job:
         raise HTTPException(404, "Job not found")
     return job
 
 
 @app.post("/job/complete", response_model=JobResponse, tags=["Jobs"])
-def mark_job_complete(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def mark_job_complete(job_id: int, background_tasks: BackgroundTasks,
+                      db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     job = db.query(Job).filter(Job.id == job_id, Job.user_id == current_user.id).first()
     if not job:
         raise HTTPException(404, "Job not found")
 
+    now = datetime.utcnow()
     job.status = "completed"
-    job.result = f"✅ Job '{job.command}' marked completed successfully."
+    if job.result_size is None:  # keep a result uploaded with PUT /job-result
+        job.result = f"✅ Job '{job.command}' marked completed successfully."
+    job.end_time = job.updated_at = now
 
     # ✅ Auto Earnings Logic (safe addition) - using top-level imports (no duplicate import)
     earning_amount = 5.0  # fixed per job (testing)
@@ -424,8 +815,14 @@ def mark_job_complete(job_id: int, db: Session = Depends(get_db), current_user:
             )
             db.add(tx)
 
+    node_id, gpu_count = job.node_id, node.gpu_count if node else None
     db.commit()
+    job_dag.on_complete(db, job_id)  # queue downstream pipeline steps that were only waiting for this job
+    if node_id and gpu_count:
+        scheduler.dispatch(db, node_id, gpu_count)  # the job's GPU is free: start the next queued one
     db.refresh(job)
+    if log_store.LOG_STORAGE_MODE == "chunked":
+        background_tasks.add_task(log_store.compact_job_logs_task, job.id)
     return job
 
 # Add this under your Jobs section in main.py (below other job endpoints)
@@ -434,7 +831,8 @@ from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
 @app.post("/simulate-job-complete/{job_id}", response_model=JobResponse, tags=["Jobs"])
-def simulate_job_complete(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def simulate_job_complete(job_id: int, background_tasks: BackgroundTasks,
+                          db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     """
     Testing endpoint (protected): mark job complete and credit node owner.
     Idempotent: if job already completed, just returns the job.
@@ -460,18 +858,20 @@ def simulate_job_complete(job_id: int, db: Session = Depends(get_db), current_us
         return job
 
     # Determine payout amount: from pricing or fallback
-    pricing = db.query(NodePricing).filter(NodePricing.node_id == node.id).first()
-    price_per_hour = float(pricing.price_per_hour) if pricing and pricing.price_per_hour is not None else 10.0
+    price = pricing.resolve(db, node.id)
+    price_per_hour = price.price_per_hour
 
     # Wrap modifications in transaction for safety
     try:
         # Start transaction block
         # Deduct at submission is already handled in submit_job. Here we only credit owner and record earning & tx.
         job.status = "completed"
-        job.result = f"✅ Job '{job.command}' marked completed by simulate endpoint."
+        if job.result_size is None:
+            job.result = f"✅ Job '{job.command}' marked completed by simulate endpoint."
+        job.end_time = job.updated_at = datetime.utcnow()
 
         # Create earning record
-        earning = NodeEarning(node_id=node.id, amount=price_per_hour, currency=(pricing.currency if pricing else "INR"))
+        earning = NodeEarning(node_id=node.id, amount=price_per_hour, currency=price.currency)
         db.add(earning)
 
         # Credit owner wallet
@@ -492,8 +892,13 @@ def simulate_job_complete(job_id: int, db: Session = Depends(get_db), current_us
         # Optional: add NodeActivityLog
         db.add(NodeActivityLog(node_id=node.id, event_type="job_completed", message=f"Job {job.id} completed."))
 
+        node_id, gpu_count = node.id, node.gpu_count
         db.commit()
+        job_dag.on_complete(db, job_id)
+        scheduler.dispatch(db, node_id, gpu_count)
         db.refresh(job)
+        if log_store.LOG_STORAGE_MODE == "chunked":
+            background_tasks.add_task(log_store.compact_job_logs_task, job.id)
         return job
     except SQLAlchemyError as e:
         db.rollback()
@@ -501,14 +906,94 @@ def simulate_job_complete(job_id: int, db: Session = Depends(get_db), current_us
     from typing import List
 
 @app.get("/user-jobs", response_model=List[JobResponse], tags=["Jobs"])
-def get_user_jobs(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_user_jobs(request: Request, response: Response,
+                  include_archived: bool = Query(False, description="also list archived jobs"),
+                  current_user: User = Depends(get_current_user),
+                  db: Session = Depends(get_read_db)):
     """
     Return all jobs submitted by the currently logged-in user.
+    Conditional: If-None-Match with the last ETag -> 304 without loading the jobs.
     """
+    etag = etags.make_etag(request, current_user.id, etags.jobs_version(db, current_user.id, include_archived))
+    unchanged = etags.not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    if fast_json.FAST_LIST_JSON:
+        jobs = db.query(*JOB_ROWS.columns).filter(Job.user_id == current_user.id).order_by(Job.id.desc()).all()
+        if include_archived:
+            archived = db.query(*ARCHIVED_JOB_ROWS.columns).filter(JobArchive.user_id == current_user.id).all()
+            jobs = sorted(jobs + archived, key=lambda j: j.id, reverse=True)
+        return JOB_ROWS.response(jobs, headers=etags.headers(etag))
     jobs = db.query(Job).filter(Job.user_id == current_user.id).order_by(Job.id.desc()).all()
+    if include_archived:
+        archived = db.query(JobArchive).filter(JobArchive.user_id == current_user.id).all()
+        jobs = sorted(jobs + archived, key=lambda j: j.id, reverse=True)
+    response.headers.update(etags.headers(etag))
     return jobs
 
 
+def _blob_response(sha: str, size: Optional[int] = None, media_type: str = "text/plain; charset=utf-8"):
+    """
+    Stream a stored blob: raw blobs as files (sendfile), compressed ones decompressed chunk by chunk.
+    size (the raw size recorded by the server) becomes the Content-Length of a compressed blob;
+    without it the response is sent chunked.
+    """
+    found = blob_store.locate(sha)
+    if found is None:
+        raise HTTPException(404, "Content is missing from the blob store")
+    path, codec = found
+    headers = {"X-Content-SHA256": sha}
+    if codec == "none":
+        return FileResponse(path, media_type=media_type, headers=headers)
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return StreamingResponse(blob_store.iter_blob(sha), media_type=media_type, headers=headers)
+
+
+def _save_job_result(db: Session, job_id: int, inline: Optional[str], sha: Optional[str], size: int) -> Job:
+    db.query(Job).filter(Job.id == job_id).update(
+        {Job.result: inline, Job.result_blob: sha, Job.result_size: size, Job.updated_at: datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+    return db.get(Job, job_id)
+
+
+@app.put("/job-result/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def upload_job_result(job_id: int, request: Request,
+                            current_user: User = Depends(get_current_user),
+                            db: Session = Depends(get_db)):
+    """
+    Store a job's result (raw request body, streamed; submitter or node owner).
+    Results over BLOB_INLINE_MAX bytes go to the blob store and the job row keeps only
+    their address and size; GET /job-result/{job_id} returns the content.
+    """
+    await run_in_threadpool(_check_job_log_access, job_id, current_user, db)
+    try:
+        inline, sha, size = await blob_store.receive(request.stream())
+    except blob_store.BlobTooLarge as e:
+        raise HTTPException(413, str(e))
+    return await run_in_threadpool(_save_job_result, db, job_id, inline, sha, size)
+
+
+@app.get("/job-result/{job_id}", tags=["Jobs"])
+def download_job_result(job_id: int,
+                        include_archived: bool = Query(False, description="also look in the job archive"),
+                        current_user: User = Depends(get_current_user),
+                        db: Session = Depends(get_read_db)):
+    """Full result of a job as text/plain, streamed from the blob store when it was offloaded."""
+    archived = _check_job_log_access(job_id, current_user, db, include_archived)
+    model = JobArchive if archived else Job
+    result, sha, size = (
+        db.query(model.result, model.result_blob, model.result_size).filter(model.id == job_id).one()
+    )
+    if sha is not None:
+        return _blob_response(sha, size)
+    if result is None:
+        raise HTTPException(404, "Job has no result")
+    return PlainTextResponse(result)
+
+
 # ---------- Wallet ----------
 @app.post("/wallet/topup", response_model=WalletBalanceOut, tags=["Wallet"])
 def wallet_topup(data: WalletTopupRequest,  
@@ -547,7 +1032,21 @@ def get_wallet_balance(current_user: User = Depends(get_current_user)):
 
 
 @app.get("/wallet/transactions", response_model=List[WalletTransactionOut], tags=["Wallet"])
-def get_wallet_transactions(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_wallet_transactions(request: Request, response: Response,
+                            current_user: User = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    etag = etags.make_etag(request, current_user.id, etags.wallet_version(db, current_user.id))
+    unchanged = etags.not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    if fast_json.FAST_LIST_JSON:
+        return WALLET_TX_ROWS.response(
+            db.query(*WALLET_TX_ROWS.columns)
+            .filter(WalletTransaction.user_id == current_user.id)
+            .order_by(WalletTransaction.timestamp.desc())
+            .all(),
+            headers=etags.headers(etag),
+        )
+    response.headers.update(etags.headers(etag))
     return (
         db.query(WalletTransaction)
         .filter(WalletTransaction.user_id == current_user.id)
@@ -557,11 +1056,79 @@ def get_wallet_transactions(current_user: User = Depends(get_current_user), db:
 
 
 # ---------- Earnings ----------
+# NOTE: declared before /earnings/{node_id} so "dashboard" is not parsed as a node id
+@app.get("/earnings/dashboard", response_model=OwnerEarningsDashboard, tags=["Earnings"])
+def get_owner_earnings_dashboard(
+    sort: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Earnings dashboard for every node of the current user.
+    Uses two grouped queries regardless of node count (replaces N calls to /earnings/dashboard/{node_id}).
+    """
+    total_expr = func.coalesce(func.sum(NodeEarning.amount), 0.0)
+    order = total_expr.asc() if sort == "asc" else total_expr.desc()
+
+    rows = (
+        db.query(
+            GPUNode.id,
+            total_expr.label("total_earnings"),
+            func.count(NodeEarning.id).label("total_jobs"),
+            func.max(NodeEarning.currency).label("currency"),
+            func.max(NodeEarning.timestamp).label("last_payout"),
+        )
+        .outerjoin(NodeEarning, NodeEarning.node_id == GPUNode.id)
+        .filter(GPUNode.owner_id == current_user.id)
+        .group_by(GPUNode.id)
+        .order_by(order, GPUNode.id)
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
+
+    total_nodes, grand_total = (
+        db.query(
+            func.count(func.distinct(GPUNode.id)),
+            func.coalesce(func.sum(NodeEarning.amount), 0.0),
+        )
+        .outerjoin(NodeEarning, NodeEarning.node_id == GPUNode.id)
+        .filter(GPUNode.owner_id == current_user.id)
+        .one()
+    )
+
+    return {
+        "owner_id": current_user.id,
+        "total_nodes": total_nodes,
+        "total_earnings": float(round(grand_total, 8)),
+        "limit": limit,
+        "offset": offset,
+        "nodes": [
+            {
+                "node_id": r.id,
+                "total_earnings": float(round(r.total_earnings, 8)),
+                "currency": r.currency or "INR",
+                "total_jobs": r.total_jobs,
+                "last_payout": r.last_payout,
+            }
+            for r in rows
+        ],
+    }
+
+
 @app.get("/earnings/{node_id}", response_model=List[NodeEarningOut], tags=["Earnings"])
-def get_node_earnings(node_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    node = db.query(GPUNode).filter(GPUNode.id == node_id, GPUNode.owner_id == current_user.id).first()
-    if not node:
+def get_node_earnings(node_id: int, request: Request, response: Response,
+                      current_user: User = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    owned = db.query(GPUNode.id).filter(GPUNode.id == node_id, GPUNode.owner_id == current_user.id).first()
+    if not owned:
         raise HTTPException(404, "Node not found or not owned by user")
+    etag = etags.make_etag(request, current_user.id, etags.earnings_version(db, node_id))
+    unchanged = etags.not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers.update(etags.headers(etag))
     return (
         db.query(NodeEarning)
         .filter(NodeEarning.node_id == node_id)
@@ -571,7 +1138,7 @@ def get_node_earnings(node_id: int, current_user: User = Depends(get_current_use
 
 
 @app.get("/earnings/dashboard/{node_id}", response_model=NodeEarningsDashboard, tags=["Earnings"])
-def get_earnings_dashboard(node_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_earnings_dashboard(node_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_read_db)):
     node = db.query(GPUNode).filter(GPUNode.id == node_id, GPUNode.owner_id == current_user.id).first()
     if not node:
         raise HTTPException(404, "Node not found or not owned by user")
@@ -596,29 +1163,232 @@ def get_earnings_dashboard(node_id: int, current_user: User = Depends(get_curren
 
 
 # ---------- GPU Execution Logs ----------
-@app.post("/gpu-exec/log", response_model=GPUExecutionLogOut, tags=["GPUExec"])
-def post_gpu_execution_log(payload: GPUExecutionLogCreate, db: Session = Depends(get_db)):
+@app.post("/gpu-exec/log", response_model=Union[GPUExecutionLogOut, WriteQueuedOut], tags=["GPUExec"])
+def post_gpu_execution_log(payload: GPUExecutionLogCreate, response: Response, db: Session = Depends(get_db)):
     job = db.query(Job).filter(Job.id == payload.job_id).first()
     if not job:
         raise HTTPException(404, "Job not found")
-    log = GPUExecutionLog(job_id=payload.job_id, log_type=payload.log_type, details=payload.details)
+    if write_behind.WRITE_BEHIND_ENABLED:
+        # no id yet: the line is committed by the background writer
+        write_behind.writer.submit(GPUExecutionLog, {
+            "job_id": payload.job_id, "log_type": payload.log_type,
+            "details": blob_store.offload_text(payload.details), "timestamp": datetime.utcnow(),
+        })
+        response.status_code = 202
+        return {"detail": "queued", "queue_depth": write_behind.writer.depth}
+    log = GPUExecutionLog(job_id=payload.job_id, log_type=payload.log_type,
+                          details=blob_store.offload_text(payload.details))
     db.add(log)
     db.commit()
     db.refresh(log)
+    log_tail.hub.publish([log_tail.log_to_dict(log)])
     return log
 
 
-@app.get("/gpu-exec/logs/{job_id}", response_model=List[GPUExecutionLogOut], tags=["GPUExec"])
-def get_gpu_execution_logs(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+@app.post("/gpu-exec/logs/bulk", response_model=GPUExecutionLogBulkOut, tags=["GPUExec"])
+async def post_gpu_execution_logs_bulk(request: Request, db: Session = Depends(get_db)):
+    """
+    Batch log ingestion for one or more jobs.
+    Body is either a JSON array of GPUExecutionLogCreate (at most LOG_INGEST_MAX_BYTES), or NDJSON
+    (Content-Type: application/x-ndjson) which is parsed while streaming. Every batch is one bulk insert + one commit;
+    lines for unknown jobs are skipped and reported in missing_job_ids.
+    """
+    known_job_ids = set()
+    missing_job_ids = set()
+    inserted = rejected = batches = 0
+
+    async def _flush(entries):
+        nonlocal inserted, rejected, batches
+        rows, missing = await run_in_threadpool(log_ingest.write_log_batch, db, entries, known_job_ids)
+        log_tail.hub.publish([log_tail.log_to_dict(r) for r in rows])
+        inserted += len(rows)
+        rejected += len(entries) - len(rows)
+        missing_job_ids.update(missing)
+        batches += 1
+
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            async for batch in log_ingest.iter_ndjson_batches(request.stream()):
+                await _flush(batch)
+        else:
+            body = await log_ingest.read_body(request.stream())
+            entries = await run_in_threadpool(log_ingest.parse_json_array, body)
+            size = log_ingest.LOG_INGEST_BATCH_SIZE
+            for i in range(0, len(entries), size):
+                await _flush(entries[i:i + size])
+    except log_ingest.LogIngestError as e:
+        # batches flushed before the bad line stay committed
+        raise HTTPException(422, f"{e} (inserted {inserted} entries before the error)")
+    except log_ingest.LogIngestTooLarge as e:
+        raise HTTPException(413, f"{e} (inserted {inserted} entries before the error)")
+
+    return {
+        "inserted": inserted,
+        "rejected": rejected,
+        "batches": batches,
+        "missing_job_ids": sorted(missing_job_ids),
+    }
+
+
+def _check_job_log_access(job_id: int, current_user: User, db: Session, include_archived: bool = False) -> bool:
+    """Raises 404/403; returns True when the job was found in the archive."""
+    # one query: job submitter + node owner
+    row = (
+        db.query(Job.user_id, GPUNode.owner_id)
+        .outerjoin(GPUNode, GPUNode.id == Job.node_id)
+        .filter(Job.id == job_id)
+        .first()
+    )
+    archived = False
+    if not row and include_archived:
+        row = archive.job_access(db, job_id)
+        archived = row is not None
+    if not row:
         raise HTTPException(404, "Job not found")
-    node = db.query(GPUNode).filter(GPUNode.id == job.node_id).first()
-    if not node:
+    job_user_id, node_owner_id = row
+    if node_owner_id is None:
         raise HTTPException(404, "Node not found")
-    if job.user_id != current_user.id and node.owner_id != current_user.id:
+    if job_user_id != current_user.id and node_owner_id != current_user.id:
         raise HTTPException(403, "Not authorized")
-    return db.query(GPUExecutionLog).filter(GPUExecutionLog.job_id == job_id).all()
+    return archived
+
+
+def _read_logs_since(job_id: int, since_id: int, limit: int, use_ring: bool = True) -> List[dict]:
+    """
+    Tail read: ring buffer first, database only when the ring does not hold every committed
+    line after the cursor. use_ring=False forces a database read.
+    """
+    if use_ring and log_tail.LOG_TAIL_SINGLE_WRITER:
+        lines = log_tail.hub.read_since(job_id, since_id, limit)
+        if lines is not None:
+            return lines
+    db = new_read_session()
+    try:
+        if use_ring and not log_tail.LOG_TAIL_SINGLE_WRITER:
+            # ids only (covered by ix_gpu_execution_logs_job_id_id): is anything missing from the ring?
+            committed = [r[0] for r in db.query(GPUExecutionLog.id)
+                         .filter(GPUExecutionLog.job_id == job_id, GPUExecutionLog.id > since_id)
+                         .order_by(GPUExecutionLog.id).limit(limit).all()]
+            lines = log_tail.hub.read_since(job_id, since_id, limit, committed)
+            if lines is not None:
+                return lines
+        return [
+            log_tail.log_to_dict(r) if not isinstance(r, dict) else r
+            for r in log_store.read_job_logs(db, job_id, from_id=since_id + 1, limit=limit)
+        ]
+    finally:
+        db.close()
+
+
+def _log_id(line) -> int:
+    return line["id"] if isinstance(line, dict) else line.id
+
+
+@app.get("/gpu-exec/logs/{job_id}", response_model=List[GPUExecutionLogOut], tags=["GPUExec"])
+def get_gpu_execution_logs(job_id: int,
+                           response: Response,
+                           from_id: Optional[int] = Query(None, description="first log id (inclusive)"),
+                           to_id: Optional[int] = Query(None, description="last log id (inclusive)"),
+                           since_id: Optional[int] = Query(None, description="cursor: only lines with id > since_id"),
+                           limit: Optional[int] = Query(None, ge=1, le=100000),
+                           include_archived: bool = Query(False, description="serve archived jobs too"),
+                           current_user: User = Depends(get_current_user),
+                           db: Session = Depends(get_read_db)):
+    archived = _check_job_log_access(job_id, current_user, db, include_archived)
+    if since_id is not None:
+        from_id = max(from_id or 0, since_id + 1)
+    if archived:
+        logs = archive.read_job_logs(db, job_id, from_id=from_id, to_id=to_id, limit=limit)
+    else:
+        # compressed chunks (only the ones covering the range) + uncompacted tail rows
+        logs = log_store.read_job_logs(db, job_id, from_id=from_id, to_id=to_id, limit=limit)
+    # cursor for the next call (?since_id=...)
+    cursor = str(_log_id(logs[-1]) if logs else (since_id or 0))
+    if fast_json.FAST_LIST_JSON:
+        return EXEC_LOG_ROWS.response(logs, headers={"X-Log-Cursor": cursor})
+    response.headers["X-Log-Cursor"] = cursor
+    return logs
+
+
+@app.get("/gpu-exec/logs/{job_id}/follow", response_model=GPUExecutionLogFollowOut, tags=["GPUExec"])
+async def follow_gpu_execution_logs(job_id: int,
+                                    since_id: int = Query(0, ge=0),
+                                    timeout: float = Query(25.0, ge=0, le=60),
+                                    limit: int = Query(1000, ge=1, le=10000),
+                                    current_user: User = Depends(get_current_user),
+                                    db: Session = Depends(get_read_db)):
+    """
+    Long-poll tail: returns immediately if there are lines after since_id, otherwise
+    waits up to `timeout` seconds for the next ingested line. Pass the returned cursor
+    as since_id of the next call.
+    """
+    await run_in_threadpool(_check_job_log_access, job_id, current_user, db)
+    lines = await run_in_threadpool(_read_logs_since, job_id, since_id, limit)
+    if not lines and timeout > 0:
+        woken = await log_tail.hub.wait(job_id, timeout, since_id)
+        # on timeout check the database once, lines may have been ingested by another worker
+        lines = await run_in_threadpool(_read_logs_since, job_id, since_id, limit, woken)
+    return {"lines": lines, "cursor": lines[-1]["id"] if lines else since_id}
+
+
+@app.get("/gpu-exec/logs/{job_id}/stream", tags=["GPUExec"])
+async def stream_gpu_execution_logs(job_id: int,
+                                    request: Request,
+                                    since_id: Optional[int] = Query(None, ge=0),
+                                    current_user: User = Depends(get_current_user),
+                                    db: Session = Depends(get_read_db)):
+    """
+    Server-Sent Events tail. Every log line is one event (id = log id, data = JSON line).
+    Reconnecting clients resume from the Last-Event-ID header.
+    """
+    await run_in_threadpool(_check_job_log_access, job_id, current_user, db)
+    cursor = since_id
+    if cursor is None:
+        cursor = int(request.headers.get("last-event-id") or 0)
+
+    async def _events():
+        nonlocal cursor
+        use_ring = False
+        while not await request.is_disconnected():
+            lines = await run_in_threadpool(_read_logs_since, job_id, cursor, 1000, use_ring)
+            for line in lines:
+                data = GPUExecutionLogOut.model_validate(line).model_dump_json()
+                yield f"id: {line['id']}\nevent: log\ndata: {data}\n\n"
+                cursor = line["id"]
+            if lines:
+                use_ring = True
+                continue
+            # woken -> new line is in the ring; timeout -> keep-alive + database check (other workers)
+            use_ring = await log_tail.hub.wait(job_id, LOG_STREAM_KEEPALIVE_SECONDS, cursor)
+            if not use_ring:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/gpu-exec/logs/{job_id}/details/{log_id}", tags=["GPUExec"])
+def get_gpu_execution_log_details(job_id: int, log_id: int,
+                                  include_archived: bool = Query(False, description="serve archived jobs too"),
+                                  current_user: User = Depends(get_current_user),
+                                  db: Session = Depends(get_read_db)):
+    """Full details of one log line; lines over BLOB_INLINE_MAX bytes are listed as "blob:sha256:<hex>:<size>"."""
+    archived = _check_job_log_access(job_id, current_user, db, include_archived)
+    reader = archive.read_job_logs if archived else log_store.read_job_logs
+    lines = reader(db, job_id, from_id=log_id, to_id=log_id, limit=1)
+    if not lines:
+        raise HTTPException(404, "Log line not found")
+    line = lines[0]
+    details = line["details"] if isinstance(line, dict) else line.details
+    ref = blob_store.parse_ref(details)
+    if ref is not None:
+        # the size in the reference is not trusted (rows ingested before references were escaped)
+        return _blob_response(ref[0])
+    return PlainTextResponse(details or "")
 
 
 # =====================================================
@@ -0,0 +1,184 @@
+# migrate.py
+# Brings an existing database up to the index set declared in models.py.
+# create_all() only creates missing tables, so indexes (and nullable columns) added
+# to tables that already exist have to be created here. Also copies NodePricing prices into the
+# legacy gpu_nodes.price_per_hour column where the two disagree. Safe to run repeatedly.
+# SQLite tables declared with sqlite_autoincrement but created before that (AUTOINCREMENT
+# can not be added in place) are rebuilt: create, copy, drop, rename, re-index.
+#   python migrate.py             # apply
+#   python migrate.py --dry-run   # only list what is missing
+#
+# PostgreSQL: indexes are built with CREATE INDEX CONCURRENTLY (no write lock on
+# big tables). SQLite: plain CREATE INDEX inside the writer connection. New columns
+# must be nullable (ALTER TABLE ADD COLUMN without a rewrite on both databases).
+
+import argparse
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+
+from database import Base, engine
+
+logger = logging.getLogger("indicompute.migrate")
+
+
+def _dedupe_node_pricing(conn):
+    """Keep the first (lowest id) pricing row per node: the one .first() has been returning."""
+    result = conn.execute(text(
+        "DELETE FROM node_pricing WHERE node_id IS NOT NULL AND id NOT IN "
+        "(SELECT MIN(id) FROM node_pricing WHERE node_id IS NOT NULL GROUP BY node_id)"
+    ))
+    return result.rowcount or 0
+
+
+def sync_node_prices(conn):
+    """GPUNode.price_per_hour := NodePricing.price_per_hour where they disagree (pricing.py resolves from NodePricing)."""
+    result = conn.execute(text(
+        "UPDATE gpu_nodes SET price_per_hour = "
+        "(SELECT p.price_per_hour FROM node_pricing p WHERE p.node_id = gpu_nodes.id) "
+        "WHERE EXISTS (SELECT 1 FROM node_pricing p WHERE p.node_id = gpu_nodes.id "
+        "AND (gpu_nodes.price_per_hour IS NULL OR p.price_per_hour <> gpu_nodes.price_per_hour))"
+    ))
+    return result.rowcount or 0
+
+
+def missing_columns():
+    """[(table name, Column)] declared in models.py but not present in the database."""
+    import models  # noqa: F401
+
+    insp = inspect(engine)
+    existing_tables = set(insp.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {c["name"] for c in insp.get_columns(table.name)}
+        missing.extend((table.name, c) for c in table.columns if c.name not in present)
+    return missing
+
+
+def add_columns(dry_run: bool = False):
+    missing = missing_columns()
+    for table_name, column in missing:
+        if not column.nullable:
+            raise RuntimeError(f"{table_name}.{column.name} is NOT NULL: needs a hand-written migration")
+        print(f"{'would add' if dry_run else 'adding'} column {table_name}.{column.name}")
+    if missing and not dry_run:
+        with engine.begin() as conn:
+            for table_name, column in missing:
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN "{column.name}" {col_type}'))
+    return missing
+
+
+def missing_autoincrement():
+    """SQLite tables declared with sqlite_autoincrement whose stored definition has no AUTOINCREMENT."""
+    import models  # noqa: F401
+
+    if engine.dialect.name != "sqlite":
+        return []
+    with engine.connect() as conn:
+        stored = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'table'")).all())
+    return [table for table in Base.metadata.sorted_tables
+            if table.dialect_options["sqlite"].get("autoincrement")
+            and table.name in stored and "AUTOINCREMENT" not in stored[table.name].upper()]
+
+
+# high-water marks: ids of deleted rows that must not be handed out again
+_ID_HIGH_WATER = {
+    "gpu_execution_logs": "SELECT max(last_log_id) FROM gpu_execution_log_chunks",
+}
+
+
+def rebuild_autoincrement(dry_run: bool = False):
+    tables = missing_autoincrement()
+    for table in tables:
+        print(f"{'would rebuild' if dry_run else 'rebuilding'} {table.name} with AUTOINCREMENT")
+    if dry_run:
+        return tables
+    for table in tables:
+        tmp = f"{table.name}__rebuild"
+        create = str(CreateTable(table).compile(dialect=engine.dialect)).strip()
+        create = create.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {tmp} ", 1)
+        cols = ", ".join(f'"{c.name}"' for c in table.columns)
+        with engine.begin() as conn:
+            conn.execute(text(create))
+            conn.execute(text(f"INSERT INTO {tmp} ({cols}) SELECT {cols} FROM {table.name}"))
+            conn.execute(text(f"DROP TABLE {table.name}"))
+            conn.execute(text(f"ALTER TABLE {tmp} RENAME TO {table.name}"))
+            for index in table.indexes:
+                index.create(conn)
+            # the copy set the sequence to max(id); deleted rows (compacted) may have had higher ids
+            high_water = _ID_HIGH_WATER.get(table.name)
+            seq = conn.execute(text(f"SELECT seq FROM sqlite_sequence WHERE name = '{table.name}'")).scalar()
+            top = conn.execute(text(high_water)).scalar() if high_water else None
+            if top is not None and (seq is None or top > seq):
+                if seq is None:
+                    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                                 {"name": table.name, "seq": top})
+                else:
+                    conn.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name"),
+                                 {"name": table.name, "seq": top})
+    return tables
+
+
+def missing_indexes():
+    """[(table name, Index)] declared in models.py but not present in the database."""
+    import models  # noqa: F401
+
+    insp = inspect(engine)
+    existing_tables = set(insp.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue  # create_all (init_db) creates it together with its indexes
+        present = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in present:
+                missing.append((table.name, index))
+    return missing
+
+
+def apply(dry_run: bool = False):
+    add_columns(dry_run)
+    rebuild_autoincrement(dry_run)
+    missing = missing_indexes()
+    for table_name, index in missing:
+        cols = ", ".join(c.name for c in index.columns)
+        logger.info("missing index %s on %s(%s)", index.name, table_name, cols)
+        print(f"{'would create' if dry_run else 'creating'} {index.name} on {table_name}({cols})")
+    if dry_run:
+        return missing
+
+    if any(index.unique and table_name == "node_pricing" for table_name, index in missing):
+        with engine.begin() as conn:
+            removed = _dedupe_node_pricing(conn)
+        if removed:
+            print(f"removed {removed} duplicate node_pricing rows")
+
+    if missing and engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for _, index in missing:
+                index.dialect_options["postgresql"]["concurrently"] = True
+                index.create(conn, checkfirst=True)
+    elif missing:
+        with engine.begin() as conn:
+            for _, index in missing:
+                index.create(conn, checkfirst=True)
+
+    # needs one pricing row per node (unique index above)
+    if inspect(engine).has_table("node_pricing"):
+        with engine.begin() as conn:
+            synced = sync_node_prices(conn)
+        if synced:
+            print(f"synced gpu_nodes.price_per_hour from node_pricing for {synced} node(s)")
+    return missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create indexes declared in models.py on an existing database")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    done = apply(dry_run=args.dry_run)
+    print("nothing to do" if not done else f"{len(done)} index(es) {'missing' if args.dry_run else 'created'}")
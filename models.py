@@ -1,5 +1,5 @@
 # models.py (Final Synced Version)
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -36,29 +36,44 @@ class GPUNode(Base):
     node_key = Column(String, nullable=True)
     is_online = Column(Boolean, nullable=False, default=False)
     last_heartbeat = Column(DateTime, nullable=True)
-    is_public = Column(Boolean, default=True, nullable=False)
+    is_public = Column(Boolean, default=True, nullable=False, index=True)
     price_per_hour = Column(Float, nullable=True)
+    # bumped by every UPDATE (heartbeats included): version stamp of GET /gpu-nodes (etags.py)
+    updated_at = Column(DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     jobs = relationship("Job", back_populates="node", cascade="all, delete-orphan")
     activity_logs = relationship("NodeActivityLog", back_populates="node", cascade="all, delete-orphan")
     pricing = relationship("NodePricing", back_populates="node", uselist=False, cascade="all, delete-orphan")
     earnings = relationship("NodeEarning", back_populates="node", cascade="all, delete-orphan")
+    reliability = relationship("NodeReliability", uselist=False, cascade="all, delete-orphan")
 
 
 # ---------- JOBS ----------
 class Job(Base):
     __tablename__ = "jobs"
+    # scheduler.py: pending jobs per node (queue rebuild), running jobs per node (free slots),
+    # jobs started in the usage window (fair-share usage); GET /job-status?changed_since=
+    __table_args__ = (
+        Index("ix_jobs_status_node", "status", "node_id"),
+        Index("ix_jobs_start_time", "start_time"),
+        Index("ix_jobs_user_updated", "user_id", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     node_id = Column(Integer, ForeignKey("gpu_nodes.id"), nullable=False, index=True)
 
     command = Column(Text, nullable=False)
+    # waiting (job_dag.py: upstream not completed) -> pending (queued) -> running -> completed
     status = Column(String, nullable=False, default="pending")
     result = Column(Text, nullable=True)
+    # large results live in blob_store.py: result is NULL, the row keeps the blob address + size
+    result_blob = Column(String(64), nullable=True)
+    result_size = Column(Integer, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    # bumped by every UPDATE (ORM flush or query.update), so delta polling sees each transition
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     start_time = Column(DateTime, nullable=True)
     end_time = Column(DateTime, nullable=True)
     cost_incurred = Column(Float, default=0.0)
@@ -67,11 +82,29 @@ class Job(Base):
     user = relationship("User", back_populates="jobs")
     node = relationship("GPUNode", back_populates="jobs")
     execution_logs = relationship("GPUExecutionLog", back_populates="job", cascade="all, delete-orphan")
+    log_chunks = relationship("GPUExecutionLogChunk", back_populates="job", cascade="all, delete-orphan")
+    # passive: deleting jobs (e.g. with their node) must not load every job's edges; the database
+    # cascades them where foreign keys are enforced, job_dag.py ignores edges of jobs that are gone
+    dependencies = relationship("JobDependency", cascade="all, delete-orphan", passive_deletes=True)
+
+
+# ---------- JOB DEPENDENCIES ----------
+# Edges of a job pipeline (job_dag.py): job_id runs once depends_on_id has completed.
+# depends_on_id has no foreign key: the upstream job may have moved to jobs_archive.
+class JobDependency(Base):
+    __tablename__ = "job_dependencies"
+
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    depends_on_id = Column(Integer, primary_key=True)
 
 
 # ---------- NODE ACTIVITY LOGS ----------
 class NodeActivityLog(Base):
     __tablename__ = "node_activity_logs"
+    # last heartbeat per node: WHERE node_id IN (..) AND event_type = 'heartbeat' -> max(timestamp)
+    __table_args__ = (
+        Index("ix_node_activity_logs_node_event_ts", "node_id", "event_type", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     node_id = Column(Integer, ForeignKey("gpu_nodes.id"), nullable=False)
@@ -85,6 +118,10 @@ class NodeActivityLog(Base):
 # ---------- NODE PRICING ----------
 class NodePricing(Base):
     __tablename__ = "node_pricing"
+    # one price per node (migrate.py removes older duplicates before creating it)
+    __table_args__ = (
+        Index("ux_node_pricing_node_id", "node_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     node_id = Column(Integer, ForeignKey("gpu_nodes.id", ondelete="CASCADE"))
@@ -98,6 +135,9 @@ class NodePricing(Base):
 # ---------- NODE EARNINGS ----------
 class NodeEarning(Base):
     __tablename__ = "node_earnings"
+    __table_args__ = (
+        Index("ix_node_earnings_node_ts", "node_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     node_id = Column(Integer, ForeignKey("gpu_nodes.id", ondelete="CASCADE"))
@@ -113,6 +153,9 @@ class NodeEarning(Base):
 # ---------- WALLET TRANSACTIONS ----------
 class WalletTransaction(Base):
     __tablename__ = "wallet_transactions"
+    __table_args__ = (
+        Index("ix_wallet_transactions_user_ts", "user_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -127,6 +170,11 @@ class WalletTransaction(Base):
 # ---------- GPU EXECUTION LOG ----------
 class GPUExecutionLog(Base):
     __tablename__ = "gpu_execution_logs"
+    # ids must never be reused: compacted chunks keep the id ranges of deleted rows (SQLite AUTOINCREMENT)
+    __table_args__ = (
+        Index("ix_gpu_execution_logs_job_id_id", "job_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"))
@@ -135,3 +183,107 @@ class GPUExecutionLog(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     job = relationship("Job", back_populates="execution_logs")
+
+
+# ---------- GPU EXECUTION LOG CHUNKS ----------
+# Compressed blocks of consecutive GPUExecutionLog rows of one job (see log_store.py).
+# first_log_id..last_log_id is the id range of the rows packed into the chunk.
+class GPUExecutionLogChunk(Base):
+    __tablename__ = "gpu_execution_log_chunks"
+    __table_args__ = (
+        Index("ix_gpu_execution_log_chunks_job_range", "job_id", "first_log_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
+    first_log_id = Column(Integer, nullable=False)
+    last_log_id = Column(Integer, nullable=False)
+    line_count = Column(Integer, nullable=False)
+    codec = Column(String, nullable=False, default="zlib")
+    raw_size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    job = relationship("Job", back_populates="log_chunks")
+
+
+# ---------- NODE RELIABILITY ----------
+# Stored by reliability.py over the last RELIABILITY_WINDOW_HOURS; the marketplace sorts by score.
+class NodeReliability(Base):
+    __tablename__ = "node_reliability"
+
+    node_id = Column(Integer, ForeignKey("gpu_nodes.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False, default=0.0)  # 0..1
+    uptime_pct = Column(Float, nullable=False, default=0.0)
+    heartbeats = Column(Integer, nullable=False, default=0)
+    gap_p50_seconds = Column(Float, nullable=True)
+    gap_p95_seconds = Column(Float, nullable=True)
+    gap_max_seconds = Column(Float, nullable=True)
+    jobs_total = Column(Integer, nullable=False, default=0)
+    jobs_completed = Column(Integer, nullable=False, default=0)
+    completion_rate = Column(Float, nullable=True)  # None until the node has finished jobs
+    window_hours = Column(Float, nullable=False)
+    activity_cursor = Column(Integer, nullable=False, default=0)  # node_activity_logs.id seen by the run
+    computed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# ---------- WORKER LEASES (leases.py) ----------
+# Background jobs that must run in a single process (reliability refresh): the holder
+# renews its row before expires_at, any worker may take the lease over after that.
+class WorkerLease(Base):
+    __tablename__ = "worker_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+# ---------- CACHE INVALIDATIONS ----------
+# Polling transport of cache_bus.py (CACHE_BUS=table): one row per invalidated key,
+# pruned after CACHE_BUS_RETENTION_SECONDS.
+class CacheInvalidation(Base):
+    __tablename__ = "cache_invalidations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    origin = Column(String, nullable=False)
+    namespace = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# ---------- ARCHIVE (archive.py) ----------
+# Finished jobs older than ARCHIVE_AFTER_DAYS move here, same ids as in `jobs`.
+# No foreign keys: archived rows outlive the node / user rows they point at.
+class JobArchive(Base):
+    __tablename__ = "jobs_archive"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    node_id = Column(Integer, nullable=False, index=True)
+
+    command = Column(Text, nullable=False)
+    status = Column(String, nullable=False)
+    result = Column(Text, nullable=True)
+    result_blob = Column(String(64), nullable=True)
+    result_size = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+    cost_incurred = Column(Float, default=0.0)
+    currency = Column(String, default="INR")
+
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# Whole execution log of an archived job in one compressed block (log_store encoding).
+class JobLogArchive(Base):
+    __tablename__ = "job_log_archives"
+
+    job_id = Column(Integer, primary_key=True)
+    line_count = Column(Integer, nullable=False)
+    codec = Column(String, nullable=False, default="zlib")
+    raw_size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,106 @@
+# pricing.py
+# Single source of truth for "what does this node cost per hour".
+#
+# Resolution order for a node:
+#   1. its NodePricing row            (set via POST /pricing/{node_id})
+#   2. GPUNode.price_per_hour         (legacy column, kept in sync by set_price)
+#   3. DEFAULT_PRICE_PER_HOUR         (₹10/hr unless configured)
+#
+# Results live in a write-through, bus-invalidated cache (cache_bus "pricing"
+# namespace): set_price() commits, tells the other workers, and stores the new
+# price locally, so billing and listings never query pricing on a warm cache.
+# resolve_many() fetches all misses for a list of node ids in one query.
+# Only primary sessions fill the cache: billing reads it, and a lagging replica
+# read right after set_price() would otherwise store the old price with a valid
+# generation. Replica reads (get_read_db) still use cached entries.
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+import cache_bus
+import database
+from models import GPUNode, NodePricing
+
+DEFAULT_PRICE_PER_HOUR = float(os.getenv("DEFAULT_PRICE_PER_HOUR", 10.0))
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "INR")
+PRICING_CACHE_TTL = float(os.getenv("PRICING_CACHE_TTL", 600))
+PRICING_CACHE_SIZE = int(os.getenv("PRICING_CACHE_SIZE", 100000))
+
+_cache = cache_bus.bus.cache("pricing", ttl=PRICING_CACHE_TTL, maxsize=PRICING_CACHE_SIZE)
+
+
+@dataclass(frozen=True)
+class Price:
+    node_id: int
+    price_per_hour: float
+    currency: str
+    is_default: bool  # no NodePricing row: legacy column or DEFAULT_PRICE_PER_HOUR
+    pricing_id: Optional[int] = None
+    last_updated: Optional[datetime] = None
+
+
+def _price(node_id, node_price, pricing_id, price, currency, last_updated) -> Price:
+    if pricing_id is not None and price is not None:
+        return Price(node_id, float(price), currency or DEFAULT_CURRENCY, False, pricing_id, last_updated)
+    if node_price is not None:
+        return Price(node_id, float(node_price), DEFAULT_CURRENCY, True)
+    return Price(node_id, DEFAULT_PRICE_PER_HOUR, DEFAULT_CURRENCY, True)
+
+
+def resolve_many(db: Session, node_ids: Iterable[int]) -> Dict[int, Price]:
+    """node_id -> Price for every existing node in node_ids (unknown ids are left out)."""
+    out: Dict[int, Price] = {}
+    missing = []
+    for node_id in set(node_ids):
+        cached = _cache.get(node_id)
+        if cached is None:
+            missing.append(node_id)
+        else:
+            out[node_id] = cached
+    if missing:
+        generation = _cache.generation
+        fill = database.replica_engine is None or db.get_bind() is not database.replica_engine
+        rows = (
+            db.query(GPUNode.id, GPUNode.price_per_hour, NodePricing.id, NodePricing.price_per_hour,
+                     NodePricing.currency, NodePricing.last_updated)
+            .outerjoin(NodePricing, NodePricing.node_id == GPUNode.id)
+            .filter(GPUNode.id.in_(missing))
+            .all()
+        )
+        for row in rows:
+            price = _price(*row)
+            out[price.node_id] = price
+            if fill:
+                _cache.set(price.node_id, price, generation)
+    return out
+
+
+def resolve(db: Session, node_id: int) -> Optional[Price]:
+    """Price of one node, None if the node does not exist."""
+    return resolve_many(db, (node_id,)).get(node_id)
+
+
+def set_price(db: Session, node_id: int, price_per_hour: float, currency: str = DEFAULT_CURRENCY) -> NodePricing:
+    """Upsert the NodePricing row + legacy GPUNode column, commit, then write through to the caches."""
+    row = db.query(NodePricing).filter(NodePricing.node_id == node_id).first()
+    now = datetime.utcnow()
+    if row:
+        row.price_per_hour = price_per_hour
+        row.currency = currency
+        row.last_updated = now
+    else:
+        row = NodePricing(node_id=node_id, price_per_hour=price_per_hour, currency=currency, last_updated=now)
+        db.add(row)
+    db.query(GPUNode).filter(GPUNode.id == node_id).update({GPUNode.price_per_hour: price_per_hour},
+                                                           synchronize_session=False)
+    db.commit()
+    db.refresh(row)
+    # other workers drop their entry (this one too), then store the committed value here
+    cache_bus.bus.publish("pricing", node_id)
+    _cache.set(node_id, Price(node_id, float(row.price_per_hour), row.currency or DEFAULT_CURRENCY, False,
+                              row.id, row.last_updated))
+    return row
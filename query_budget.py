@@ -0,0 +1,274 @@
+"""
+Query-budget gate: counts the SQL statements each endpoint runs and fails when
+an endpoint goes over its declared budget (catches N+1 regressions).
+
+Every endpoint of main.py and routes/jobs.py is called in-process through
+TestClient against a throw-away SQLite database, with data seeded at several
+sizes N. Budgets are `Budget(base)` (must not grow with N) or
+`Budget(base, per_n)` for endpoints whose cost is knowingly linear in N.
+
+    python query_budget.py                 # all sizes, exit 1 on any violation
+    python query_budget.py --sizes 1 25    # custom sizes
+    python query_budget.py --report        # print counts for every endpoint
+
+Counts include transaction statements the driver sends (e.g. BEGIN IMMEDIATE
+in the SQLite production profile) and the cache-bus message a write publishes
+(CACHE_BUS=table: BEGIN + INSERT), so run it with the same settings as CI.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+
+if __name__ == "__main__":
+    _tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'query_budget.db')}"
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    os.environ.setdefault("JWT_SECRET_KEY", "query-budget")
+    os.environ["WRITE_BEHIND_ENABLED"] = "0"
+    os.environ["LOG_FILE"] = os.path.join(_tmp, "query_budget.log")
+    os.environ["BLOB_DIR"] = os.path.join(_tmp, "blobs")
+
+
+@dataclass(frozen=True)
+class Budget:
+    base: int
+    per_n: int = 0
+
+    def limit(self, n: int) -> int:
+        return self.base + self.per_n * n
+
+
+class QueryCounter:
+    """Counts cursor executions on the given engines (TestClient calls are sequential)."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        self.statements = []
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def reset(self):
+        self.count = 0
+        self.statements = []
+
+
+# ---------------------------------------------------------------------------
+# Seed data: one owner + one renter per size N, everything else scales with N
+# ---------------------------------------------------------------------------
+def seed(SessionLocal, n, create_access_token, hash_password):
+    from models import (User, GPUNode, Job, NodePricing, NodeEarning, WalletTransaction,
+                        GPUExecutionLog, NodeActivityLog, NodeReliability)
+
+    now = datetime.utcnow()
+    db = SessionLocal()
+    owner = User(email=f"owner{n}@qb", username=f"owner{n}", hashed_password=hash_password("pw"))
+    renter = User(email=f"renter{n}@qb", username=f"renter{n}", hashed_password="x", wallet_balance=1e9)
+    db.add_all([owner, renter])
+    db.flush()
+
+    nodes = [GPUNode(owner_id=owner.id, location="in", gpu_model="A100", gpu_count=1, node_key=f"k{n}-{i}",
+                     is_public=True, last_heartbeat=None if i % 2 else now)
+             for i in range(n)]
+    victim = GPUNode(owner_id=owner.id, location="in", gpu_model="T4", gpu_count=1, node_key=f"victim{n}")
+    db.add_all(nodes + [victim])
+    db.flush()
+    db.add_all([NodePricing(node_id=node.id, price_per_hour=12.0) for node in nodes])
+    db.add_all([NodeActivityLog(node_id=node.id, event_type="heartbeat", message="hb") for node in nodes])
+    db.add(NodeReliability(node_id=nodes[0].id, score=0.9, uptime_pct=90.0, window_hours=168.0))
+
+    jobs = [Job(user_id=renter.id, node_id=nodes[0].id, command="train", status="running") for _ in range(n)]
+    victim_jobs = [Job(user_id=renter.id, node_id=victim.id, command="x", status="completed") for _ in range(n)]
+    db.add_all(jobs + victim_jobs)
+    db.flush()
+    db.add_all([NodeEarning(node_id=nodes[i % n].id, job_id=jobs[i].id, amount=5.0) for i in range(n)])
+    db.add_all([WalletTransaction(user_id=renter.id, type="debit", amount=1.0) for _ in range(n)])
+    job_logs = [GPUExecutionLog(job_id=jobs[0].id, log_type="stdout", details=f"line {i}") for i in range(n)]
+    db.add_all(job_logs)
+    db.add_all([GPUExecutionLog(job_id=vj.id, log_type="stdout", details="x") for vj in victim_jobs])
+    db.commit()
+
+    ctx = {
+        "n": n,
+        "owner": {"Authorization": "Bearer " + create_access_token({"user_id": owner.id, "email": owner.email})},
+        "renter": {"Authorization": "Bearer " + create_access_token({"user_id": renter.id, "email": renter.email})},
+        "owner_email": owner.email,
+        "node_id": nodes[0].id,
+        "node_key": nodes[0].node_key,
+        "victim_id": victim.id,
+        "job_id": jobs[0].id,
+        "job2_id": jobs[-1].id,
+        "jobs": [j.id for j in jobs],
+        "log_id": job_logs[0].id,
+    }
+    db.close()
+    return ctx
+
+
+# ---------------------------------------------------------------------------
+# Declared budgets: (client, method, path, request builder, budget)
+# ---------------------------------------------------------------------------
+CASES = [
+    # ---- system / public ----
+    ("main", "GET", "/", lambda c: {}, Budget(0)),
+    ("main", "GET", "/healthz", lambda c: {}, Budget(0)),
+    ("main", "GET", "/db-test", lambda c: {}, Budget(2)),
+    ("main", "GET", "/metrics", lambda c: {}, Budget(0)),
+    ("main", "GET", "/system/write-queue", lambda c: {}, Budget(0)),
+    ("main", "GET", "/system/scheduler", lambda c: {}, Budget(0)),
+    ("main", "GET", "/system/admission", lambda c: {}, Budget(0)),
+    ("main", "GET", "/system/caches", lambda c: {}, Budget(0)),
+    ("main", "GET", "/system/reliability", lambda c: {}, Budget(0)),
+    ("main", "GET", "/marketplace/gpu-nodes", lambda c: {}, Budget(1)),
+    ("main", "GET", "/marketplace/gpu-nodes/{node_id}/reliability", lambda c: {}, Budget(1)),
+    ("main", "GET", "/gpu-nodes/details", lambda c: {}, Budget(3)),
+    ("main", "GET", "/pricing/{node_id}", lambda c: {}, Budget(1)),
+    # ---- auth ----
+    ("main", "POST", "/signup", lambda c: {"json": {"email": f"new{c['n']}@qb", "username": f"new{c['n']}",
+                                                    "password": "pw"}}, Budget(5)),
+    ("main", "POST", "/login", lambda c: {"json": {"email": c["owner_email"], "password": "pw"}}, Budget(1)),
+    ("main", "GET", "/me", lambda c: {"headers": c["owner"]}, Budget(1)),
+    # ---- nodes ----
+    ("main", "GET", "/gpu-nodes", lambda c: {"headers": c["owner"]}, Budget(3)),
+    ("main", "POST", "/gpu-nodes", lambda c: {"headers": c["owner"], "json": {"location": "in", "gpu_model": "L4",
+                                                                              "gpu_count": 1}}, Budget(6)),
+    ("main", "POST", "/gpu-nodes/register", lambda c: {"headers": c["owner"], "json": {"location": "in",
+                                                                                       "gpu_model": "L4",
+                                                                                       "gpu_count": 1}}, Budget(6)),
+    ("main", "POST", "/gpu-nodes/bulk", lambda c: {"headers": c["owner"], "json": [
+        {"location": "in", "gpu_model": "L4", "gpu_count": 1, **({"price_per_hour": 20.0} if i % 2 else {})}
+        for i in range(c["n"])]}, Budget(6)),
+    ("main", "PUT", "/gpu-nodes/{node_id}", lambda c: {"headers": c["owner"], "json": {"location": "mumbai",
+                                                                                       "gpu_model": None,
+                                                                                       "gpu_count": None}},
+     Budget(7)),
+    ("main", "GET", "/node-status/{node_id}", lambda c: {"headers": c["owner"]}, Budget(2)),
+    ("main", "POST", "/node-heartbeat", lambda c: {"json": {"node_id": c["node_id"], "node_key": c["node_key"]}},
+     Budget(4)),
+    ("main", "POST", "/pricing/{node_id}", lambda c: {"headers": c["owner"], "json": {"price_per_hour": 15.0}},
+     Budget(9)),
+    # ---- jobs ----
+    ("main", "POST", "/submit-job", lambda c: {"headers": c["renter"], "json": {"node_id": c["node_id"],
+                                                                                "node_key": c["node_key"],
+                                                                                "command": "python train.py"}},
+     Budget(8)),
+    # 4 steps: one INSERT per job (ids needed: SQLite has no batched RETURNING), debits and
+    # edges one executemany each, one refresh for all jobs
+    ("main", "POST", "/submit-job/dag", lambda c: {"headers": c["renter"], "json": {
+        "node_id": c["node_id"], "node_key": c["node_key"], "steps": [
+            {"name": "prep", "command": "python prep.py"},
+            {"name": "train", "command": "python train.py", "depends_on": ["prep"]},
+            {"name": "eval", "command": "python eval.py", "depends_on": ["train"]},
+            {"name": "report", "command": "python report.py", "depends_on": ["train", "eval"]}]}},
+     Budget(12)),
+    ("main", "GET", "/job-status/{job_id}", lambda c: {"headers": c["renter"]}, Budget(2)),
+    ("main", "GET", "/job-status", lambda c: {"headers": c["renter"], "params": {"ids": c["jobs"]}}, Budget(2)),
+    ("main", "GET", "/job-status?changed_since=2000-01-01T00:00:00", lambda c: {"headers": c["renter"]},
+     Budget(2)),
+    ("main", "GET", "/user-jobs", lambda c: {"headers": c["renter"]}, Budget(3)),
+    ("main", "GET", "/user-jobs?include_archived=true", lambda c: {"headers": c["renter"]}, Budget(5)),
+    # revalidation that matches (If-None-Match: *): user + version stamp, no list query
+    ("main", "GET", "/user-jobs?include_archived=false", lambda c: {"headers": {**c["renter"], "If-None-Match": "*"}},
+     Budget(2)),
+    # completions free a GPU: + running count and the UPDATE starting the next queued job (scheduler.py)
+    ("main", "POST", "/simulate-job-complete/{job2_id}", lambda c: {"headers": c["renter"]}, Budget(14)),
+    ("main", "POST", "/job/complete?job_id={job_id}", lambda c: {"headers": c["renter"]}, Budget(12)),
+    ("main", "PUT", "/job-result/{job_id}", lambda c: {"headers": c["renter"], "content": b"epoch 1\n" * 2000},
+     Budget(5)),
+    ("main", "GET", "/job-result/{job_id}", lambda c: {"headers": c["renter"]}, Budget(3)),
+    # ---- wallet ----
+    ("main", "POST", "/wallet/topup", lambda c: {"headers": c["renter"], "json": {"amount": 10}}, Budget(6)),
+    ("main", "GET", "/wallet/balance", lambda c: {"headers": c["renter"]}, Budget(1)),
+    ("main", "GET", "/wallet/transactions", lambda c: {"headers": c["renter"]}, Budget(3)),
+    # ---- earnings ----
+    ("main", "GET", "/earnings/dashboard", lambda c: {"headers": c["owner"]}, Budget(3)),
+    ("main", "GET", "/earnings/{node_id}", lambda c: {"headers": c["owner"]}, Budget(4)),
+    ("main", "GET", "/earnings/dashboard/{node_id}", lambda c: {"headers": c["owner"]}, Budget(6)),
+    # ---- execution logs ----
+    ("main", "POST", "/gpu-exec/log", lambda c: {"json": {"job_id": c["job_id"], "log_type": "stdout",
+                                                          "details": "hello"}}, Budget(4)),
+    ("main", "POST", "/gpu-exec/logs/bulk",
+     lambda c: {"json": [{"job_id": j, "log_type": "stdout", "details": "x"} for j in c["jobs"]]}, Budget(3)),
+    ("main", "GET", "/gpu-exec/logs/{job_id}", lambda c: {"headers": c["renter"]}, Budget(4)),
+    # ring miss (seeded rows were never published): committed-id check + database read
+    ("main", "GET", "/gpu-exec/logs/{job_id}/follow?timeout=0", lambda c: {"headers": c["renter"]}, Budget(5)),
+    ("main", "GET", "/gpu-exec/logs/{job_id}/details/{log_id}", lambda c: {"headers": c["renter"]}, Budget(4)),
+    # ---- destructive last (ORM cascade loads each child collection: linear in N, declared) ----
+    ("main", "DELETE", "/gpu-nodes/{victim_id}", lambda c: {"headers": c["owner"]}, Budget(13, per_n=2)),
+
+    # ---- routes/jobs.py (APIRouter, mounted on a test app) ----
+    ("jobs", "POST", "/jobs/", lambda c: {"headers": c["renter"], "json": {"node_id": c["node_id"],
+                                                                           "node_key": c["node_key"],
+                                                                           "command": "x"}}, Budget(5)),
+    ("jobs", "GET", "/jobs/", lambda c: {"headers": c["renter"]}, Budget(2)),
+    ("jobs", "GET", "/jobs/{job_id}", lambda c: {"headers": c["renter"]}, Budget(2)),
+    ("jobs", "POST", "/jobs/submit-job", lambda c: {"headers": c["renter"], "json": {"node_id": c["node_id"],
+                                                                                     "node_key": c["node_key"],
+                                                                                     "command": "x"}}, Budget(5)),
+    ("jobs", "GET", "/jobs/job-status/{job_id}", lambda c: {"headers": c["renter"]}, Budget(2)),
+    ("jobs", "POST", "/jobs/job/complete?job_id={job_id}", lambda c: {"headers": c["renter"]}, Budget(5)),
+    ("jobs", "DELETE", "/jobs/{job2_id}", lambda c: {"headers": c["renter"]}, Budget(7)),
+]
+
+
+def run(sizes, report=False):
+    import main
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from auth import create_access_token, hash_password
+    from database import SessionLocal, engine, read_engine, init_db
+    from routes.jobs import router as jobs_router
+
+    init_db()
+    jobs_app = FastAPI()
+    jobs_app.include_router(jobs_router)
+    clients = {"main": TestClient(main.app), "jobs": TestClient(jobs_app)}
+    counter = QueryCounter({engine, read_engine})
+
+    failures = []
+    results = {}
+    for n in sizes:
+        ctx = seed(SessionLocal, n, create_access_token, hash_password)
+        for client_name, method, path, build, budget in CASES:
+            url = path.format(**ctx)
+            counter.reset()
+            resp = clients[client_name].request(method, url, **build(ctx))
+            used = counter.count
+            label = f"{method} {path}" + (" [routes/jobs.py]" if client_name == "jobs" else "")
+            results.setdefault(label, {})[n] = used
+            if resp.status_code >= 400:
+                failures.append(f"{label} (N={n}): HTTP {resp.status_code} {resp.text[:200]}")
+            elif used > budget.limit(n):
+                failures.append(f"{label} (N={n}): {used} queries > budget {budget.limit(n)}\n    "
+                                + "\n    ".join(s.splitlines()[0][:120] for s in counter.statements))
+
+    if report:
+        width = max(len(label) for label in results)
+        print(f"{'endpoint':<{width}}  " + "  ".join(f"N={n:<5}" for n in sizes))
+        for label, counts in results.items():
+            print(f"{label:<{width}}  " + "  ".join(f"{counts.get(n, '-'):<7}" for n in sizes))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--report", action="store_true")
+    args = parser.parse_args()
+
+    failures = run(args.sizes, report=args.report)
+    if failures:
+        print(f"\n{len(failures)} query budget violation(s):", file=sys.stderr)
+        for f in failures:
+            print(" - " + f, file=sys.stderr)
+        sys.exit(1)
+    print(f"query budgets OK for sizes {args.sizes} ({len(CASES)} endpoints)")
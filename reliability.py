@@ -0,0 +1,364 @@
+# reliability.py
+# Per-node reliability scores for the marketplace ranking.
+#
+# Over the last RELIABILITY_WINDOW_HOURS, for every node:
+#   uptime_pct       share of the window covered by heartbeats, each heartbeat vouching
+#                    for at most RELIABILITY_HEARTBEAT_TIMEOUT seconds until the next one;
+#                    nodes first seen inside the window are measured from their first
+#                    heartbeat, but over at least RELIABILITY_MIN_OBSERVED_HOURS (a brand
+#                    new node does not outrank nodes with a week of history)
+#   gap p50/p95/max  distribution of the gaps between consecutive heartbeats
+#   completion_rate  completed / (completed + failed + cancelled + stuck) jobs,
+#                    stuck = running, started more than STUCK_JOB_HOURS ago (pending jobs
+#                    are only queued behind the fair-share scheduler, see scheduler.py)
+#   score            UPTIME_WEIGHT * uptime + (1 - UPTIME_WEIGHT) * completion_rate
+#                    (uptime alone while the node has no finished jobs)
+#
+# Heartbeat timestamps are read as epoch seconds straight from SQL in batches of
+# RELIABILITY_FETCH_ROWS rows and reduced per node with NumPy (segment boundaries,
+# np.add.reduceat, one lexsort for the percentiles); job counts are a single
+# GROUP BY. Without NumPy installed the same numbers come from a per-row
+# Python loop (RELIABILITY_ENGINE=python forces it).
+#
+# Results are stored in node_reliability. A refresh only re-scores nodes with new
+# activity since the last run (activity_cursor) plus nodes whose score is older
+# than RELIABILITY_MAX_AGE_SECONDS, so a silent node still decays. Rows are upserted
+# on node_id. Every worker starts the refresher, but only the holder of the
+# "reliability-refresh" lease (leases.py) refreshes, every RELIABILITY_REFRESH_SECONDS
+# (0 = off, e.g. when cron runs the CLI):
+#   python reliability.py refresh [--full] [--engine numpy|python]
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, case, delete, func, or_, select
+from sqlalchemy.orm import Session
+
+import cache_bus
+import leases
+from database import SessionLocal, new_read_session
+from models import GPUNode, Job, NodeActivityLog, NodeReliability
+
+# optional dependency, imported by _reduce_numpy on first use: a top-level import
+# would add ~120 ms to every worker boot (main imports this module)
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+logger = logging.getLogger("indicompute.reliability")
+
+RELIABILITY_WINDOW_HOURS = float(os.getenv("RELIABILITY_WINDOW_HOURS", 168))
+RELIABILITY_HEARTBEAT_TIMEOUT = float(os.getenv("RELIABILITY_HEARTBEAT_TIMEOUT", 120))
+RELIABILITY_MIN_OBSERVED_HOURS = float(os.getenv("RELIABILITY_MIN_OBSERVED_HOURS", 24))
+RELIABILITY_REFRESH_SECONDS = float(os.getenv("RELIABILITY_REFRESH_SECONDS", 300))
+RELIABILITY_MAX_AGE_SECONDS = float(os.getenv("RELIABILITY_MAX_AGE_SECONDS", 3600))
+RELIABILITY_BATCH_NODES = int(os.getenv("RELIABILITY_BATCH_NODES", 200))
+RELIABILITY_FETCH_ROWS = int(os.getenv("RELIABILITY_FETCH_ROWS", 50000))
+RELIABILITY_ENGINE = os.getenv("RELIABILITY_ENGINE", "numpy" if HAS_NUMPY else "python")
+
+UPTIME_WEIGHT = 0.7
+STUCK_JOB_HOURS = 24
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch(column, dialect: str):
+    """Naive UTC DateTime column -> float seconds since 1970, computed by the database."""
+    if dialect == "sqlite":
+        return (func.julianday(column) - 2440587.5) * 86400.0
+    return func.extract("epoch", column)
+
+
+def _seconds(dt: datetime) -> float:
+    return (dt - _EPOCH).total_seconds()
+
+
+# ---------- reads ----------
+def _heartbeat_batches(db: Session, node_ids: List[int], since: datetime) -> Iterator[list]:
+    """(node_id, epoch seconds) tuples ordered by node, time; RELIABILITY_FETCH_ROWS per batch."""
+    dialect = db.get_bind().dialect.name
+    stmt = (
+        select(NodeActivityLog.node_id, _epoch(NodeActivityLog.timestamp, dialect))
+        .where(NodeActivityLog.node_id.in_(node_ids), NodeActivityLog.event_type == "heartbeat",
+               NodeActivityLog.timestamp >= since)
+        .order_by(NodeActivityLog.node_id, NodeActivityLog.timestamp)
+    )
+    # int + float columns need no result processing: plain tuples from a DBAPI cursor on
+    # the session's connection (Row objects cost ~4x the query itself at millions of
+    # heartbeats). Only ints and our own datetime are bound, so literal binds are safe.
+    conn = db.connection()
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(sql)
+        while True:
+            part = cursor.fetchmany(RELIABILITY_FETCH_ROWS)
+            if not part:
+                break
+            yield part
+    finally:
+        cursor.close()
+
+
+def _first_heartbeats(db: Session, node_ids: List[int]) -> Dict[int, float]:
+    dialect = db.get_bind().dialect.name
+    rows = db.execute(
+        select(NodeActivityLog.node_id, _epoch(func.min(NodeActivityLog.timestamp), dialect))
+        .where(NodeActivityLog.node_id.in_(node_ids), NodeActivityLog.event_type == "heartbeat")
+        .group_by(NodeActivityLog.node_id)
+    ).all()
+    return {node_id: first for node_id, first in rows if first is not None}
+
+
+def _job_counts(db: Session, node_ids: List[int], since: datetime, now: datetime) -> Dict[int, tuple]:
+    """node_id -> (jobs, completed, failed or stuck) for jobs created in the window."""
+    stuck = and_(Job.status == "running", Job.start_time < now - timedelta(hours=STUCK_JOB_HOURS))
+    rows = db.execute(
+        select(Job.node_id, func.count(Job.id),
+               func.sum(case((Job.status == "completed", 1), else_=0)),
+               func.sum(case((or_(Job.status.in_(("failed", "cancelled")), stuck), 1), else_=0)))
+        .where(Job.node_id.in_(node_ids), Job.created_at >= since)
+        .group_by(Job.node_id)
+    ).all()
+    return {node_id: (total, completed or 0, failed or 0) for node_id, total, completed, failed in rows}
+
+
+# ---------- per-node heartbeat reduction: node_id -> (heartbeats, covered seconds, (p50, p95, max) | None) ----------
+def _reduce_numpy(batches: Iterator[list], now: float, timeout: float) -> Dict[int, tuple]:
+    import numpy as np
+
+    # one int64 + one float64 array per fetched batch (np.array over Row objects is ~100x slower)
+    nodes, stamps = [], []
+    for part in batches:
+        nodes.append(np.fromiter((row[0] for row in part), np.int64, len(part)))
+        stamps.append(np.fromiter((row[1] for row in part), np.float64, len(part)))
+    if not nodes:
+        return {}
+    node, ts = np.concatenate(nodes), np.concatenate(stamps)
+
+    starts = np.flatnonzero(np.r_[True, node[1:] != node[:-1]])
+    ends = np.r_[starts[1:], len(ts)]
+    following = np.empty_like(ts)
+    following[:-1] = ts[1:]
+    following[ends - 1] = now  # last heartbeat of each node is followed by "now"
+    covered = np.add.reduceat(np.minimum(following - ts, timeout), starts)
+
+    same = node[1:] == node[:-1]
+    gaps, gap_node = (ts[1:] - ts[:-1])[same], node[1:][same]
+    gap_stats = {}
+    if len(gaps):
+        order = np.lexsort((gaps, gap_node))
+        gaps, gap_node = gaps[order], gap_node[order]
+        g_starts = np.flatnonzero(np.r_[True, gap_node[1:] != gap_node[:-1]])
+        g_last = np.r_[g_starts[1:], len(gaps)] - 1
+        spread = g_last - g_starts
+        gap_stats = dict(zip(
+            gap_node[g_starts].tolist(),
+            zip(gaps[g_starts + spread * 50 // 100].tolist(), gaps[g_starts + spread * 95 // 100].tolist(),
+                gaps[g_last].tolist()),
+        ))
+    return {
+        node_id: (count, total, gap_stats.get(node_id))
+        for node_id, count, total in zip(node[starts].tolist(), (ends - starts).tolist(), covered.tolist())
+    }
+
+
+def _reduce_python(batches: Iterator[list], now: float, timeout: float) -> Dict[int, tuple]:
+    rows = (row for part in batches for row in part)
+    out = {}
+    for node_id, group in groupby(rows, key=itemgetter(0)):
+        ts = [row[1] for row in group]
+        covered = sum(min(b - a, timeout) for a, b in zip(ts, ts[1:] + [now]))
+        gaps = sorted(b - a for a, b in zip(ts, ts[1:]))
+        spread = len(gaps) - 1
+        stats = (gaps[spread * 50 // 100], gaps[spread * 95 // 100], gaps[-1]) if gaps else None
+        out[node_id] = (len(ts), covered, stats)
+    return out
+
+
+ENGINES = {"numpy": _reduce_numpy, "python": _reduce_python}
+
+
+def score_nodes(db: Session, node_ids: List[int], now: Optional[datetime] = None,
+                engine: str = RELIABILITY_ENGINE, window_hours: float = RELIABILITY_WINDOW_HOURS) -> List[Dict]:
+    """node_reliability rows (dicts) for node_ids, computed from the window ending at `now`."""
+    if engine == "numpy" and not HAS_NUMPY:
+        raise RuntimeError("RELIABILITY_ENGINE=numpy but NumPy is not installed")
+    now = now or datetime.utcnow()
+    since = now - timedelta(hours=window_hours)
+    now_s, since_s = _seconds(now), _seconds(since)
+    min_span = min(window_hours, RELIABILITY_MIN_OBSERVED_HOURS) * 3600
+
+    beats = ENGINES[engine](_heartbeat_batches(db, node_ids, since), now_s, RELIABILITY_HEARTBEAT_TIMEOUT)
+    first = _first_heartbeats(db, node_ids)
+    jobs = _job_counts(db, node_ids, since, now)
+
+    out = []
+    for node_id in node_ids:
+        count, covered, gap = beats.get(node_id, (0, 0.0, None))
+        span = max(now_s - max(since_s, first.get(node_id, now_s)), min_span)
+        uptime = min(1.0, covered / span) if span > 0 else 0.0
+        total, completed, failed = jobs.get(node_id, (0, 0, 0))
+        finished = completed + failed
+        rate = completed / finished if finished else None
+        score = uptime if rate is None else UPTIME_WEIGHT * uptime + (1 - UPTIME_WEIGHT) * rate
+        out.append({
+            "node_id": node_id,
+            "score": round(score, 4),
+            "uptime_pct": round(uptime * 100, 2),
+            "heartbeats": count,
+            "gap_p50_seconds": round(gap[0], 3) if gap else None,
+            "gap_p95_seconds": round(gap[1], 3) if gap else None,
+            "gap_max_seconds": round(gap[2], 3) if gap else None,
+            "jobs_total": total,
+            "jobs_completed": completed,
+            "completion_rate": round(rate, 4) if rate is not None else None,
+            "window_hours": window_hours,
+            "computed_at": now,
+        })
+    return out
+
+
+# ---------- incremental refresh ----------
+def _upsert(db: Session, rows: List[Dict]):
+    """INSERT ... ON CONFLICT (node_id) DO UPDATE for a batch of node_reliability rows."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(NodeReliability)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NodeReliability.node_id],
+        set_={name: stmt.excluded[name] for name in rows[0] if name != "node_id"},
+    )
+    db.execute(stmt, rows)
+
+
+def nodes_to_refresh(db: Session, now: datetime, full: bool = False) -> tuple:
+    """(node ids, activity head id): new activity since the stored cursor + scores older than the max age."""
+    head = db.query(func.coalesce(func.max(NodeActivityLog.id), 0)).scalar()
+    if full:
+        return [r[0] for r in db.query(GPUNode.id).order_by(GPUNode.id).all()], head
+    cursor = db.query(func.coalesce(func.max(NodeReliability.activity_cursor), 0)).scalar()
+    active = (
+        db.query(NodeActivityLog.node_id)
+        .join(GPUNode, GPUNode.id == NodeActivityLog.node_id)  # activity of deleted nodes is left out
+        .filter(NodeActivityLog.id > cursor, NodeActivityLog.id <= head)
+        .distinct()
+        .all()
+    )
+    stale = (
+        db.query(GPUNode.id)
+        .outerjoin(NodeReliability, NodeReliability.node_id == GPUNode.id)
+        .filter(or_(NodeReliability.node_id.is_(None),
+                    NodeReliability.computed_at < now - timedelta(seconds=RELIABILITY_MAX_AGE_SECONDS)))
+        .all()
+    )
+    return sorted({r[0] for r in active} | {r[0] for r in stale}), head
+
+
+def refresh(full: bool = False, engine: str = RELIABILITY_ENGINE, now: Optional[datetime] = None) -> Dict:
+    """Re-score the nodes that need it; one short write transaction per RELIABILITY_BATCH_NODES nodes."""
+    started = time.perf_counter()
+    now = now or datetime.utcnow()
+    read = new_read_session()
+    try:
+        node_ids, head = nodes_to_refresh(read, now, full)
+        for start in range(0, len(node_ids), RELIABILITY_BATCH_NODES):
+            batch = node_ids[start:start + RELIABILITY_BATCH_NODES]
+            rows = score_nodes(read, batch, now, engine)
+            for row in rows:
+                row["activity_cursor"] = head
+            db = SessionLocal()
+            try:
+                _upsert(db, rows)
+                if full and start == 0:
+                    db.execute(delete(NodeReliability).where(~NodeReliability.node_id.in_(select(GPUNode.id))))
+                db.commit()
+            finally:
+                db.close()
+    finally:
+        read.close()
+    if node_ids:
+        cache_bus.bus.publish("marketplace", "public")  # ranking changed
+    return {"nodes": len(node_ids), "engine": engine, "full": full,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+LEASE_NAME = "reliability-refresh"
+
+
+class Refresher:
+    """
+    Background thread: refresh() every RELIABILITY_REFRESH_SECONDS (first run shortly after start),
+    in the one worker holding the lease; the others only check it. The lease lasts three intervals,
+    so it is renewed twice over before another worker can take it.
+    """
+
+    def __init__(self, interval: float = RELIABILITY_REFRESH_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.errors = 0
+        self.last_result: Optional[Dict] = None
+        self.last_run_at: Optional[datetime] = None
+        self.leader = False
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reliability-refresh", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        delay = min(self.interval, 10.0)
+        while not self._stop.wait(delay):
+            delay = self.interval
+            try:
+                self.leader = leases.try_acquire(LEASE_NAME, self.interval * 3)
+                if not self.leader:
+                    continue
+                self.last_result = refresh()
+                self.runs += 1
+            except Exception:
+                self.errors += 1
+                logger.exception("reliability refresh failed")
+            self.last_run_at = datetime.utcnow()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.leader:
+            try:
+                leases.release(LEASE_NAME)
+            except Exception:
+                logger.exception("releasing the reliability lease failed")
+            self.leader = False
+
+    def stats(self) -> Dict:
+        return {"interval_seconds": self.interval, "leader": self.leader, "engine": RELIABILITY_ENGINE, "numpy": HAS_NUMPY,
+                "runs": self.runs, "errors": self.errors, "last_run_at": self.last_run_at,
+                "last_result": self.last_result}
+
+
+refresher = Refresher()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recompute node reliability scores")
+    parser.add_argument("command", choices=["refresh"])
+    parser.add_argument("--full", action="store_true", help="every node, not only changed / stale ones")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=RELIABILITY_ENGINE)
+    args = parser.parse_args()
+    result = refresh(full=args.full, engine=args.engine)
+    print(f"scored {result['nodes']} node(s) with {result['engine']} in {result['seconds']}s")
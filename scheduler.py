@@ -0,0 +1,403 @@
+# scheduler.py
+# Weighted fair-share scheduling of queued jobs.
+#
+# POST /submit-job stores the job as "pending" and queues it here; a node runs at
+# most gpu_count jobs at a time (one GPU per job). Whenever a slot may be free
+# (after a submit, after a job completes, every SCHEDULER_TICK_SECONDS) dispatch()
+# starts the next queued jobs of that node, picking across users by fair share:
+#
+#   usage(user)     GPU-hours started in the last SCHEDULER_USAGE_WINDOW_HOURS, decayed
+#                   with a half-life of SCHEDULER_HALF_LIFE_HOURS. submit-job bills one
+#                   hour per job (cost_incurred is not filled in on the live paths), so
+#                   every started job counts as JOB_GPU_HOURS.
+#   vtime(user)     usage / weight   (SCHEDULER_USER_WEIGHTS="7=4,12=0.5", default 1)
+#
+# The user with the lowest virtual time goes next; a user's own jobs run FIFO.
+# State is in memory: per node a heap of (vtime, seq, user) over the users with
+# queued jobs, and per (node, user) a deque of job ids, so a pick is O(log users)
+# and never re-sorts the jobs table. Decay is applied by scaling new charges up
+# (2 ** (t / half-life)) instead of scaling every user down, which leaves the
+# ordering of existing heap entries intact; entries made stale by a charge are
+# fixed lazily when they reach the top of the heap.
+#
+# The database stays the source of truth: a job is started with
+#   UPDATE jobs SET status = 'running' ... WHERE id = ? AND status = 'pending'
+#     AND (SELECT count(*) FROM jobs WHERE node_id = ? AND status = 'running' ...) < gpu_count
+# so a job deleted meanwhile (or started by another worker) is skipped, and
+# dispatchers racing on one node (completion, submit, tick, other workers) can not
+# start more than gpu_count jobs: the slot check is part of the write. SQLite runs
+# it under the database write lock; on PostgreSQL dispatch() first locks the node
+# row (SELECT ... FOR UPDATE) so concurrent dispatches of a node take turns.
+#
+# The in-memory state is built from the pending jobs + the usage window once, at
+# the first tick (load). Later ticks only sync(): queue pending jobs this worker
+# does not know yet (queued by other workers), drop known ones that are no longer
+# pending (started or deleted elsewhere; skipped lazily by pop), and charge jobs
+# started since the previous sync by other workers. Usage otherwise moves only
+# through charge(), so a tick reads the current queue and a few minutes of starts,
+# never a week of history. Jobs queued while a sync runs are kept (merge, not swap).
+# SCHEDULER_ENABLED=0 restores the old behaviour (jobs start at submit).
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from database import SessionLocal
+from models import GPUNode, Job
+
+logger = logging.getLogger("indicompute.scheduler")
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+SCHEDULER_HALF_LIFE_HOURS = float(os.getenv("SCHEDULER_HALF_LIFE_HOURS", 24))
+SCHEDULER_USAGE_WINDOW_HOURS = float(os.getenv("SCHEDULER_USAGE_WINDOW_HOURS", 168))
+SCHEDULER_USER_WEIGHTS = os.getenv("SCHEDULER_USER_WEIGHTS", "")
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", 30))
+SCHEDULER_SLOT_TIMEOUT_HOURS = float(os.getenv("SCHEDULER_SLOT_TIMEOUT_HOURS", 24))
+# starts committed up to this late are still charged by the next sync
+SCHEDULER_SYNC_OVERLAP_SECONDS = float(os.getenv("SCHEDULER_SYNC_OVERLAP_SECONDS", 120))
+
+JOB_GPU_HOURS = 1.0
+_RESCALE_AFTER = 256  # half-lives between re-basing the usage scale (2 ** 256 is still a safe float)
+
+
+def parse_weights(spec: str) -> Dict[int, float]:
+    weights = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        user_id, _, weight = part.partition("=")
+        weights[int(user_id)] = float(weight)
+    return weights
+
+
+class FairShareScheduler:
+    """In-memory queues of pending job ids, ordered across users by weighted decayed usage."""
+
+    def __init__(self, half_life_hours: float = SCHEDULER_HALF_LIFE_HOURS,
+                 weights: Optional[Dict[int, float]] = None):
+        self.half_life = half_life_hours * 3600.0
+        self.weights = weights if weights is not None else parse_weights(SCHEDULER_USER_WEIGHTS)
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._base = datetime.utcnow()
+        self._usage: Dict[int, float] = {}  # user -> usage scaled to 2 ** ((t - base) / half-life)
+        self._queues: Dict[int, Dict[int, deque]] = {}  # node -> user -> job ids
+        self._heaps: Dict[int, list] = {}  # node -> [(vtime, seq, user)], one entry per queued user
+        self._queued: set = set()  # job ids in the queues; ids dropped from it are skipped by pop
+        self._charged: Dict[int, datetime] = {}  # job id -> start time, starts charged in the sync overlap
+        self.dispatched = 0
+        self.loaded_at: Optional[datetime] = None
+        self.synced_at: Optional[datetime] = None
+
+    # ---------- usage ----------
+    def _scale(self, at: datetime) -> float:
+        return 2.0 ** ((at - self._base).total_seconds() / self.half_life)
+
+    def _vtime(self, user_id: int) -> float:
+        return self._usage.get(user_id, 0.0) / self.weights.get(user_id, 1.0)
+
+    def _charge(self, user_id: int, gpu_hours: float, at: datetime):
+        if (at - self._base).total_seconds() > _RESCALE_AFTER * self.half_life:
+            self._rebase(at)
+        self._usage[user_id] = self._usage.get(user_id, 0.0) + gpu_hours * self._scale(at)
+
+    def _rebase(self, at: datetime):
+        factor = 1.0 / self._scale(at)
+        self._usage = {u: v * factor for u, v in self._usage.items()}
+        self._base = at
+        for node_id, users in self._queues.items():
+            heap = [(self._vtime(u), next(self._seq), u) for u in users]
+            heapq.heapify(heap)
+            self._heaps[node_id] = heap
+
+    def charge(self, user_id: int, gpu_hours: float = JOB_GPU_HOURS, at: Optional[datetime] = None,
+               job_id: Optional[int] = None):
+        at = at or datetime.utcnow()
+        with self._lock:
+            self._charge(user_id, gpu_hours, at)
+            if job_id is not None:
+                self._charged[job_id] = at  # sync() must not charge this start again
+
+    def usage(self, user_id: int, at: Optional[datetime] = None) -> float:
+        """Decayed GPU-hours of a user as of `at`."""
+        with self._lock:
+            return self._usage.get(user_id, 0.0) / self._scale(at or datetime.utcnow())
+
+    # ---------- queues ----------
+    def enqueue(self, node_id: int, user_id: int, job_id: int):
+        with self._lock:
+            if job_id in self._queued:
+                return
+            self._queued.add(job_id)
+            users = self._queues.setdefault(node_id, {})
+            queue = users.get(user_id)
+            if queue is None:
+                queue = users[user_id] = deque()
+                heapq.heappush(self._heaps.setdefault(node_id, []), (self._vtime(user_id), next(self._seq), user_id))
+            queue.append(job_id)
+
+    def requeue(self, node_id: int, user_id: int, job_id: int):
+        """Put a popped job back at the head of its user's queue (it could not be started)."""
+        with self._lock:
+            self._queued.add(job_id)
+            users = self._queues.setdefault(node_id, {})
+            queue = users.get(user_id)
+            if queue is None:
+                queue = users[user_id] = deque()
+                heapq.heappush(self._heaps.setdefault(node_id, []), (self._vtime(user_id), next(self._seq), user_id))
+            queue.appendleft(job_id)
+
+    def pop(self, node_id: int) -> Optional[Tuple[int, int]]:
+        """Next (job id, user id) for a node, removed from its queue; None if nothing is queued."""
+        with self._lock:
+            heap = self._heaps.get(node_id)
+            while heap:
+                vtime, _, user_id = heap[0]
+                current = self._vtime(user_id)
+                if vtime != current:
+                    # charged since this entry was pushed: put it back at its real position
+                    heapq.heapreplace(heap, (current, next(self._seq), user_id))
+                    continue
+                users = self._queues[node_id]
+                queue = users[user_id]
+                job_id = None
+                while queue and job_id is None:
+                    candidate = queue.popleft()
+                    if candidate in self._queued:  # else dropped by sync(): started / deleted elsewhere
+                        self._queued.discard(candidate)
+                        job_id = candidate
+                if queue:
+                    heapq.heapreplace(heap, (current, next(self._seq), user_id))
+                else:
+                    heapq.heappop(heap)
+                    del users[user_id]
+                if not heap:
+                    del self._heaps[node_id]
+                    del self._queues[node_id]
+                if job_id is not None:
+                    return job_id, user_id
+            return None
+
+    def has_queued(self, node_id: int) -> bool:
+        return node_id in self._heaps
+
+    def queued_nodes(self) -> List[int]:
+        with self._lock:
+            return list(self._heaps)
+
+    def load(self, db: Session, now: Optional[datetime] = None):
+        """Build queues and usage from the database (pending jobs + jobs started in the usage window); at startup."""
+        now = now or datetime.utcnow()
+        pending = (
+            db.query(Job.id, Job.node_id, Job.user_id)
+            .filter(Job.status == "pending")
+            .order_by(Job.node_id, Job.id)
+            .all()
+        )
+        started = (
+            db.query(Job.id, Job.user_id, Job.start_time)
+            .filter(Job.start_time >= now - timedelta(hours=SCHEDULER_USAGE_WINDOW_HOURS))
+            .all()
+        )
+        usage: Dict[int, float] = {}
+        for _, user_id, start_time in started:
+            usage[user_id] = usage.get(user_id, 0.0) + JOB_GPU_HOURS * 2.0 ** (
+                (start_time - now).total_seconds() / self.half_life)
+        queues: Dict[int, Dict[int, deque]] = {}
+        for job_id, node_id, user_id in pending:
+            queues.setdefault(node_id, {}).setdefault(user_id, deque()).append(job_id)
+
+        horizon = now - timedelta(seconds=SCHEDULER_SYNC_OVERLAP_SECONDS)
+
+        with self._lock:
+            queued = {row[0] for row in pending}
+            for node_id, users in self._queues.items():  # enqueued while the SELECTs ran
+                for user_id, queue in users.items():
+                    for job_id in queue:
+                        if job_id in self._queued and job_id not in queued:
+                            queued.add(job_id)
+                            queues.setdefault(node_id, {}).setdefault(user_id, deque()).append(job_id)
+            self._base = now
+            self._usage = usage
+            self._queues = queues
+            self._queued = queued
+            self._charged = {job_id: start_time for job_id, _, start_time in started if start_time >= horizon}
+            self._heaps = {}
+            for node_id, users in queues.items():
+                heap = [(self._vtime(u), next(self._seq), u) for u in users]
+                heapq.heapify(heap)
+                self._heaps[node_id] = heap
+            self.loaded_at = self.synced_at = now
+
+    def sync(self, db: Session, now: Optional[datetime] = None) -> Dict:
+        """Merge what other workers changed since the last load / sync into the in-memory state."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            known = set(self._queued)
+            since = (self.synced_at or now) - timedelta(seconds=SCHEDULER_SYNC_OVERLAP_SECONDS)
+        pending = (
+            db.query(Job.id, Job.node_id, Job.user_id)
+            .filter(Job.status == "pending")
+            .order_by(Job.node_id, Job.id)
+            .all()
+        )
+        started = db.query(Job.id, Job.user_id, Job.start_time).filter(Job.start_time >= since).all()
+
+        added = [row for row in pending if row[0] not in known]
+        for job_id, node_id, user_id in added:
+            self.enqueue(node_id, user_id, job_id)
+        with self._lock:
+            # known before the query and not pending any more: started / deleted by another worker
+            gone = known - {row[0] for row in pending}
+            self._queued -= gone
+            charged = 0
+            for job_id, user_id, start_time in started:
+                if job_id not in self._charged:
+                    self._charge(user_id, JOB_GPU_HOURS, start_time)
+                    self._charged[job_id] = start_time
+                    charged += 1
+            horizon = now - timedelta(seconds=SCHEDULER_SYNC_OVERLAP_SECONDS)
+            self._charged = {j: t for j, t in self._charged.items() if t >= horizon}
+            self.synced_at = now
+        return {"added": len(added), "dropped": len(gone), "charged": charged}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"enabled": SCHEDULER_ENABLED, "queued_jobs": len(self._queued), "nodes_with_queue": len(self._queues),
+                    "users_with_usage": len(self._usage), "half_life_hours": self.half_life / 3600.0,
+                    "weights": self.weights, "dispatched": self.dispatched, "loaded_at": self.loaded_at,
+                    "synced_at": self.synced_at}
+
+
+scheduler = FairShareScheduler()
+
+
+# ---------- dispatch ----------
+def _holds_slot(job, node_id: int, now: datetime):
+    """Running on the node; jobs running longer than SCHEDULER_SLOT_TIMEOUT_HOURS count as stuck."""
+    since = now - timedelta(hours=SCHEDULER_SLOT_TIMEOUT_HOURS)
+    return (job.status == "running") & (job.node_id == node_id) & (
+        func.coalesce(job.start_time, job.created_at) >= since)
+
+
+def running_jobs(db: Session, node_id: int, now: datetime) -> int:
+    """Jobs holding a slot on the node."""
+    return db.query(func.count(Job.id)).filter(_holds_slot(Job, node_id, now)).scalar()
+
+
+def dispatch(db: Session, node_id: int, gpu_count: int, now: Optional[datetime] = None) -> List[int]:
+    """Start queued jobs on a node while it has free slots. Commits; returns the started job ids."""
+    if not scheduler.has_queued(node_id):
+        return []
+    now = now or datetime.utcnow()
+    slots = gpu_count or 1
+    if db.get_bind().dialect.name == "postgresql":
+        db.query(GPUNode.id).filter(GPUNode.id == node_id).with_for_update().first()
+    free = slots - running_jobs(db, node_id, now)
+    running = aliased(Job)
+    has_free_slot = select(func.count(running.id)).where(_holds_slot(running, node_id, now)).scalar_subquery() < slots
+    started = []
+    while free > 0:
+        pick = scheduler.pop(node_id)
+        if pick is None:
+            break
+        job_id, user_id = pick
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "pending", has_free_slot)
+            .values(status="running", start_time=now, updated_at=now,
+                    result="Job '" + Job.command + "' is running.")
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            scheduler.charge(user_id, JOB_GPU_HOURS, now, job_id)
+            started.append(job_id)
+            free -= 1
+        elif db.query(Job.status).filter(Job.id == job_id).scalar() == "pending":
+            # still queued, but the node filled up after the count above: keep its place
+            scheduler.requeue(node_id, user_id, job_id)
+            break
+    if started:
+        db.commit()
+        scheduler.dispatched += len(started)
+    else:
+        db.rollback()  # end the transaction: releases the node row lock / SQLite write lock
+    return started
+
+
+def submit(db: Session, job_id: int, node_id: int, user_id: int, gpu_count: int) -> bool:
+    """Queue a committed pending job and try to start it right away. True if it is running now."""
+    scheduler.enqueue(node_id, user_id, job_id)
+    return job_id in dispatch(db, node_id, gpu_count)
+
+
+def tick(db: Session) -> Dict:
+    """Load (first tick) or sync with the database, then dispatch on every node with queued jobs."""
+    import job_dag  # imports this module
+
+    job_dag.load(db)  # pipeline steps whose upstream jobs completed elsewhere become pending first
+    if scheduler.loaded_at is None:
+        scheduler.load(db)
+    else:
+        scheduler.sync(db)
+    nodes = scheduler.queued_nodes()
+    started = 0
+    if nodes:
+        gpu_counts = dict(db.query(GPUNode.id, GPUNode.gpu_count).filter(GPUNode.id.in_(nodes)).all())
+        for node_id in nodes:
+            if node_id in gpu_counts:
+                started += len(dispatch(db, node_id, gpu_counts[node_id]))
+    return {"nodes": len(nodes), "started": started}
+
+
+class Dispatcher:
+    """Background thread: tick() every SCHEDULER_TICK_SECONDS; the first one at start."""
+
+    def __init__(self, interval: float = SCHEDULER_TICK_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.errors = 0
+        self.last_result: Optional[Dict] = None
+
+    def start(self):
+        if not SCHEDULER_ENABLED or self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler-tick", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        delay = 0.0
+        while not self._stop.wait(delay):
+            delay = self.interval
+            db = SessionLocal()
+            try:
+                self.last_result = tick(db)
+                self.runs += 1
+            except Exception:
+                self.errors += 1
+                logger.exception("scheduler tick failed")
+                db.rollback()
+            finally:
+                db.close()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        return {**scheduler.stats(), "tick_seconds": self.interval, "ticks": self.runs, "errors": self.errors,
+                "last_tick": self.last_result}
+
+
+dispatcher = Dispatcher()
@@ -1,6 +1,6 @@
 # --- schemas.py (Final, Clean & Pydantic v2 Compatible) ---
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -55,9 +55,39 @@ class GPUNodeResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MarketplaceNodeOut(GPUNodeResponse):
+    reliability_score: Optional[float] = None  # None until reliability.py has scored the node
+    uptime_pct: Optional[float] = None
+
+
+class NodeReliabilityOut(BaseModel):
+    node_id: int
+    score: float
+    uptime_pct: float
+    heartbeats: int
+    gap_p50_seconds: Optional[float]
+    gap_p95_seconds: Optional[float]
+    gap_max_seconds: Optional[float]
+    jobs_total: int
+    jobs_completed: int
+    completion_rate: Optional[float]
+    window_hours: float
+    computed_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
 # =====================================================
 # =============== NODE REGISTER =======================
 # =====================================================
+class BulkNodeSpec(BaseModel):
+    """One node of a bulk fleet registration (POST /gpu-nodes/bulk), optional per-node price."""
+    location: str = Field(min_length=1)
+    gpu_model: str = Field(min_length=1)
+    gpu_count: int = Field(ge=1)
+    price_per_hour: Optional[float] = Field(default=None, ge=0)
+    currency: str = "INR"
+
+
 class NodeRegisterRequest(BaseModel):
     location: str
     gpu_model: str
@@ -114,11 +144,36 @@ class JobResponse(BaseModel):
     command: str
     status: str
     result: Optional[str]
+    result_blob: Optional[str] = None  # set when the result is in the blob store: GET /job-result/{id}
+    result_size: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
 
+class JobStepCreate(BaseModel):
+    name: str = Field(..., min_length=1, example="train")
+    command: str = Field(..., example="python train.py")
+    depends_on: List[str] = Field(default_factory=list, example=["prep"])  # names of earlier steps
+
+
+class JobDAGCreate(BaseModel):
+    node_id: int = Field(..., example=1)
+    node_key: str = Field(..., example="a1b2c3d4f5g6h7i8")
+    steps: List[JobStepCreate]
+
+
+class JobDAGOut(BaseModel):
+    jobs: List[JobResponse]  # in dependency order
+    job_ids: Dict[str, int]  # step name -> job id
+
+
+class JobStatusBatchOut(BaseModel):
+    jobs: List[JobResponse]
+    missing_ids: List[int]  # requested ids that are not (or not your) jobs
+    cursor: datetime  # pass back as changed_since on the next poll
+
+
 # =====================================================
 # =============== BLOCK G =============================
 # =====================================================
@@ -207,6 +262,23 @@ class GPUExecutionLogOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class WriteQueuedOut(BaseModel):
+    detail: str
+    queue_depth: int
+
+
+class GPUExecutionLogFollowOut(BaseModel):
+    lines: List[GPUExecutionLogOut]
+    cursor: int
+
+
+class GPUExecutionLogBulkOut(BaseModel):
+    inserted: int
+    rejected: int
+    batches: int
+    missing_job_ids: List[int]
+
+
 # ---------- OWNER DASHBOARD ----------
 class NodeEarningsDashboard(BaseModel):
     node_id: int
@@ -215,3 +287,12 @@ class NodeEarningsDashboard(BaseModel):
     total_jobs: int
     last_payout: Optional[datetime]
     model_config = ConfigDict(from_attributes=True)
+
+
+class OwnerEarningsDashboard(BaseModel):
+    owner_id: int
+    total_nodes: int
+    total_earnings: float
+    limit: int
+    offset: int
+    nodes: List[NodeEarningsDashboard]
@@ -0,0 +1,254 @@
+# write_behind.py
+# Bounded write-behind queue for append-only inserts that nobody reads right away
+# (NodeActivityLog heartbeats, single GPUExecutionLog lines).
+#
+# Endpoints call writer.submit(Model, row); a background thread groups rows into
+# one executemany INSERT + commit per batch, flushing when WRITE_BEHIND_BATCH_SIZE
+# rows are pending or WRITE_BEHIND_FLUSH_MS has passed. A full queue raises
+# QueueFullError (endpoints answer 503 + Retry-After). stop() drains everything
+# still queued, it is called from the app lifespan on shutdown.
+#
+# A batch that still fails after WRITE_BEHIND_RETRIES attempts is split in halves
+# (and those again) so only rows that can never insert are dropped and counted,
+# e.g. a log line for a job deleted after its 202 or an activity row for a deleted
+# node. Connection-level errors (database gone) drop the batch without splitting.
+#
+# Enabled with WRITE_BEHIND_ENABLED=1 (default: off, inserts stay on the request path).
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import exc, insert
+
+from database import SessionLocal
+
+logger = logging.getLogger("indicompute")
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "0") == "1"
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", 10000))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 500))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", 200))
+WRITE_BEHIND_RETRIES = 3
+
+_STOP = object()
+
+
+class QueueFullError(Exception):
+    """The write-behind queue is at capacity; caller should shed the request."""
+
+
+class WriteBehindWriter:
+    def __init__(self, max_queue: int = WRITE_BEHIND_MAX_QUEUE, batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 flush_ms: int = WRITE_BEHIND_FLUSH_MS, session_factory=SessionLocal):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self.session_factory = session_factory
+        self._queue: "queue.Queue" = queue.Queue()
+        # rows queued + rows in the batch being flushed; capacity is checked against this
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # model -> callback(rows returned by INSERT .. RETURNING)
+        self._after_flush: Dict[type, Callable[[List], None]] = {}
+        self._returning: Dict[type, tuple] = {}
+
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # ---------- producer side ----------
+    def on_flush(self, model, returning: tuple, callback: Callable[[List], None]):
+        """Run callback with the RETURNING rows of every flushed batch of `model`."""
+        self._returning[model] = returning
+        self._after_flush[model] = callback
+
+    def submit(self, model, row: dict):
+        self.start()
+        with self._pending_lock:
+            if self._pending >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(f"write-behind queue full ({self.max_queue} rows)")
+            self._pending += 1
+            self.enqueued += 1
+        self._queue.put_nowait((model, row))
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Flush everything still queued and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)  # queued rows are ahead of the sentinel
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("write-behind: drain did not finish within %.0fs, %d rows left", timeout, self.depth)
+        self._thread = None
+
+    # ---------- consumer side ----------
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._flush(batch)
+        # drain whatever was queued after the sentinel (late submits during shutdown)
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._flush(leftover)
+
+    def _flush(self, batch: List[tuple]):
+        try:
+            self._write(batch)
+        except Exception:  # never let a flush kill the writer thread
+            self.dropped += len(batch)
+            logger.exception("write-behind: dropping %d rows", len(batch))
+        finally:
+            with self._pending_lock:
+                self._pending -= len(batch)
+
+    def _insert(self, batch: List[tuple]) -> Dict[type, List]:
+        """One transaction for the batch; returns the RETURNING rows per model."""
+        grouped = defaultdict(list)
+        for model, row in batch:
+            grouped[model].append(row)
+        db = self.session_factory()
+        try:
+            returned = {}
+            for model, rows in grouped.items():
+                if model in self._returning:
+                    stmt = insert(model).returning(*self._returning[model])
+                    returned[model] = db.execute(stmt, rows).all()
+                else:
+                    db.execute(insert(model), rows)
+            db.commit()
+            return returned
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write(self, batch: List[tuple]):
+        t0 = time.perf_counter()
+        for attempt in range(1, WRITE_BEHIND_RETRIES + 1):
+            try:
+                returned = self._insert(batch)
+                break
+            except (exc.OperationalError, exc.InterfaceError):
+                if attempt == WRITE_BEHIND_RETRIES:
+                    self.dropped += len(batch)
+                    logger.exception("write-behind: dropping %d rows after %d attempts", len(batch), attempt)
+                    return
+            except Exception:
+                if attempt == WRITE_BEHIND_RETRIES:
+                    logger.exception("write-behind: batch of %d rows failed %d times, splitting it",
+                                     len(batch), attempt)
+                    self._write_split(batch)
+                    return
+            time.sleep(0.1 * attempt)
+        self._written(len(batch), returned, t0)
+
+    def _write_split(self, batch: List[tuple]):
+        """Write the halves of a failing batch separately, down to single rows; drop only the rows that fail."""
+        t0 = time.perf_counter()
+        try:
+            returned = self._insert(batch)
+        except (exc.OperationalError, exc.InterfaceError):
+            self.dropped += len(batch)
+            logger.exception("write-behind: dropping %d rows", len(batch))
+            return
+        except Exception:
+            if len(batch) == 1:
+                self.dropped += 1
+                model, row = batch[0]
+                logger.warning("write-behind: dropping a %s row that can not be inserted", model.__name__,
+                               exc_info=True, extra={"row": row})
+                return
+            half = len(batch) // 2
+            self._write_split(batch[:half])
+            self._write_split(batch[half:])
+            return
+        self._written(len(batch), returned, t0)
+
+    def _written(self, count: int, returned: Dict[type, List], t0: float):
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.flushes += 1
+        self.written += count
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+        for model, rows in returned.items():
+            try:
+                self._after_flush[model](rows)
+            except Exception:
+                logger.exception("write-behind: after-flush callback failed for %s", model.__name__)
+
+    # ---------- stats ----------
+    @property
+    def depth(self) -> int:
+        return self._pending
+
+    def stats(self) -> dict:
+        return {
+            "enabled": WRITE_BEHIND_ENABLED,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queue_depth": self.depth,
+            "queue_capacity": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+
+writer = WriteBehindWriter()